@@ -0,0 +1,29 @@
+import argparse
+from util.bulk import bulk_topk
+from util.helper_classes import Reproduce
+from util.prediction import LinkPredictor
+
+# Materialize top-k tails of all observed (h,r) pairs of a dataset into .npy shards, e.g.,
+# python bulk_predict.py --data_path KGs/FB15k-237/ --model PretrainedModels/FB15K-237/QMultBatch:QMultBatch
+#                        --out_dir predictions/
+# Rerunning the same command resumes an interrupted job. Shards are read via util.bulk.load_shards.
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_path', required=True)
+parser.add_argument('--model', required=True, help='checkpoint folder:model name')
+parser.add_argument('--out_dir', required=True)
+parser.add_argument('--k', type=int, default=10)
+parser.add_argument('--unfiltered', action='store_true', help='keep entities of known triples')
+parser.add_argument('--shard_size', type=int, default=100000, help='number of (h,r) pairs per shard')
+parser.add_argument('--batch_size', type=int, default=1024)
+parser.add_argument('--block_size', type=int, default=None, help='score entities in blocks of block_size')
+parser.add_argument('--num_workers', type=int, default=4, help='threads writing shards')
+args = parser.parse_args()
+if not all(args.model.rpartition(':')[::2]):
+    parser.error('--model expects checkpoint folder:model name, got {0}'.format(args.model))
+
+reproduce = Reproduce()
+dataset = reproduce.load_dataset(args.data_path)
+model_path, model_name = args.model.rsplit(':', 1)
+predictor = LinkPredictor(reproduce.load_model(model_path, model_name), dataset, batch_size=args.batch_size,
+                          block_size=args.block_size)
+bulk_topk(predictor, args.out_dir, args.k, not args.unfiltered, args.shard_size, args.num_workers)
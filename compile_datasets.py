@@ -0,0 +1,8 @@
+from util.data import Data
+
+datasets = ['FB15k-237', 'YAGO3-10', 'WN18RR', 'FB15k', 'WN18', 'UMLS', 'KINSHIP']
+
+# Encode each KG once into memory-mappable arrays (KGs/<dataset>/compiled).
+# Data(data_dir=..., columnar=True) loads them instead of parsing train.txt, valid.txt and test.txt.
+for kg_root in datasets:
+    print('Compiled:', Data.compile('KGs/' + kg_root + '/'))
@@ -0,0 +1,16 @@
+import argparse
+from util.metrics import load_ranks, print_views
+
+# Recompute metrics from ranks.npz files written by Experiment(..., store_ranks=True) or
+# Reproduce().reproduce(..., rank_path=...) without loading any model.
+parser = argparse.ArgumentParser()
+parser.add_argument('paths', nargs='+', help='.npz files of per-triple ranks')
+parser.add_argument('--tie_policy', default='optimistic', choices=['optimistic', 'realistic', 'pessimistic'])
+parser.add_argument('--hits_at', type=int, nargs='+', default=[1, 3, 10])
+args = parser.parse_args()
+
+for path in args.paths:
+    metrics, relations = load_ranks(path, tie_policy=args.tie_policy, hits_at=args.hits_at)
+    print('###########################################     {0}     ##########################################'.format(
+        path))
+    print_views(metrics.views(relations))
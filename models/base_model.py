@@ -0,0 +1,231 @@
+import itertools
+import torch
+from torch.nn import functional as F
+from torch.nn.init import xavier_normal_
+from models.hypercomplex import hypercomplex_interaction, hypercomplex_mul, unit_normalize
+
+
+def sparse_bce_with_logits(logits, rows, cols, label_smoothing=0.0, num_entities=None, mask=None):
+    """
+    torch.nn.BCELoss()(torch.sigmoid(logits), targets) without building targets, where targets are 1 at (rows, cols)
+    and label smoothed as (1 - label_smoothing) * targets + 1 / num_entities.
+    Per entry, binary cross entropy with logits is softplus(x) - y * x, hence the sum over y * x only needs
+    the logits of positives and the sum of all logits.
+    num_entities: |Entities|, logits.size(1) if None, i.e., scores of sampled candidates are smoothed as
+    scores of all entities.
+    mask: optional boolean tensor of the shape of logits, entries that are False are not part of the loss.
+    """
+    smoothing = 1.0 / (num_entities or logits.size(1)) if label_smoothing else 0.0
+    positives = (1.0 - label_smoothing) * logits[rows, cols].sum()
+    if mask is None:
+        return (F.softplus(logits).sum() - positives - smoothing * logits.sum()) / logits.numel()
+    return (F.softplus(logits)[mask].sum() - positives - smoothing * logits[mask].sum()) / mask.sum()
+
+
+# Modules with one table per component in checkpoints prior to the fused layout, e.g., emb_ent_real, emb_ent_i, ...
+FUSED_MODULES = ('emb_ent', 'emb_rel', 'bn_ent', 'bn_rel')
+
+
+def fuse_legacy_state_dict(state_dict, components, prefix=''):
+    """
+    Convert a state dict with one embedding/BN per component (emb_ent_real.weight, emb_ent_i.weight, ...)
+    into the fused layout (emb_ent.weight of shape (N, C * d)) in place.
+    Components are concatenated in the given order, e.g., components=QMult.components.
+    """
+    for module in FUSED_MODULES:
+        legacy = prefix + module + '_' + components[0] + '.'
+        for key in [k for k in state_dict if k.startswith(legacy)]:
+            name = key[len(legacy):]
+            values = [state_dict.pop(prefix + module + '_' + c + '.' + name) for c in components]
+            if values[0].dim() == 0:  # num_batches_tracked
+                state_dict[prefix + module + '.' + name] = values[0]
+            else:
+                state_dict[prefix + module + '.' + name] = torch.cat(values, values[0].dim() - 1)
+    return state_dict
+
+
+class BaseKGE(torch.nn.Module):
+    """
+    Base class of hypercomplex models.
+    Entities and relations are stored in one (N, C * d) table each, i.e., the C components of an embedding are
+    contiguous. Subclasses implement forward_head_query, the hypercomplex representation of (h,r) in the same layout,
+    hence scores are one gather and one matrix multiplication.
+    Checkpoints with one table per component are fused while loading, see fuse_legacy_state_dict.
+    """
+    components = ()
+    # Relations are normalized to unit norm before multiplication (norm_flag).
+    unit_norm = False
+    # forward_head_query is head_relation_product up to dropout, i.e., scores are linear in relations.
+    bilinear = False
+
+    def __init__(self):
+        super().__init__()
+        self._register_load_state_dict_pre_hook(self._fuse_legacy_state_dict)
+        self._frozen = None
+
+    def _fuse_legacy_state_dict(self, state_dict, prefix, *args):
+        fuse_legacy_state_dict(state_dict, self.components, prefix)
+
+    def forward_head_query(self, *, e1_idx, rel_idx):
+        """ Representation of a batch of (h,r), shape (size of batch, C * d)."""
+        raise NotImplementedError
+
+    def transform_entities(self, x):
+        """ Entity embeddings x as used in inner products, e.g., BN + Dropout."""
+        return x
+
+    def transform_heads(self, x):
+        """ Embeddings x of head entities as used in the hypercomplex product."""
+        return x
+
+    def transform_relations(self, x):
+        """ Relation embeddings x as used in the hypercomplex product, unit normalization aside."""
+        return x
+
+    def entity_embeddings(self, idx=None):
+        """ Representation of entities idx (ALL entities if idx is None), shape (len(idx), C * d)."""
+        return self._embeddings('entities', self.emb_ent, self.transform_entities, idx)
+
+    def head_embeddings(self, idx=None):
+        """ Representation of head entities idx (ALL entities if idx is None), shape (len(idx), C * d)."""
+        return self._embeddings('heads', self.emb_ent, self.transform_heads, idx)
+
+    def relation_embeddings(self, idx=None):
+        """ Representation of relations idx (ALL relations if idx is None), unit normalized if self.unit_norm."""
+        relations = self._embeddings('relations', self.emb_rel, self.transform_relations, idx)
+        if self.unit_norm and self.frozen_tables() is None:
+            relations = unit_normalize(relations, len(self.components))
+        return relations
+
+    def _embeddings(self, name, embedding, transform, idx):
+        frozen = self.frozen_tables()
+        if frozen is not None:
+            return frozen[name] if idx is None else frozen[name][idx]
+        return transform(embedding.weight if idx is None else embedding(idx))
+
+    def head_relation_product(self, e1_idx, rel_idx):
+        """ Hypercomplex product of head entities and relations, shape (size of batch, C * d)."""
+        frozen = self.frozen_tables()
+        if frozen is not None:
+            return hypercomplex_mul(frozen['heads'][e1_idx], frozen['relations'][rel_idx], len(self.components))
+        # Unit normalization within the product saves memory, see HypercomplexMul.
+        return hypercomplex_mul(self.transform_heads(self.emb_ent(e1_idx)),
+                                self.transform_relations(self.emb_rel(rel_idx)), len(self.components),
+                                unit_norm=self.unit_norm)
+
+    def head_tail_interaction(self, e1_idx, e2_idx):
+        """ w with <head_relation_product(h, r), entity_embeddings(t)> = <relation_embeddings(r), w> for ALL r."""
+        return hypercomplex_interaction(self.head_embeddings(e1_idx), self.entity_embeddings(e2_idx),
+                                        len(self.components))
+
+    def _parameters_version(self):
+        # In-place updates increment _version, moving or replacing tensors changes data_ptr.
+        return tuple((t.data_ptr(), t._version) for t in itertools.chain(self.parameters(), self.buffers()))
+
+    def freeze_for_inference(self):
+        """
+        Put the model into eval mode and precompute entity, head entity and relation tables, i.e., fold BN into the
+        embeddings and normalize relations once instead of per batch.
+        The tables are used in eval mode until parameters or buffers change, e.g., by an optimizer step,
+        load_state_dict or BN statistics of training mode, or are moved to another device.
+        """
+        self.eval()
+        self._frozen = None
+        with torch.no_grad():
+            frozen = {'entities': self.entity_embeddings(), 'heads': self.head_embeddings(),
+                      'relations': self.relation_embeddings()}
+        frozen['version'] = self._parameters_version()
+        self._frozen = frozen
+        return self
+
+    def frozen_tables(self):
+        """ Tables of freeze_for_inference, None in training mode or if not frozen or outdated."""
+        if self._frozen is not None and self._frozen['version'] != self._parameters_version():
+            self._frozen = None
+        return None if self.training else self._frozen
+
+    def forward_head_logits(self, *, e1_idx, rel_idx):
+        """ Scores of ALL entities as tails of a batch of (h,r) before sigmoid, shape (size of batch, |Entities|)."""
+        return torch.mm(self.forward_head_query(e1_idx=e1_idx, rel_idx=rel_idx),
+                        self.entity_embeddings().transpose(1, 0))
+
+    def forward_candidate_logits(self, *, e1_idx, rel_idx, candidates):
+        """
+        Scores of candidate tails only, i.e., only the embeddings of candidates are gathered.
+        candidates: (K,) LongTensor shared by the batch or (size of batch, K) LongTensor per (h,r).
+        Return (size of batch, K) scores before sigmoid.
+        Note that BN on entities (Batch models) uses statistics of candidates in training mode.
+        """
+        query = self.forward_head_query(e1_idx=e1_idx, rel_idx=rel_idx)
+        entities = self.entity_embeddings(candidates.reshape(-1))
+        if candidates.dim() == 1:
+            return torch.mm(query, entities.transpose(1, 0))
+        return torch.bmm(entities.view(candidates.shape + (-1,)), query.unsqueeze(2)).squeeze(2)
+
+    def forward_triple_logits(self, *, e1_idx, rel_idx, e2_idx):
+        """ Scores of (h,r,t) triples, i.e., only the embeddings of t are gathered. Shape (size of batch,)."""
+        query = self.forward_head_query(e1_idx=e1_idx, rel_idx=rel_idx)
+        return torch.bmm(self.entity_embeddings(e2_idx).unsqueeze(1), query.unsqueeze(2)).view(-1)
+
+    def forward_relation_logits(self, *, e1_idx, e2_idx, block_size=None):
+        """
+        Scores of ALL relations of a batch of (h,?,t), shape (size of batch, |Relations|).
+        Bilinear models in eval mode compute the head-tail interaction once and score all relations with one matrix
+        multiplication. Otherwise, (h,r,t) triples of block_size relations (ALL relations if None) are scored at once.
+        """
+        if self.bilinear and not self.training:
+            return torch.mm(self.head_tail_interaction(e1_idx, e2_idx), self.relation_embeddings().transpose(1, 0))
+        num_relations = self.emb_rel.num_embeddings
+        block_size = block_size or num_relations
+        blocks = []
+        for start in range(0, num_relations, block_size):
+            rel_idx = torch.arange(start, min(start + block_size, num_relations), device=e1_idx.device)
+            size = (len(e1_idx), len(rel_idx))
+            blocks.append(self.forward_triple_logits(e1_idx=e1_idx.view(-1, 1).expand(size).reshape(-1),
+                                                     rel_idx=rel_idx.repeat(len(e1_idx)),
+                                                     e2_idx=e2_idx.view(-1, 1).expand(size).reshape(-1)).view(size))
+        return torch.cat(blocks, 1)
+
+    def forward_head_logits_blocks(self, *, e1_idx, rel_idx, block_size):
+        """
+        forward_head_logits streamed over blocks of entities, i.e., yield (start, (size of batch, block_size) scores
+        of entities start, start + 1, ...) pairs. See util.ranking.BlockRanking.
+        """
+        query = self.forward_head_query(e1_idx=e1_idx, rel_idx=rel_idx)
+        num_entities = self.emb_ent.num_embeddings
+        for start in range(0, num_entities, block_size):
+            idx = torch.arange(start, min(start + block_size, num_entities), device=query.device)
+            yield start, torch.mm(query, self.entity_embeddings(idx).transpose(1, 0))
+
+    def forward_head_batch(self, *, e1_idx, rel_idx):
+        return torch.sigmoid(self.forward_head_logits(e1_idx=e1_idx, rel_idx=rel_idx))
+
+    def forward_head_batch_blocks(self, *, e1_idx, rel_idx, block_size):
+        for start, logits in self.forward_head_logits_blocks(e1_idx=e1_idx, rel_idx=rel_idx, block_size=block_size):
+            yield start, torch.sigmoid(logits)
+
+    def forward_triples(self, *, e1_idx, rel_idx, e2_idx):
+        return torch.sigmoid(self.forward_triple_logits(e1_idx=e1_idx, rel_idx=rel_idx, e2_idx=e2_idx))
+
+    def forward_candidates(self, *, e1_idx, rel_idx, candidates):
+        return torch.sigmoid(self.forward_candidate_logits(e1_idx=e1_idx, rel_idx=rel_idx, candidates=candidates))
+
+    def forward_relation_batch(self, *, e1_idx, e2_idx, block_size=None):
+        return torch.sigmoid(self.forward_relation_logits(e1_idx=e1_idx, e2_idx=e2_idx, block_size=block_size))
+
+    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
+        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
+
+    def forward_head_and_sparse_loss(self, e1_idx, rel_idx, rows, cols, label_smoothing=0.0):
+        """ forward_head_and_loss given the positions (rows, cols) of 1's in targets, see sparse_bce_with_logits."""
+        return sparse_bce_with_logits(self.forward_head_logits(e1_idx=e1_idx, rel_idx=rel_idx), rows, cols,
+                                      label_smoothing)
+
+    def init(self):
+        # Xavier initialization of each component as (N, d) table.
+        for weight in (self.emb_ent.weight.data, self.emb_rel.weight.data):
+            for component in torch.chunk(weight, len(self.components), dim=1):
+                xavier_normal_(component)
+
+    def get_embeddings(self):
+        return self.emb_ent.weight.data, self.emb_rel.weight.data
@@ -3,22 +3,46 @@ from torch import nn
 
 class Ensemble(nn.Module):
     """ ensemble through model averaging.
+    weights: optional weights of models, by default scores of models are averaged.
     """
 
-    def __init__(self, modelA, modelB, modelC=None):
+    def __init__(self, *models, weights=None):
         super().__init__()
-        self.name = modelA.name + '_' + modelB.name
-        self.modelA = modelA
-        self.modelB = modelB
-        self.modelC = modelC
-        if self.modelC:
-            self.name = modelA.name + '_' + modelB.name + '_' + modelC.name
+        assert len(models) > 0
+        assert weights is None or len(weights) == len(models)
+        self.models = nn.ModuleList(models)
+        self.weights = weights
+        self.name = '_'.join(model.name for model in models)
+
+    @staticmethod
+    def average(predictions, weights=None):
+        """ (Weighted) average of a list of score matrices of members."""
+        if weights is None:
+            return sum(predictions[1:], predictions[0]) / len(predictions)
+        return sum(w * p for w, p in zip(weights, predictions)) / sum(weights)
+
+    def freeze_for_inference(self):
+        for model in self.models:
+            model.freeze_for_inference()
+        return self
 
     def forward_head_batch(self, *, e1_idx, rel_idx):
-        predictionsA = self.modelA.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx)
-        predictionsB = self.modelB.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx)
-        if self.modelC:
-            predictionsC = self.modelC.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx)
-            return (predictionsA + predictionsB + predictionsC) / 3
-        else:
-            return (predictionsA + predictionsB) / 2
+        return self.average([model.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx) for model in self.models],
+                            self.weights)
+
+    def forward_head_batch_blocks(self, *, e1_idx, rel_idx, block_size):
+        for blocks in zip(*[model.forward_head_batch_blocks(e1_idx=e1_idx, rel_idx=rel_idx, block_size=block_size)
+                            for model in self.models]):
+            yield blocks[0][0], self.average([scores for _, scores in blocks], self.weights)
+
+    def forward_triples(self, *, e1_idx, rel_idx, e2_idx):
+        return self.average([model.forward_triples(e1_idx=e1_idx, rel_idx=rel_idx, e2_idx=e2_idx)
+                             for model in self.models], self.weights)
+
+    def forward_candidates(self, *, e1_idx, rel_idx, candidates):
+        return self.average([model.forward_candidates(e1_idx=e1_idx, rel_idx=rel_idx, candidates=candidates)
+                             for model in self.models], self.weights)
+
+    def forward_relation_batch(self, *, e1_idx, e2_idx, block_size=None):
+        return self.average([model.forward_relation_batch(e1_idx=e1_idx, e2_idx=e2_idx, block_size=block_size)
+                             for model in self.models], self.weights)
@@ -0,0 +1,117 @@
+import numpy as np
+import torch
+from torch.autograd.function import once_differentiable
+
+
+def _conjugate(x):
+    y = -x
+    y[0] = x[0]
+    return y
+
+
+def _cayley_dickson_mul(x, y):
+    """ Product of hypercomplex numbers given by 2^n coefficients via (a,b)(c,d) = (ac - d*b, da + bc*)."""
+    if len(x) == 1:
+        return x * y
+    m = len(x) // 2
+    a, b, c, d = x[:m], x[m:], y[:m], y[m:]
+    return np.concatenate([_cayley_dickson_mul(a, c) - _cayley_dickson_mul(_conjugate(d), b),
+                           _cayley_dickson_mul(d, a) + _cayley_dickson_mul(b, _conjugate(c))])
+
+
+def structure_tensor(dim):
+    """
+    (dim, dim, dim) tensor T of the Cayley-Dickson algebra of dimension dim, i.e., e_i e_j = sum_k T[i, j, k] e_k.
+    dim: 2 (complex numbers), 4 (quaternions), 8 (octonions), 16 (sedenions), ...
+    Products of basis elements are e_i e_j = +-e_(i xor j); the signs of dim=4 and dim=8 are those of
+    quaternion_mul and octonion_mul.
+    """
+    assert dim > 0 and dim & (dim - 1) == 0, 'dim must be a power of 2'
+    basis = np.eye(dim)
+    return torch.tensor(np.array([[_cayley_dickson_mul(basis[i], basis[j]) for j in range(dim)] for i in range(dim)]))
+
+
+# structure_tensor(dim) as (dim, dim * dim) matrices per (dim, index of the result, device, dtype).
+_structure_matrices = {}
+
+
+def _structure_matrix(dim, out, device, dtype):
+    """ T[i, j, k] with out in {0: i, 1: j, 2: k} as rows and the remaining two indices, in order, as columns."""
+    key = (dim, out, device, dtype)
+    if key not in _structure_matrices:
+        order = [out] + [i for i in range(3) if i != out]
+        _structure_matrices[key] = structure_tensor(dim).permute(order).reshape(dim, dim * dim).to(device=device,
+                                                                                                   dtype=dtype)
+    return _structure_matrices[key]
+
+
+def _contract(dim, out, a, b):
+    """ Sum of T * a * b over all indices of T but out, a and b of shape (size of batch, dim, d)."""
+    size = a.shape[0]
+    return torch.matmul(_structure_matrix(dim, out, a.device, a.dtype),
+                        (a.unsqueeze(2) * b.unsqueeze(1)).view(size, dim * dim, -1))
+
+
+class HypercomplexMul(torch.autograd.Function):
+    """
+    See hypercomplex_mul. Only x and y are kept for backward; the products x_i * y_j (and the normalized y)
+    are recomputed, hence activation memory of a product is that of its inputs.
+    Gradients w.r.t. x and y are contractions of the structure tensor with the gradient and y resp. x.
+    """
+
+    @staticmethod
+    def forward(ctx, x, y, dim, unit_norm):
+        ctx.save_for_backward(x, y)
+        ctx.dim, ctx.unit_norm = dim, unit_norm
+        size = x.shape[0]
+        x, y = x.reshape(size, dim, -1), y.reshape(size, dim, -1)
+        if unit_norm:
+            y = y / torch.sqrt((y ** 2).sum(1, keepdim=True))
+        return _contract(dim, 2, x, y).view(size, -1)
+
+    @staticmethod
+    @once_differentiable
+    def backward(ctx, grad_output):
+        x, y = ctx.saved_tensors
+        dim, size = ctx.dim, x.shape[0]
+        x, y, grad_output = x.reshape(size, dim, -1), y.reshape(size, dim, -1), grad_output.reshape(size, dim, -1)
+        if ctx.unit_norm:
+            norm = torch.sqrt((y ** 2).sum(1, keepdim=True))
+            y = y / norm
+        grad_x = grad_y = None
+        if ctx.needs_input_grad[0]:
+            grad_x = _contract(dim, 0, y, grad_output).view(size, -1)
+        if ctx.needs_input_grad[1]:
+            grad_y = _contract(dim, 1, x, grad_output)
+            if ctx.unit_norm:
+                # Jacobian of y / |y|.
+                grad_y = (grad_y - y * (grad_y * y).sum(1, keepdim=True)) / norm
+            grad_y = grad_y.view(size, -1)
+        return grad_x, grad_y, None, None
+
+
+def hypercomplex_mul(x, y, dim, unit_norm=False):
+    """
+    Product x y of batches of hypercomplex numbers of dimension dim.
+    x, y: (size of batch, dim * d) tensors, i.e., dim components of size d as in the embeddings of BaseKGE.
+    unit_norm: normalize y to unit norm to eliminate the scaling effect (relations).
+    All products x_i * y_j are computed at once and summed into the components of x y by one matrix multiplication
+    with the structure tensor.
+    """
+    return HypercomplexMul.apply(x, y, dim, unit_norm)
+
+
+def hypercomplex_interaction(x, z, dim):
+    """
+    w with <x y, z> = <y, w> for all y, i.e., w_j = sum_ik T[i, j, k] x_i z_k. Shape of x, z and w as in
+    hypercomplex_mul, i.e., inner products of x y with z for many y cost one product of x and z.
+    """
+    size = x.shape[0]
+    return _contract(dim, 1, x.reshape(size, dim, -1), z.reshape(size, dim, -1)).view(size, -1)
+
+
+def unit_normalize(x, dim):
+    """ Hypercomplex numbers x of shape (size of batch, dim * d) divided by their norms."""
+    size = x.shape[0]
+    x = x.reshape(size, dim, -1)
+    return (x / torch.sqrt((x ** 2).sum(1, keepdim=True))).view(size, -1)
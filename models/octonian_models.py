@@ -1,8 +1,8 @@
 import torch
 from torch.nn import functional as F
 import numpy as np
-from torch.nn.init import xavier_normal_
 import torch.nn as nn
+from models.base_model import BaseKGE
 
 torch.backends.cudnn.deterministic = True
 seed = 1
@@ -52,7 +52,9 @@ def octonion_mul_norm(*, O_1, O_2):
     return x, e1, e2, e3, e4, e5, e6, e7
 
 
-class OMult(torch.nn.Module):
+class OMult(BaseKGE):
+    components = ('e0', 'e1', 'e2', 'e3', 'e4', 'e5', 'e6', 'e7')
+    bilinear = True
 
     def __init__(self, param):
         super(OMult, self).__init__()
@@ -63,192 +65,53 @@ class OMult(torch.nn.Module):
         self.num_relations = self.param['num_relations']
         self.loss = torch.nn.BCELoss()
         self.flag_octonion_mul_norm = self.param['norm_flag']
-        # Octonion embeddings of entities
-        self.emb_ent_e0 = nn.Embedding(self.num_entities, self.embedding_dim)  # real
-        self.emb_ent_e1 = nn.Embedding(self.num_entities, self.embedding_dim)  # e1
-        self.emb_ent_e2 = nn.Embedding(self.num_entities, self.embedding_dim)  # e2
-        self.emb_ent_e3 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e4 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e5 = nn.Embedding(self.num_entities, self.embedding_dim)  # e4
-        self.emb_ent_e6 = nn.Embedding(self.num_entities, self.embedding_dim)  # e6
-        self.emb_ent_e7 = nn.Embedding(self.num_entities, self.embedding_dim)  # e7
+        # Octonion embeddings of entities, [real | e1 | ... | e7]
+        self.emb_ent = nn.Embedding(self.num_entities, 8 * self.embedding_dim)
         # Octonion embeddings of relations
-        self.emb_rel_e0 = nn.Embedding(self.num_relations, self.embedding_dim)  # real
-        self.emb_rel_e1 = nn.Embedding(self.num_relations, self.embedding_dim)  # e1
-        self.emb_rel_e2 = nn.Embedding(self.num_relations, self.embedding_dim)  # e2
-        self.emb_rel_e3 = nn.Embedding(self.num_relations, self.embedding_dim)  # e3
-        self.emb_rel_e4 = nn.Embedding(self.num_relations, self.embedding_dim)  # e4
-        self.emb_rel_e5 = nn.Embedding(self.num_relations, self.embedding_dim)  # e5
-        self.emb_rel_e6 = nn.Embedding(self.num_relations, self.embedding_dim)  # e6
-        self.emb_rel_e7 = nn.Embedding(self.num_relations, self.embedding_dim)  # e7
+        self.emb_rel = nn.Embedding(self.num_relations, 8 * self.embedding_dim)
         # Dropouts for octonion embeddings of ALL entities.
-        self.input_dp_ent_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e7 = torch.nn.Dropout(self.param['input_dropout'])
+        self.input_dp_ent = torch.nn.Dropout(self.param['input_dropout'])
         # Dropouts for octonion embeddings of relations.
-        self.input_dp_rel_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e7 = torch.nn.Dropout(self.param['input_dropout'])
+        self.input_dp_rel = torch.nn.Dropout(self.param['input_dropout'])
         # Dropouts for octonion embeddings obtained from octonion multiplication.
-        self.hidden_dp_e0 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e1 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e2 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e3 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e4 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e5 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e6 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e7 = torch.nn.Dropout(self.param['hidden_dropout'])
+        self.hidden_dp = torch.nn.Dropout(self.param['hidden_dropout'])
         # Batch normalization for octonion embeddings of ALL entities.
-        self.bn_ent_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
+        self.bn_ent = torch.nn.BatchNorm1d(8 * self.embedding_dim)
         # Batch normalization for octonion embeddings of relations.
-        self.bn_rel_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
-
-    def forward_head_batch(self, *, e1_idx, rel_idx):
+        self.bn_rel = torch.nn.BatchNorm1d(8 * self.embedding_dim)
+
+    @property
+    def unit_norm(self):
+        return self.flag_octonion_mul_norm
+
+    def transform_heads(self, x):
+        # BN + Dropout on head entities.
+        return x if self.flag_octonion_mul_norm else self.input_dp_ent(self.bn_ent(x))
+
+    def transform_relations(self, x):
+        # BN + Dropout on relations.
+        return x if self.flag_octonion_mul_norm else self.input_dp_rel(self.bn_rel(x))
+
+    def forward_head_query(self, *, e1_idx, rel_idx):
         """
         Given a head entity and a relation (h,r), we compute scores for all possible triples,i.e.,
             [score(h,r,x)|x \in Entities] => [0.0,0.1,...,0.8], shape=> (1, |Entities|)
             Given a batch of head entities and relations => shape (size of batch,| Entities|)
         """
-        # (1)
-        # (1.1) Octonion embeddings of head entities
-        emb_head_e0 = self.emb_ent_e0(e1_idx)
-        emb_head_e1 = self.emb_ent_e1(e1_idx)
-        emb_head_e2 = self.emb_ent_e2(e1_idx)
-        emb_head_e3 = self.emb_ent_e3(e1_idx)
-        emb_head_e4 = self.emb_ent_e4(e1_idx)
-        emb_head_e5 = self.emb_ent_e5(e1_idx)
-        emb_head_e6 = self.emb_ent_e6(e1_idx)
-        emb_head_e7 = self.emb_ent_e7(e1_idx)
-        # (1.2) Octonion embeddings of relations
-        emb_rel_e0 = self.emb_rel_e0(rel_idx)
-        emb_rel_e1 = self.emb_rel_e1(rel_idx)
-        emb_rel_e2 = self.emb_rel_e2(rel_idx)
-        emb_rel_e3 = self.emb_rel_e3(rel_idx)
-        emb_rel_e4 = self.emb_rel_e4(rel_idx)
-        emb_rel_e5 = self.emb_rel_e5(rel_idx)
-        emb_rel_e6 = self.emb_rel_e6(rel_idx)
-        emb_rel_e7 = self.emb_rel_e7(rel_idx)
-
+        # (1) Octonion multiplication of head entities and relations, where either relations are unit normalized
+        # or BN + Dropout is applied, see BaseKGE.head_relation_product.
+        O_1 = self.head_relation_product(e1_idx, rel_idx)
         if self.flag_octonion_mul_norm:
-            # (2) Octonion  multiplication of (1.1) and unit normalized (1.2).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul_norm(
-                O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                     emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                O_2=(emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3,
-                     emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7))
-            # (3) Inner product of (2) with ALL entities.
-            e0_score = torch.mm(e0, self.emb_ent_e0.weight.transpose(1, 0))
-            e1_score = torch.mm(e1, self.emb_ent_e1.weight.transpose(1, 0))
-            e2_score = torch.mm(e2, self.emb_ent_e2.weight.transpose(1, 0))
-            e3_score = torch.mm(e3, self.emb_ent_e3.weight.transpose(1, 0))
-            e4_score = torch.mm(e4, self.emb_ent_e4.weight.transpose(1, 0))
-            e5_score = torch.mm(e5, self.emb_ent_e5.weight.transpose(1, 0))
-            e6_score = torch.mm(e6, self.emb_ent_e6.weight.transpose(1, 0))
-            e7_score = torch.mm(e7, self.emb_ent_e7.weight.transpose(1, 0))
-        else:
-            # (2)
-            # (2.1) Apply BN + Dropout on (1.2) relations.
-            # (2.2.) Apply octonion  multiplication of (1.1) and (2.1).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul(
-                O_1=(self.input_dp_ent_e0(self.bn_ent_e0(emb_head_e0)),
-                     self.input_dp_ent_e1(self.bn_ent_e1(emb_head_e1)),
-                     self.input_dp_ent_e2(self.bn_ent_e2(emb_head_e2)),
-                     self.input_dp_ent_e3(self.bn_ent_e3(emb_head_e3)),
-                     self.input_dp_ent_e4(self.bn_ent_e4(emb_head_e4)),
-                     self.input_dp_ent_e5(self.bn_ent_e5(emb_head_e5)),
-                     self.input_dp_ent_e6(self.bn_ent_e6(emb_head_e6)),
-                     self.input_dp_ent_e7(self.bn_ent_e7(emb_head_e7))),
-                O_2=(self.input_dp_rel_e0(self.bn_rel_e0(emb_rel_e0)),
-                     self.input_dp_rel_e1(self.bn_rel_e1(emb_rel_e1)),
-                     self.input_dp_rel_e2(self.bn_rel_e2(emb_rel_e2)),
-                     self.input_dp_rel_e3(self.bn_rel_e3(emb_rel_e3)),
-                     self.input_dp_rel_e4(self.bn_rel_e4(emb_rel_e4)),
-                     self.input_dp_rel_e5(self.bn_rel_e5(emb_rel_e5)),
-                     self.input_dp_rel_e6(self.bn_rel_e6(emb_rel_e6)),
-                     self.input_dp_rel_e7(self.bn_rel_e7(emb_rel_e7))))
-            # (3)
-            # (3.1) Dropout on (2)-result of octonion multiplication.
-            # (3.2) Apply BN + DP on ALL entities. (REMOVED for the sake of reducing the runtime)
-            # (3.3) Inner product
-            e0_score = torch.mm(self.hidden_dp_e0(e0), self.emb_ent_e0.weight.transpose(1, 0))
-            e1_score = torch.mm(self.hidden_dp_e1(e1),
-                                self.emb_ent_e1.weight.transpose(1, 0))
-            e2_score = torch.mm(self.hidden_dp_e2(e2),
-                                self.emb_ent_e2.weight.transpose(1, 0))
-            e3_score = torch.mm(self.hidden_dp_e3(e3),
-                                self.emb_ent_e3.weight.transpose(1, 0))
-            e4_score = torch.mm(self.hidden_dp_e4(e4),
-                                self.emb_ent_e4.weight.transpose(1, 0))
-            e5_score = torch.mm(self.hidden_dp_e5(e5),
-                                self.emb_ent_e5.weight.transpose(1, 0))
-            e6_score = torch.mm(self.hidden_dp_e6(e6),
-                                self.emb_ent_e6.weight.transpose(1, 0))
-            e7_score = torch.mm(self.hidden_dp_e7(e7),
-                                self.emb_ent_e7.weight.transpose(1, 0))
-        score = e0_score + e1_score + e2_score + e3_score + e4_score + e5_score + e6_score + e7_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_e0.weight.data)
-        xavier_normal_(self.emb_ent_e1.weight.data)
-        xavier_normal_(self.emb_ent_e2.weight.data)
-        xavier_normal_(self.emb_ent_e3.weight.data)
-        xavier_normal_(self.emb_ent_e4.weight.data)
-        xavier_normal_(self.emb_ent_e5.weight.data)
-        xavier_normal_(self.emb_ent_e6.weight.data)
-        xavier_normal_(self.emb_ent_e7.weight.data)
-
-        xavier_normal_(self.emb_rel_e0.weight.data)
-        xavier_normal_(self.emb_rel_e1.weight.data)
-        xavier_normal_(self.emb_rel_e2.weight.data)
-        xavier_normal_(self.emb_rel_e3.weight.data)
-        xavier_normal_(self.emb_rel_e4.weight.data)
-        xavier_normal_(self.emb_rel_e5.weight.data)
-        xavier_normal_(self.emb_rel_e6.weight.data)
-        xavier_normal_(self.emb_rel_e7.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((
-            self.emb_ent_e0.weight.data, self.emb_ent_e1.weight.data,
-            self.emb_ent_e2.weight.data, self.emb_ent_e3.weight.data,
-            self.emb_ent_e4.weight.data, self.emb_ent_e5.weight.data,
-            self.emb_ent_e6.weight.data, self.emb_ent_e7.weight.data), 1)
-        rel_emb = torch.cat((
-            self.emb_rel_e0.weight.data, self.emb_rel_e1.weight.data,
-            self.emb_rel_e2.weight.data, self.emb_rel_e3.weight.data,
-            self.emb_rel_e4.weight.data, self.emb_rel_e5.weight.data,
-            self.emb_rel_e6.weight.data, self.emb_rel_e7.weight.data), 1)
-        return entity_emb, rel_emb
-
-
-class ConvO(torch.nn.Module):
+            # (2) (1) is the query of inner products with ALL entities.
+            return O_1
+        # (2)
+        # (2.1) Dropout on (1)-result of octonion multiplication.
+        # (2.2) Query of inner products, see BaseKGE.forward_head_logits.
+        return self.hidden_dp(O_1)
+
+
+class ConvO(BaseKGE):
+    components = ('e0', 'e1', 'e2', 'e3', 'e4', 'e5', 'e6', 'e7')
 
     def __init__(self, param):
         super(ConvO, self).__init__()
@@ -259,69 +122,20 @@ class ConvO(torch.nn.Module):
         self.num_relations = self.param['num_relations']
         self.loss = torch.nn.BCELoss()
         self.flag_octonion_mul_norm = self.param['norm_flag']
-        # Octonion embeddings of entities
-        self.emb_ent_e0 = nn.Embedding(self.num_entities, self.embedding_dim)  # real
-        self.emb_ent_e1 = nn.Embedding(self.num_entities, self.embedding_dim)  # e1
-        self.emb_ent_e2 = nn.Embedding(self.num_entities, self.embedding_dim)  # e2
-        self.emb_ent_e3 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e4 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e5 = nn.Embedding(self.num_entities, self.embedding_dim)  # e4
-        self.emb_ent_e6 = nn.Embedding(self.num_entities, self.embedding_dim)  # e6
-        self.emb_ent_e7 = nn.Embedding(self.num_entities, self.embedding_dim)  # e7
+        # Octonion embeddings of entities, [real | e1 | ... | e7]
+        self.emb_ent = nn.Embedding(self.num_entities, 8 * self.embedding_dim)
         # Octonion embeddings of relations
-        self.emb_rel_e0 = nn.Embedding(self.num_relations, self.embedding_dim)  # real
-        self.emb_rel_e1 = nn.Embedding(self.num_relations, self.embedding_dim)  # e1
-        self.emb_rel_e2 = nn.Embedding(self.num_relations, self.embedding_dim)  # e2
-        self.emb_rel_e3 = nn.Embedding(self.num_relations, self.embedding_dim)  # e3
-        self.emb_rel_e4 = nn.Embedding(self.num_relations, self.embedding_dim)  # e4
-        self.emb_rel_e5 = nn.Embedding(self.num_relations, self.embedding_dim)  # e5
-        self.emb_rel_e6 = nn.Embedding(self.num_relations, self.embedding_dim)  # e6
-        self.emb_rel_e7 = nn.Embedding(self.num_relations, self.embedding_dim)  # e7
+        self.emb_rel = nn.Embedding(self.num_relations, 8 * self.embedding_dim)
         # Dropouts for octonion embeddings of ALL entities.
-        self.input_dp_ent_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e7 = torch.nn.Dropout(self.param['input_dropout'])
+        self.input_dp_ent = torch.nn.Dropout(self.param['input_dropout'])
         # Dropouts for octonion embeddings of relations.
-        self.input_dp_rel_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e7 = torch.nn.Dropout(self.param['input_dropout'])
+        self.input_dp_rel = torch.nn.Dropout(self.param['input_dropout'])
         # Dropouts for octonion embeddings obtained from octonion multiplication.
-        self.hidden_dp_e0 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e1 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e2 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e3 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e4 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e5 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e6 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e7 = torch.nn.Dropout(self.param['hidden_dropout'])
+        self.hidden_dp = torch.nn.Dropout(self.param['hidden_dropout'])
         # Batch normalization for octonion embeddings of ALL entities.
-        self.bn_ent_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
+        self.bn_ent = torch.nn.BatchNorm1d(8 * self.embedding_dim)
         # Batch normalization for octonion embeddings of relations.
-        self.bn_rel_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
+        self.bn_rel = torch.nn.BatchNorm1d(8 * self.embedding_dim)
 
         # Convolution
         self.kernel_size = self.param['kernel_size']
@@ -338,24 +152,8 @@ class ConvO(torch.nn.Module):
         self.bn_conv2 = torch.nn.BatchNorm1d(self.embedding_dim * 8)
 
     def residual_convolution(self, O_1, O_2):
-        emb_ent_e0, emb_ent_e1, emb_ent_e2, emb_ent_e3, emb_ent_e4, emb_ent_e5, emb_ent_e6, emb_ent_e7 = O_1
-        emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3, emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7 = O_2
-        x = torch.cat([emb_ent_e0.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e1.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e2.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e3.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e4.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e5.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e6.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e7.view(-1, 1, 1, self.embedding_dim),  # entities
-                       emb_rel_e0.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e1.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e2.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e3.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e4.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e5.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e6.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e7.view(-1, 1, 1, self.embedding_dim), ], 2)
+        # Components of O_1 (entities) and O_2 (relations) are the rows of a (16, d) image.
+        x = torch.cat([O_1.view(-1, 1, 8, self.embedding_dim), O_2.view(-1, 1, 8, self.embedding_dim)], 2)
         x = self.conv1(x)
         x = self.bn_conv1(x)
         x = F.relu(x)
@@ -364,558 +162,55 @@ class ConvO(torch.nn.Module):
         x = self.fc1(x)
         x = self.bn_conv2(x)
         x = F.relu(x)
-        return torch.chunk(x, 8, dim=1)
-
-    def forward_head_batch(self, *, e1_idx, rel_idx):
-        # (1)
-        # (1.1) Octonion embeddings of head entities
-        emb_head_e0 = self.emb_ent_e0(e1_idx)
-        emb_head_e1 = self.emb_ent_e1(e1_idx)
-        emb_head_e2 = self.emb_ent_e2(e1_idx)
-        emb_head_e3 = self.emb_ent_e3(e1_idx)
-        emb_head_e4 = self.emb_ent_e4(e1_idx)
-        emb_head_e5 = self.emb_ent_e5(e1_idx)
-        emb_head_e6 = self.emb_ent_e6(e1_idx)
-        emb_head_e7 = self.emb_ent_e7(e1_idx)
-        # (1.2) Octonion embeddings of relations
-        emb_rel_e0 = self.emb_rel_e0(rel_idx)
-        emb_rel_e1 = self.emb_rel_e1(rel_idx)
-        emb_rel_e2 = self.emb_rel_e2(rel_idx)
-        emb_rel_e3 = self.emb_rel_e3(rel_idx)
-        emb_rel_e4 = self.emb_rel_e4(rel_idx)
-        emb_rel_e5 = self.emb_rel_e5(rel_idx)
-        emb_rel_e6 = self.emb_rel_e6(rel_idx)
-        emb_rel_e7 = self.emb_rel_e7(rel_idx)
-        # (2) Apply convolution operation on (1.1) and (1.2).
-        O_3 = self.residual_convolution(O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                                             emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                                        O_2=(emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3,
-                                             emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7))
-        conv_e0, conv_e1, conv_e2, conv_e3, conv_e4, conv_e5, conv_e6, conv_e7 = O_3
-
+        return x
+
+    @property
+    def unit_norm(self):
+        return self.flag_octonion_mul_norm
+
+    def transform_heads(self, x):
+        # BN + Dropout on head entities.
+        return x if self.flag_octonion_mul_norm else self.input_dp_ent(self.bn_ent(x))
+
+    def transform_relations(self, x):
+        # BN + Dropout on relations.
+        return x if self.flag_octonion_mul_norm else self.input_dp_rel(self.bn_rel(x))
+
+    def forward_head_query(self, *, e1_idx, rel_idx):
+        # (1) Apply convolution operation on octonion embeddings of head entities and relations.
+        O_1 = self.residual_convolution(O_1=self.emb_ent(e1_idx), O_2=self.emb_rel(rel_idx))
+        # (2) Octonion multiplication of head entities and relations, where either relations are unit normalized
+        # or BN + Dropout is applied, see BaseKGE.head_relation_product.
+        O_2 = self.head_relation_product(e1_idx, rel_idx)
         if self.flag_octonion_mul_norm:
-            # (3) Octonion multiplication of (1.1) and unit normalized (1.2).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul_norm(
-                O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                     emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                O_2=(emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3,
-                     emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Inner product of (4.1) with ALL entities.
-            e0_score = torch.mm(conv_e0 * e0, self.emb_ent_e0.weight.transpose(1, 0))
-            e1_score = torch.mm(conv_e1 * e1, self.emb_ent_e1.weight.transpose(1, 0))
-            e2_score = torch.mm(conv_e2 * e2, self.emb_ent_e2.weight.transpose(1, 0))
-            e3_score = torch.mm(conv_e3 * e3, self.emb_ent_e3.weight.transpose(1, 0))
-            e4_score = torch.mm(conv_e4 * e4, self.emb_ent_e4.weight.transpose(1, 0))
-            e5_score = torch.mm(conv_e5 * e5, self.emb_ent_e5.weight.transpose(1, 0))
-            e6_score = torch.mm(conv_e6 * e6, self.emb_ent_e6.weight.transpose(1, 0))
-            e7_score = torch.mm(conv_e7 * e7, self.emb_ent_e7.weight.transpose(1, 0))
-        else:
             # (3)
-            # (3.1) Apply BN + Dropout on (1.2)-relations.
-            # (3.2) Apply quaternion multiplication on (1.1) and (3.1).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul(
-                O_1=(self.input_dp_ent_e0(self.bn_ent_e0(emb_head_e0)),
-                     self.input_dp_ent_e1(self.bn_ent_e1(emb_head_e1)),
-                     self.input_dp_ent_e2(self.bn_ent_e2(emb_head_e2)),
-                     self.input_dp_ent_e3(self.bn_ent_e3(emb_head_e3)),
-                     self.input_dp_ent_e4(self.bn_ent_e4(emb_head_e4)),
-                     self.input_dp_ent_e5(self.bn_ent_e5(emb_head_e5)),
-                     self.input_dp_ent_e6(self.bn_ent_e6(emb_head_e6)),
-                     self.input_dp_ent_e7(self.bn_ent_e7(emb_head_e7))),
-                O_2=(self.input_dp_rel_e0(self.bn_rel_e0(emb_rel_e0)),
-                     self.input_dp_rel_e1(self.bn_rel_e1(emb_rel_e1)),
-                     self.input_dp_rel_e2(self.bn_rel_e2(emb_rel_e2)),
-                     self.input_dp_rel_e3(self.bn_rel_e3(emb_rel_e3)),
-                     self.input_dp_rel_e4(self.bn_rel_e4(emb_rel_e4)),
-                     self.input_dp_rel_e5(self.bn_rel_e5(emb_rel_e5)),
-                     self.input_dp_rel_e6(self.bn_rel_e6(emb_rel_e6)),
-                     self.input_dp_rel_e7(self.bn_rel_e7(emb_rel_e7))))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Dropout on (4.1).
-            # (4.3) Apply BN + DP on ALL entities. (REMOVED for the sake of reducing the runtime)
-            # (4.4) Inner product
-            e0_score = torch.mm(self.hidden_dp_e0(conv_e0 * e0),
-                                self.emb_ent_e0.weight.transpose(1, 0))
-            e1_score = torch.mm(self.hidden_dp_e1(conv_e1 * e1),
-                                self.emb_ent_e1.weight.transpose(1, 0))
-            e2_score = torch.mm(self.hidden_dp_e2(conv_e2 * e2),
-                                self.emb_ent_e2.weight.transpose(1, 0))
-            e3_score = torch.mm(self.hidden_dp_e3(conv_e3 * e3),
-                                self.emb_ent_e3.weight.transpose(1, 0))
-            e4_score = torch.mm(self.hidden_dp_e4(conv_e4 * e4),
-                                self.emb_ent_e4.weight.transpose(1, 0))
-            e5_score = torch.mm(self.hidden_dp_e5(conv_e5 * e5),
-                                self.emb_ent_e5.weight.transpose(1, 0))
-            e6_score = torch.mm(self.hidden_dp_e6(conv_e6 * e6),
-                                self.emb_ent_e6.weight.transpose(1, 0))
-            e7_score = torch.mm(self.hidden_dp_e7(conv_e7 * e7),
-                                self.emb_ent_e7.weight.transpose(1, 0))
-        score = e0_score + e1_score + e2_score + e3_score + e4_score + e5_score + e6_score + e7_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_e0.weight.data)
-        xavier_normal_(self.emb_ent_e1.weight.data)
-        xavier_normal_(self.emb_ent_e2.weight.data)
-        xavier_normal_(self.emb_ent_e3.weight.data)
-        xavier_normal_(self.emb_ent_e4.weight.data)
-        xavier_normal_(self.emb_ent_e5.weight.data)
-        xavier_normal_(self.emb_ent_e6.weight.data)
-        xavier_normal_(self.emb_ent_e7.weight.data)
-
-        xavier_normal_(self.emb_rel_e0.weight.data)
-        xavier_normal_(self.emb_rel_e1.weight.data)
-        xavier_normal_(self.emb_rel_e2.weight.data)
-        xavier_normal_(self.emb_rel_e3.weight.data)
-        xavier_normal_(self.emb_rel_e4.weight.data)
-        xavier_normal_(self.emb_rel_e5.weight.data)
-        xavier_normal_(self.emb_rel_e6.weight.data)
-        xavier_normal_(self.emb_rel_e7.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((
-            self.emb_ent_e0.weight.data, self.emb_ent_e1.weight.data,
-            self.emb_ent_e2.weight.data, self.emb_ent_e3.weight.data,
-            self.emb_ent_e4.weight.data, self.emb_ent_e5.weight.data,
-            self.emb_ent_e6.weight.data, self.emb_ent_e7.weight.data), 1)
-        rel_emb = torch.cat((
-            self.emb_rel_e0.weight.data, self.emb_rel_e1.weight.data,
-            self.emb_rel_e2.weight.data, self.emb_rel_e3.weight.data,
-            self.emb_rel_e4.weight.data, self.emb_rel_e5.weight.data,
-            self.emb_rel_e6.weight.data, self.emb_rel_e7.weight.data), 1)
-        return entity_emb, rel_emb
-
-
-class OMultBatch(torch.nn.Module):
+            # (3.1) Hadamard product of (1) with (2).
+            # (3.2) (3.1) is the query of inner products with ALL entities.
+            return O_1 * O_2
+        # (3)
+        # (3.1) Hadamard product of (1) with (2).
+        # (3.2) Dropout on (3.1).
+        # (3.3) Query of inner products, see BaseKGE.forward_head_logits.
+        return self.hidden_dp(O_1 * O_2)
 
-    def __init__(self, param):
-        super(OMultBatch, self).__init__()
-        self.name = 'OMult'
-        self.param = param
-        self.embedding_dim = self.param['embedding_dim']
-        self.num_entities = self.param['num_entities']
-        self.num_relations = self.param['num_relations']
-        self.loss = torch.nn.BCELoss()
-        self.flag_octonion_mul_norm = self.param['norm_flag']
-        # Octonion embeddings of entities
-        self.emb_ent_e0 = nn.Embedding(self.num_entities, self.embedding_dim)  # real
-        self.emb_ent_e1 = nn.Embedding(self.num_entities, self.embedding_dim)  # e1
-        self.emb_ent_e2 = nn.Embedding(self.num_entities, self.embedding_dim)  # e2
-        self.emb_ent_e3 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e4 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e5 = nn.Embedding(self.num_entities, self.embedding_dim)  # e4
-        self.emb_ent_e6 = nn.Embedding(self.num_entities, self.embedding_dim)  # e6
-        self.emb_ent_e7 = nn.Embedding(self.num_entities, self.embedding_dim)  # e7
-        # Octonion embeddings of relations
-        self.emb_rel_e0 = nn.Embedding(self.num_relations, self.embedding_dim)  # real
-        self.emb_rel_e1 = nn.Embedding(self.num_relations, self.embedding_dim)  # e1
-        self.emb_rel_e2 = nn.Embedding(self.num_relations, self.embedding_dim)  # e2
-        self.emb_rel_e3 = nn.Embedding(self.num_relations, self.embedding_dim)  # e3
-        self.emb_rel_e4 = nn.Embedding(self.num_relations, self.embedding_dim)  # e4
-        self.emb_rel_e5 = nn.Embedding(self.num_relations, self.embedding_dim)  # e5
-        self.emb_rel_e6 = nn.Embedding(self.num_relations, self.embedding_dim)  # e6
-        self.emb_rel_e7 = nn.Embedding(self.num_relations, self.embedding_dim)  # e7
-        # Dropouts for octonion embeddings of ALL entities.
-        self.input_dp_ent_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e7 = torch.nn.Dropout(self.param['input_dropout'])
-        # Dropouts for octonion embeddings of relations.
-        self.input_dp_rel_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e7 = torch.nn.Dropout(self.param['input_dropout'])
-        # Dropouts for octonion embeddings obtained from octonion multiplication.
-        self.hidden_dp_e0 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e1 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e2 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e3 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e4 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e5 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e6 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e7 = torch.nn.Dropout(self.param['hidden_dropout'])
-        # Batch normalization for octonion embeddings of ALL entities.
-        self.bn_ent_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
-        # Batch normalization for octonion embeddings of relations.
-        self.bn_rel_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
-
-    def forward_head_batch(self, *, e1_idx, rel_idx):
-        """
-        Given a head entity and a relation (h,r), we compute scores for all possible triples,i.e.,
-            [score(h,r,x)|x \in Entities] => [0.0,0.1,...,0.8], shape=> (1, |Entities|)
-            Given a batch of head entities and relations => shape (size of batch,| Entities|)
-        """
-        # (1)
-        # (1.1) Octonion embeddings of head entities
-        emb_head_e0 = self.emb_ent_e0(e1_idx)
-        emb_head_e1 = self.emb_ent_e1(e1_idx)
-        emb_head_e2 = self.emb_ent_e2(e1_idx)
-        emb_head_e3 = self.emb_ent_e3(e1_idx)
-        emb_head_e4 = self.emb_ent_e4(e1_idx)
-        emb_head_e5 = self.emb_ent_e5(e1_idx)
-        emb_head_e6 = self.emb_ent_e6(e1_idx)
-        emb_head_e7 = self.emb_ent_e7(e1_idx)
-        # (1.2) Octonion embeddings of relations
-        emb_rel_e0 = self.emb_rel_e0(rel_idx)
-        emb_rel_e1 = self.emb_rel_e1(rel_idx)
-        emb_rel_e2 = self.emb_rel_e2(rel_idx)
-        emb_rel_e3 = self.emb_rel_e3(rel_idx)
-        emb_rel_e4 = self.emb_rel_e4(rel_idx)
-        emb_rel_e5 = self.emb_rel_e5(rel_idx)
-        emb_rel_e6 = self.emb_rel_e6(rel_idx)
-        emb_rel_e7 = self.emb_rel_e7(rel_idx)
-
-        if self.flag_octonion_mul_norm:
-            # (2) Octonion  multiplication of (1.1) and unit normalized (1.2).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul_norm(
-                O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                     emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                O_2=(emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3,
-                     emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7))
-            # (3) Inner product of (2) with ALL entities.
-            e0_score = torch.mm(e0, self.emb_ent_e0.weight.transpose(1, 0))
-            e1_score = torch.mm(e1, self.emb_ent_e1.weight.transpose(1, 0))
-            e2_score = torch.mm(e2, self.emb_ent_e2.weight.transpose(1, 0))
-            e3_score = torch.mm(e3, self.emb_ent_e3.weight.transpose(1, 0))
-            e4_score = torch.mm(e4, self.emb_ent_e4.weight.transpose(1, 0))
-            e5_score = torch.mm(e5, self.emb_ent_e5.weight.transpose(1, 0))
-            e6_score = torch.mm(e6, self.emb_ent_e6.weight.transpose(1, 0))
-            e7_score = torch.mm(e7, self.emb_ent_e7.weight.transpose(1, 0))
-        else:
-            # (2)
-            # (2.1) Apply BN + Dropout on (1.2) relations.
-            # (2.2.) Apply octonion  multiplication of (1.1) and (2.1).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul(
-                O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                     emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                O_2=(self.input_dp_rel_e0(self.bn_rel_e0(emb_rel_e0)),
-                     self.input_dp_rel_e1(self.bn_rel_e1(emb_rel_e1)),
-                     self.input_dp_rel_e2(self.bn_rel_e2(emb_rel_e2)),
-                     self.input_dp_rel_e3(self.bn_rel_e3(emb_rel_e3)),
-                     self.input_dp_rel_e4(self.bn_rel_e4(emb_rel_e4)),
-                     self.input_dp_rel_e5(self.bn_rel_e5(emb_rel_e5)),
-                     self.input_dp_rel_e6(self.bn_rel_e6(emb_rel_e6)),
-                     self.input_dp_rel_e7(self.bn_rel_e7(emb_rel_e7))))
-            # (3)
-            # (3.1) Dropout on (2)-result of octonion multiplication.
-            # (3.2) Apply BN + DP on ALL entities.
-            # (3.3) Inner product
-            e0_score = torch.mm(self.hidden_dp_e0(e0),
-                                self.input_dp_ent_e0(self.bn_ent_e0(self.emb_ent_e0.weight)).transpose(1, 0))
-            e1_score = torch.mm(self.hidden_dp_e1(e1),
-                                self.input_dp_ent_e1(self.bn_ent_e1(self.emb_ent_e1.weight)).transpose(1, 0))
-            e2_score = torch.mm(self.hidden_dp_e2(e2),
-                                self.input_dp_ent_e2(self.bn_ent_e2(self.emb_ent_e2.weight)).transpose(1, 0))
-            e3_score = torch.mm(self.hidden_dp_e3(e3),
-                                self.input_dp_ent_e3(self.bn_ent_e3(self.emb_ent_e3.weight)).transpose(1, 0))
-            e4_score = torch.mm(self.hidden_dp_e4(e4),
-                                self.input_dp_ent_e4(self.bn_ent_e4(self.emb_ent_e4.weight)).transpose(1, 0))
-            e5_score = torch.mm(self.hidden_dp_e5(e5),
-                                self.input_dp_ent_e5(self.bn_ent_e5(self.emb_ent_e5.weight)).transpose(1, 0))
-            e6_score = torch.mm(self.hidden_dp_e6(e6),
-                                self.input_dp_ent_e6(self.bn_ent_e6(self.emb_ent_e6.weight)).transpose(1, 0))
-            e7_score = torch.mm(self.hidden_dp_e7(e7),
-                                self.input_dp_ent_e7(self.bn_ent_e7(self.emb_ent_e7.weight)).transpose(1, 0))
-        score = e0_score + e1_score + e2_score + e3_score + e4_score + e5_score + e6_score + e7_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_e0.weight.data)
-        xavier_normal_(self.emb_ent_e1.weight.data)
-        xavier_normal_(self.emb_ent_e2.weight.data)
-        xavier_normal_(self.emb_ent_e3.weight.data)
-        xavier_normal_(self.emb_ent_e4.weight.data)
-        xavier_normal_(self.emb_ent_e5.weight.data)
-        xavier_normal_(self.emb_ent_e6.weight.data)
-        xavier_normal_(self.emb_ent_e7.weight.data)
-
-        xavier_normal_(self.emb_rel_e0.weight.data)
-        xavier_normal_(self.emb_rel_e1.weight.data)
-        xavier_normal_(self.emb_rel_e2.weight.data)
-        xavier_normal_(self.emb_rel_e3.weight.data)
-        xavier_normal_(self.emb_rel_e4.weight.data)
-        xavier_normal_(self.emb_rel_e5.weight.data)
-        xavier_normal_(self.emb_rel_e6.weight.data)
-        xavier_normal_(self.emb_rel_e7.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((
-            self.emb_ent_e0.weight.data, self.emb_ent_e1.weight.data,
-            self.emb_ent_e2.weight.data, self.emb_ent_e3.weight.data,
-            self.emb_ent_e4.weight.data, self.emb_ent_e5.weight.data,
-            self.emb_ent_e6.weight.data, self.emb_ent_e7.weight.data), 1)
-        rel_emb = torch.cat((
-            self.emb_rel_e0.weight.data, self.emb_rel_e1.weight.data,
-            self.emb_rel_e2.weight.data, self.emb_rel_e3.weight.data,
-            self.emb_rel_e4.weight.data, self.emb_rel_e5.weight.data,
-            self.emb_rel_e6.weight.data, self.emb_rel_e7.weight.data), 1)
-        return entity_emb, rel_emb
-
-
-class ConvOBatch(torch.nn.Module):
 
-    def __init__(self, param):
-        super(ConvOBatch, self).__init__()
-        self.name = 'ConvO'
-        self.param = param
-        self.embedding_dim = self.param['embedding_dim']
-        self.num_entities = self.param['num_entities']
-        self.num_relations = self.param['num_relations']
-        self.loss = torch.nn.BCELoss()
-        self.flag_octonion_mul_norm = self.param['norm_flag']
-        # Octonion embeddings of entities
-        self.emb_ent_e0 = nn.Embedding(self.num_entities, self.embedding_dim)  # real
-        self.emb_ent_e1 = nn.Embedding(self.num_entities, self.embedding_dim)  # e1
-        self.emb_ent_e2 = nn.Embedding(self.num_entities, self.embedding_dim)  # e2
-        self.emb_ent_e3 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e4 = nn.Embedding(self.num_entities, self.embedding_dim)  # e3
-        self.emb_ent_e5 = nn.Embedding(self.num_entities, self.embedding_dim)  # e4
-        self.emb_ent_e6 = nn.Embedding(self.num_entities, self.embedding_dim)  # e6
-        self.emb_ent_e7 = nn.Embedding(self.num_entities, self.embedding_dim)  # e7
-        # Octonion embeddings of relations
-        self.emb_rel_e0 = nn.Embedding(self.num_relations, self.embedding_dim)  # real
-        self.emb_rel_e1 = nn.Embedding(self.num_relations, self.embedding_dim)  # e1
-        self.emb_rel_e2 = nn.Embedding(self.num_relations, self.embedding_dim)  # e2
-        self.emb_rel_e3 = nn.Embedding(self.num_relations, self.embedding_dim)  # e3
-        self.emb_rel_e4 = nn.Embedding(self.num_relations, self.embedding_dim)  # e4
-        self.emb_rel_e5 = nn.Embedding(self.num_relations, self.embedding_dim)  # e5
-        self.emb_rel_e6 = nn.Embedding(self.num_relations, self.embedding_dim)  # e6
-        self.emb_rel_e7 = nn.Embedding(self.num_relations, self.embedding_dim)  # e7
-        # Dropouts for octonion embeddings of ALL entities.
-        self.input_dp_ent_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_e7 = torch.nn.Dropout(self.param['input_dropout'])
-        # Dropouts for octonion embeddings of relations.
-        self.input_dp_rel_e0 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e1 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e2 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e3 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e4 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e5 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e6 = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_e7 = torch.nn.Dropout(self.param['input_dropout'])
-        # Dropouts for octonion embeddings obtained from octonion multiplication.
-        self.hidden_dp_e0 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e1 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e2 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e3 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e4 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e5 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e6 = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_e7 = torch.nn.Dropout(self.param['hidden_dropout'])
-        # Batch normalization for octonion embeddings of ALL entities.
-        self.bn_ent_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
-        # Batch normalization for octonion embeddings of relations.
-        self.bn_rel_e0 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e1 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e2 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e3 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e4 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e5 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e6 = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_e7 = torch.nn.BatchNorm1d(self.embedding_dim)
+class OMultBatch(OMult):
+    """ OMult with BN + Dropout on tail entities instead of head entities."""
 
-        # Convolution
-        self.kernel_size = self.param['kernel_size']
-        self.num_of_output_channels = self.param['num_of_output_channels']
+    def transform_heads(self, x):
+        return x
 
-        self.feature_map_dropout = torch.nn.Dropout2d(self.param['feature_map_dropout'])
+    def transform_entities(self, x):
+        # Apply BN + DP on entities.
+        return x if self.flag_octonion_mul_norm else self.input_dp_ent(self.bn_ent(x))
 
-        self.conv1 = torch.nn.Conv1d(in_channels=1, out_channels=self.num_of_output_channels,
-                                     kernel_size=(self.kernel_size, self.kernel_size), stride=1, padding=1, bias=True)
 
-        self.fc_num_input = self.embedding_dim * 16 * self.num_of_output_channels  # 8 because of 8 real values in 2 quaternions
-        self.fc1 = torch.nn.Linear(self.fc_num_input, self.embedding_dim * 8)  # Hard compression.
-        self.bn_conv1 = torch.nn.BatchNorm2d(self.num_of_output_channels)
-        self.bn_conv2 = torch.nn.BatchNorm1d(self.embedding_dim * 8)
+class ConvOBatch(ConvO):
+    """ ConvO with BN + Dropout on tail entities instead of head entities."""
 
-    def residual_convolution(self, O_1, O_2):
-        emb_ent_e0, emb_ent_e1, emb_ent_e2, emb_ent_e3, emb_ent_e4, emb_ent_e5, emb_ent_e6, emb_ent_e7 = O_1
-        emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3, emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7 = O_2
-        x = torch.cat([emb_ent_e0.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e1.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e2.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e3.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e4.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e5.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e6.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_e7.view(-1, 1, 1, self.embedding_dim),  # entities
-                       emb_rel_e0.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e1.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e2.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e3.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e4.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e5.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e6.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_e7.view(-1, 1, 1, self.embedding_dim), ], 2)
-        x = self.conv1(x)
-        x = self.bn_conv1(x)
-        x = F.relu(x)
-        x = self.feature_map_dropout(x)
-        x = x.view(x.shape[0], -1)  # reshape for NN.
-        x = self.fc1(x)
-        x = self.bn_conv2(x)
-        x = F.relu(x)
-        return torch.chunk(x, 8, dim=1)
-
-    def forward_head_batch(self, *, e1_idx, rel_idx):
-        # (1)
-        # (1.1) Octonion embeddings of head entities
-        emb_head_e0 = self.emb_ent_e0(e1_idx)
-        emb_head_e1 = self.emb_ent_e1(e1_idx)
-        emb_head_e2 = self.emb_ent_e2(e1_idx)
-        emb_head_e3 = self.emb_ent_e3(e1_idx)
-        emb_head_e4 = self.emb_ent_e4(e1_idx)
-        emb_head_e5 = self.emb_ent_e5(e1_idx)
-        emb_head_e6 = self.emb_ent_e6(e1_idx)
-        emb_head_e7 = self.emb_ent_e7(e1_idx)
-        # (1.2) Octonion embeddings of relations
-        emb_rel_e0 = self.emb_rel_e0(rel_idx)
-        emb_rel_e1 = self.emb_rel_e1(rel_idx)
-        emb_rel_e2 = self.emb_rel_e2(rel_idx)
-        emb_rel_e3 = self.emb_rel_e3(rel_idx)
-        emb_rel_e4 = self.emb_rel_e4(rel_idx)
-        emb_rel_e5 = self.emb_rel_e5(rel_idx)
-        emb_rel_e6 = self.emb_rel_e6(rel_idx)
-        emb_rel_e7 = self.emb_rel_e7(rel_idx)
-        # (2) Apply convolution operation on (1.1) and (1.2).
-        O_3 = self.residual_convolution(O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                                             emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                                        O_2=(emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3,
-                                             emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7))
-        conv_e0, conv_e1, conv_e2, conv_e3, conv_e4, conv_e5, conv_e6, conv_e7 = O_3
+    def transform_heads(self, x):
+        return x
 
-        if self.flag_octonion_mul_norm:
-            # (3) Octonion multiplication of (1.1) and unit normalized (1.2).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul_norm(
-                O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                     emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                O_2=(emb_rel_e0, emb_rel_e1, emb_rel_e2, emb_rel_e3,
-                     emb_rel_e4, emb_rel_e5, emb_rel_e6, emb_rel_e7))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Inner product of (4.1) with ALL entities.
-            e0_score = torch.mm(conv_e0 * e0, self.emb_ent_e0.weight.transpose(1, 0))
-            e1_score = torch.mm(conv_e1 * e1, self.emb_ent_e1.weight.transpose(1, 0))
-            e2_score = torch.mm(conv_e2 * e2, self.emb_ent_e2.weight.transpose(1, 0))
-            e3_score = torch.mm(conv_e3 * e3, self.emb_ent_e3.weight.transpose(1, 0))
-            e4_score = torch.mm(conv_e4 * e4, self.emb_ent_e4.weight.transpose(1, 0))
-            e5_score = torch.mm(conv_e5 * e5, self.emb_ent_e5.weight.transpose(1, 0))
-            e6_score = torch.mm(conv_e6 * e6, self.emb_ent_e6.weight.transpose(1, 0))
-            e7_score = torch.mm(conv_e7 * e7, self.emb_ent_e7.weight.transpose(1, 0))
-        else:
-            # (3)
-            # (3.1) Apply BN + Dropout on (1.2)-relations.
-            # (3.2) Apply quaternion multiplication on (1.1) and (3.1).
-            e0, e1, e2, e3, e4, e5, e6, e7 = octonion_mul(
-                O_1=(emb_head_e0, emb_head_e1, emb_head_e2, emb_head_e3,
-                     emb_head_e4, emb_head_e5, emb_head_e6, emb_head_e7),
-                O_2=(self.input_dp_rel_e0(self.bn_rel_e0(emb_rel_e0)),
-                     self.input_dp_rel_e1(self.bn_rel_e1(emb_rel_e1)),
-                     self.input_dp_rel_e2(self.bn_rel_e2(emb_rel_e2)),
-                     self.input_dp_rel_e3(self.bn_rel_e3(emb_rel_e3)),
-                     self.input_dp_rel_e4(self.bn_rel_e4(emb_rel_e4)),
-                     self.input_dp_rel_e5(self.bn_rel_e5(emb_rel_e5)),
-                     self.input_dp_rel_e6(self.bn_rel_e6(emb_rel_e6)),
-                     self.input_dp_rel_e7(self.bn_rel_e7(emb_rel_e7))))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Dropout on (4.1).
-            # (4.3) Apply BN + DP on ALL entities.
-            # (4.4) Inner product
-            e0_score = torch.mm(self.hidden_dp_e0(conv_e0 * e0),
-                                self.input_dp_ent_e0(self.bn_ent_e0(self.emb_ent_e0.weight)).transpose(1, 0))
-            e1_score = torch.mm(self.hidden_dp_e1(conv_e1 * e1),
-                                self.input_dp_ent_e1(self.bn_ent_e1(self.emb_ent_e1.weight)).transpose(1, 0))
-            e2_score = torch.mm(self.hidden_dp_e2(conv_e2 * e2),
-                                self.input_dp_ent_e2(self.bn_ent_e2(self.emb_ent_e2.weight)).transpose(1, 0))
-            e3_score = torch.mm(self.hidden_dp_e3(conv_e3 * e3),
-                                self.input_dp_ent_e3(self.bn_ent_e3(self.emb_ent_e3.weight)).transpose(1, 0))
-            e4_score = torch.mm(self.hidden_dp_e4(conv_e4 * e4),
-                                self.input_dp_ent_e4(self.bn_ent_e4(self.emb_ent_e4.weight)).transpose(1, 0))
-            e5_score = torch.mm(self.hidden_dp_e5(conv_e5 * e5),
-                                self.input_dp_ent_e5(self.bn_ent_e5(self.emb_ent_e5.weight)).transpose(1, 0))
-            e6_score = torch.mm(self.hidden_dp_e6(conv_e6 * e6),
-                                self.input_dp_ent_e6(self.bn_ent_e6(self.emb_ent_e6.weight)).transpose(1, 0))
-            e7_score = torch.mm(self.hidden_dp_e7(conv_e7 * e7),
-                                self.input_dp_ent_e7(self.bn_ent_e7(self.emb_ent_e7.weight)).transpose(1, 0))
-        score = e0_score + e1_score + e2_score + e3_score + e4_score + e5_score + e6_score + e7_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_e0.weight.data)
-        xavier_normal_(self.emb_ent_e1.weight.data)
-        xavier_normal_(self.emb_ent_e2.weight.data)
-        xavier_normal_(self.emb_ent_e3.weight.data)
-        xavier_normal_(self.emb_ent_e4.weight.data)
-        xavier_normal_(self.emb_ent_e5.weight.data)
-        xavier_normal_(self.emb_ent_e6.weight.data)
-        xavier_normal_(self.emb_ent_e7.weight.data)
-
-        xavier_normal_(self.emb_rel_e0.weight.data)
-        xavier_normal_(self.emb_rel_e1.weight.data)
-        xavier_normal_(self.emb_rel_e2.weight.data)
-        xavier_normal_(self.emb_rel_e3.weight.data)
-        xavier_normal_(self.emb_rel_e4.weight.data)
-        xavier_normal_(self.emb_rel_e5.weight.data)
-        xavier_normal_(self.emb_rel_e6.weight.data)
-        xavier_normal_(self.emb_rel_e7.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((
-            self.emb_ent_e0.weight.data, self.emb_ent_e1.weight.data,
-            self.emb_ent_e2.weight.data, self.emb_ent_e3.weight.data,
-            self.emb_ent_e4.weight.data, self.emb_ent_e5.weight.data,
-            self.emb_ent_e6.weight.data, self.emb_ent_e7.weight.data), 1)
-        rel_emb = torch.cat((
-            self.emb_rel_e0.weight.data, self.emb_rel_e1.weight.data,
-            self.emb_rel_e2.weight.data, self.emb_rel_e3.weight.data,
-            self.emb_rel_e4.weight.data, self.emb_rel_e5.weight.data,
-            self.emb_rel_e6.weight.data, self.emb_rel_e7.weight.data), 1)
-        return entity_emb, rel_emb
+    def transform_entities(self, x):
+        # Apply BN + DP on entities.
+        return x if self.flag_octonion_mul_norm else self.input_dp_ent(self.bn_ent(x))
@@ -1,8 +1,8 @@
 import torch
 from torch.nn import functional as F
 import numpy as np
-from torch.nn.init import xavier_normal_
 import torch.nn as nn
+from models.base_model import BaseKGE
 from numpy.random import RandomState
 
 torch.backends.cudnn.deterministic = True
@@ -39,10 +39,12 @@ def quaternion_mul(*, Q_1, Q_2):
     return r_val, i_val, j_val, k_val
 
 
-class QMult(torch.nn.Module):
+class QMult(BaseKGE):
     """
     Completed
     """
+    components = ('real', 'i', 'j', 'k')
+    bilinear = True
 
     def __init__(self, param):
         super(QMult, self).__init__()
@@ -53,123 +55,55 @@ class QMult(torch.nn.Module):
         self.num_relations = self.param['num_relations']
         self.loss = torch.nn.BCELoss()
         self.flag_hamilton_mul_norm = self.param['norm_flag']
-        # Quaternion embeddings of entities
-        self.emb_ent_real = nn.Embedding(self.num_entities, self.embedding_dim)  # real
-        self.emb_ent_i = nn.Embedding(self.num_entities, self.embedding_dim)  # imaginary i
-        self.emb_ent_j = nn.Embedding(self.num_entities, self.embedding_dim)  # imaginary j
-        self.emb_ent_k = nn.Embedding(self.num_entities, self.embedding_dim)  # imaginary k
+        # Quaternion embeddings of entities, [real | imaginary i | imaginary j | imaginary k]
+        self.emb_ent = nn.Embedding(self.num_entities, 4 * self.embedding_dim)
         # Quaternion embeddings of relations.
-        self.emb_rel_real = nn.Embedding(self.num_relations, self.embedding_dim)  # real
-        self.emb_rel_i = nn.Embedding(self.num_relations, self.embedding_dim)  # imaginary i
-        self.emb_rel_j = nn.Embedding(self.num_relations, self.embedding_dim)  # imaginary j
-        self.emb_rel_k = nn.Embedding(self.num_relations, self.embedding_dim)  # imaginary k
+        self.emb_rel = nn.Embedding(self.num_relations, 4 * self.embedding_dim)
         # Dropouts for quaternion embeddings of ALL entities.
-        self.input_dp_ent_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_k = torch.nn.Dropout(self.param['input_dropout'])
+        self.input_dp_ent = torch.nn.Dropout(self.param['input_dropout'])
         # Dropouts for quaternion embeddings of relations.
-        self.input_dp_rel_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_k = torch.nn.Dropout(self.param['input_dropout'])
+        self.input_dp_rel = torch.nn.Dropout(self.param['input_dropout'])
         # Dropouts for quaternion embeddings obtained from quaternion multiplication.
-        self.hidden_dp_real = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_i = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_j = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_k = torch.nn.Dropout(self.param['hidden_dropout'])
+        self.hidden_dp = torch.nn.Dropout(self.param['hidden_dropout'])
         # Batch normalization for quaternion embeddings of ALL entities.
-        self.bn_ent_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_k = torch.nn.BatchNorm1d(self.embedding_dim)
+        self.bn_ent = torch.nn.BatchNorm1d(4 * self.embedding_dim)
         # Batch normalization for quaternion embeddings of relations.
-        self.bn_rel_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_k = torch.nn.BatchNorm1d(self.embedding_dim)
+        self.bn_rel = torch.nn.BatchNorm1d(4 * self.embedding_dim)
 
-    def forward_head_batch(self, *, e1_idx, rel_idx):
+    @property
+    def unit_norm(self):
+        return self.flag_hamilton_mul_norm
+
+    def transform_heads(self, x):
+        # BN + Dropout on head entities.
+        return x if self.flag_hamilton_mul_norm else self.input_dp_ent(self.bn_ent(x))
+
+    def transform_relations(self, x):
+        # BN + Dropout on relations.
+        return x if self.flag_hamilton_mul_norm else self.input_dp_rel(self.bn_rel(x))
+
+    def forward_head_query(self, *, e1_idx, rel_idx):
         """
         Completed.
         Given a head entity and a relation (h,r), we compute scores for all possible triples,i.e.,
         [score(h,r,x)|x \in Entities] => [0.0,0.1,...,0.8], shape=> (1, |Entities|)
         Given a batch of head entities and relations => shape (size of batch,| Entities|)
         """
-        # (1)
-        # (1.1) Quaternion embeddings of head entities
-        emb_head_real = self.emb_ent_real(e1_idx)
-        emb_head_i = self.emb_ent_i(e1_idx)
-        emb_head_j = self.emb_ent_j(e1_idx)
-        emb_head_k = self.emb_ent_k(e1_idx)
-        # (1.2) Quaternion embeddings of relations
-        emb_rel_real = self.emb_rel_real(rel_idx)
-        emb_rel_i = self.emb_rel_i(rel_idx)
-        emb_rel_j = self.emb_rel_j(rel_idx)
-        emb_rel_k = self.emb_rel_k(rel_idx)
-
+        # (1) Quaternion multiplication of head entities and relations, where either relations are unit normalized
+        # or BN + Dropout is applied, see BaseKGE.head_relation_product.
+        Q_1 = self.head_relation_product(e1_idx, rel_idx)
         if self.flag_hamilton_mul_norm:
-            # (2) Quaternion multiplication of (1.1) and unit normalized (1.2).
-            r_val, i_val, j_val, k_val = quaternion_mul_with_unit_norm(
-                Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                Q_2=(emb_rel_real, emb_rel_i, emb_rel_j, emb_rel_k))
-            # (3) Inner product of (2) with all entities.
-            real_score = torch.mm(r_val, self.emb_ent_real.weight.transpose(1, 0))
-            i_score = torch.mm(i_val, self.emb_ent_i.weight.transpose(1, 0))
-            j_score = torch.mm(j_val, self.emb_ent_j.weight.transpose(1, 0))
-            k_score = torch.mm(k_val, self.emb_ent_k.weight.transpose(1, 0))
-        else:
-            # (2)
-            # (2.1) Apply BN + Dropout on (1.2)-relations.
-            # (2.2) Apply quaternion multiplication on (1.1) and (2.1).
-            r_val, i_val, j_val, k_val = quaternion_mul(
-                Q_1=(self.input_dp_ent_real(self.bn_ent_real(emb_head_real)),
-                     self.input_dp_ent_i(self.bn_ent_i(emb_head_i)),
-                     self.input_dp_ent_j(self.bn_ent_j(emb_head_j)),
-                     self.input_dp_ent_k(self.bn_ent_k(emb_head_k))),
-                Q_2=(self.input_dp_rel_real(self.bn_rel_real(emb_rel_real)),
-                     self.input_dp_rel_i(self.bn_rel_i(emb_rel_i)),
-                     self.input_dp_rel_j(self.bn_rel_j(emb_rel_j)),
-                     self.input_dp_rel_k(self.bn_rel_k(emb_rel_k))))
-            # (3)
-            # (3.1) Dropout on (2)-result of quaternion multiplication.
-            # (3.2) Apply BN + DP on ALL entities. (REMOVED for the sake of reducing the runtime)
-            # (3.3) Inner product
-            real_score = torch.mm(self.hidden_dp_real(r_val),
-                                  self.emb_ent_real.weight.transpose(1, 0))
-            i_score = torch.mm(self.hidden_dp_i(i_val),
-                               self.emb_ent_i.weight.transpose(1, 0))
-            j_score = torch.mm(self.hidden_dp_j(j_val),
-                               self.emb_ent_j.weight.transpose(1, 0))
-            k_score = torch.mm(self.hidden_dp_k(k_val),
-                               self.emb_ent_k.weight.transpose(1, 0))
-        score = real_score + i_score + j_score + k_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_real.weight.data)
-        xavier_normal_(self.emb_ent_i.weight.data)
-        xavier_normal_(self.emb_ent_j.weight.data)
-        xavier_normal_(self.emb_ent_k.weight.data)
-        xavier_normal_(self.emb_rel_real.weight.data)
-        xavier_normal_(self.emb_rel_i.weight.data)
-        xavier_normal_(self.emb_rel_j.weight.data)
-        xavier_normal_(self.emb_rel_k.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((self.emb_ent_real.weight.data, self.emb_ent_i.weight.data,
-                                self.emb_ent_j.weight.data, self.emb_ent_k.weight.data), 1)
-        rel_emb = torch.cat((self.emb_rel_real.weight.data, self.emb_rel_i.weight.data,
-                             self.emb_rel_j.weight.data, self.emb_rel_k.weight.data), 1)
-
-        return entity_emb, rel_emb
-
-
-class ConvQ(torch.nn.Module):
+            # (2) (1) is the query of inner products with ALL entities.
+            return Q_1
+        # (2)
+        # (2.1) Dropout on (1)-result of quaternion multiplication.
+        # (2.2) Query of inner products, see BaseKGE.forward_head_logits.
+        return self.hidden_dp(Q_1)
+
+
+class ConvQ(BaseKGE):
     """ Convolutional Quaternion Knowledge Graph Embeddings"""
+    components = ('real', 'i', 'j', 'k')
 
     def __init__(self, params=None):
         super(ConvQ, self).__init__()
@@ -182,38 +116,16 @@ class ConvQ(torch.nn.Module):
         self.kernel_size = params['kernel_size']
         self.num_of_output_channels = params['num_of_output_channels']
         self.flag_hamilton_mul_norm = self.param['norm_flag']
-        # Embeddings.
-        self.emb_ent_real = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # real
-        self.emb_ent_i = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # imaginary i
-        self.emb_ent_j = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # imaginary j
-        self.emb_ent_k = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # imaginary k
-        self.emb_rel_real = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # real
-        self.emb_rel_i = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # imaginary i
-        self.emb_rel_j = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # imaginary j
-        self.emb_rel_k = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # imaginary k
+        # Embeddings, [real | imaginary i | imaginary j | imaginary k]
+        self.emb_ent = nn.Embedding(self.param['num_entities'], 4 * self.embedding_dim)
+        self.emb_rel = nn.Embedding(self.param['num_relations'], 4 * self.embedding_dim)
         # Dropouts
-        self.input_dp_ent_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_k = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_k = torch.nn.Dropout(self.param['input_dropout'])
-        self.hidden_dp_real = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_i = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_j = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_k = torch.nn.Dropout(self.param['hidden_dropout'])
+        self.input_dp_ent = torch.nn.Dropout(self.param['input_dropout'])
+        self.input_dp_rel = torch.nn.Dropout(self.param['input_dropout'])
+        self.hidden_dp = torch.nn.Dropout(self.param['hidden_dropout'])
         # Batch Normalization
-        self.bn_ent_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_k = torch.nn.BatchNorm1d(self.embedding_dim)
-
-        self.bn_rel_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_k = torch.nn.BatchNorm1d(self.embedding_dim)
+        self.bn_ent = torch.nn.BatchNorm1d(4 * self.embedding_dim)
+        self.bn_rel = torch.nn.BatchNorm1d(4 * self.embedding_dim)
 
         # Convolution
         self.conv1 = torch.nn.Conv1d(in_channels=1, out_channels=self.num_of_output_channels,
@@ -227,16 +139,8 @@ class ConvQ(torch.nn.Module):
         self.feature_map_dropout = torch.nn.Dropout2d(self.param['feature_map_dropout'])
 
     def residual_convolution(self, Q_1, Q_2):
-        emb_ent_real, emb_ent_imag_i, emb_ent_imag_j, emb_ent_imag_k = Q_1
-        emb_rel_real, emb_rel_imag_i, emb_rel_imag_j, emb_rel_imag_k = Q_2
-        x = torch.cat([emb_ent_real.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_imag_i.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_imag_j.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_imag_k.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_real.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_imag_i.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_imag_j.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_imag_k.view(-1, 1, 1, self.embedding_dim)], 2)
+        # Components of Q_1 and Q_2 are the rows of a (8, d) image.
+        x = torch.cat([Q_1.view(-1, 1, 4, self.embedding_dim), Q_2.view(-1, 1, 4, self.embedding_dim)], 2)
 
         # Think of x a n image of two quaternions.
         # Batch norms after fully connnect and Conv layers
@@ -247,372 +151,60 @@ class ConvQ(torch.nn.Module):
         x = self.feature_map_dropout(x)
         x = x.view(x.shape[0], -1)  # reshape for NN.
         x = F.relu(self.bn_conv2(self.fc1(x)))
-        return torch.chunk(x, 4, dim=1)
+        return x
 
-    def forward_head_batch(self, *, e1_idx, rel_idx):
-        """
-        Given a head entity and a relation (h,r), we compute scores for all entities.
-        [score(h,r,x)|x \in Entities] => [0.0,0.1,...,0.8], shape=> (1, |Entities|)
-        Given a batch of head entities and relations => shape (size of batch,| Entities|)
-        """
-        # (1)
-        # (1.1) Quaternion embeddings of head entities
-        emb_head_real = self.emb_ent_real(e1_idx)
-        emb_head_i = self.emb_ent_i(e1_idx)
-        emb_head_j = self.emb_ent_j(e1_idx)
-        emb_head_k = self.emb_ent_k(e1_idx)
-        # (1.2) Quaternion embeddings of relations
-        emb_rel_real = self.emb_rel_real(rel_idx)
-        emb_rel_i = self.emb_rel_i(rel_idx)
-        emb_rel_j = self.emb_rel_j(rel_idx)
-        emb_rel_k = self.emb_rel_k(rel_idx)
-
-        # (2) Apply convolution operation on (1.1) and (1.2).
-        Q_3 = self.residual_convolution(Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                                        Q_2=(emb_rel_real, emb_rel_i, emb_rel_j, emb_rel_k))
-        conv_real, conv_imag_i, conv_imag_j, conv_imag_k = Q_3
-        if self.flag_hamilton_mul_norm:
-            # (3) Quaternion multiplication of (1.1) and unit normalized (1.2).
-            r_val, i_val, j_val, k_val = quaternion_mul_with_unit_norm(
-                Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                Q_2=(emb_rel_real, emb_rel_i, emb_rel_j, emb_rel_k))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Inner product of (4.1) with ALL entities.
-            real_score = torch.mm(conv_real * r_val, self.emb_ent_real.weight.transpose(1, 0))
-            i_score = torch.mm(conv_imag_i * i_val, self.emb_ent_i.weight.transpose(1, 0))
-            j_score = torch.mm(conv_imag_j * j_val, self.emb_ent_j.weight.transpose(1, 0))
-            k_score = torch.mm(conv_imag_k * k_val, self.emb_ent_k.weight.transpose(1, 0))
-        else:
-            # (3)
-            # (3.1) Apply BN + Dropout on (1.2).
-            # (3.2) Apply quaternion multiplication on (1.1) and (3.1).
-            r_val, i_val, j_val, k_val = quaternion_mul(
-                Q_1=(self.input_dp_ent_real(self.bn_ent_real(emb_head_real)),
-                     self.input_dp_ent_i(self.bn_ent_i(emb_head_i)),
-                     self.input_dp_ent_j(self.bn_ent_j(emb_head_j)), self.input_dp_ent_k(self.bn_ent_k(emb_head_k))),
-                Q_2=(self.input_dp_rel_real(self.bn_rel_real(emb_rel_real)),
-                     self.input_dp_rel_i(self.bn_rel_i(emb_rel_i)),
-                     self.input_dp_rel_j(self.bn_rel_j(emb_rel_j)),
-                     self.input_dp_rel_k(self.bn_rel_k(emb_rel_k))))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Dropout on (4.1).
-            # (4.3) Apply BN + DP on ALL entities. (REMOVED for the sake of reducing the runtime)
-            # (4.4) Inner product
-            real_score = torch.mm(self.hidden_dp_real(conv_real * r_val),
-                                  self.emb_ent_real.weight.transpose(1, 0))
-            i_score = torch.mm(self.hidden_dp_i(conv_imag_i * i_val),
-                               self.emb_ent_i.weight.transpose(1, 0))
-            j_score = torch.mm(self.hidden_dp_j(conv_imag_j * j_val),
-                               self.emb_ent_j.weight.transpose(1, 0))
-            k_score = torch.mm(self.hidden_dp_k(conv_imag_k * k_val),
-                               self.emb_ent_k.weight.transpose(1, 0))
-        score = real_score + i_score + j_score + k_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_real.weight.data)
-        xavier_normal_(self.emb_ent_i.weight.data)
-        xavier_normal_(self.emb_ent_j.weight.data)
-        xavier_normal_(self.emb_ent_k.weight.data)
-
-        xavier_normal_(self.emb_rel_real.weight.data)
-        xavier_normal_(self.emb_rel_i.weight.data)
-        xavier_normal_(self.emb_rel_j.weight.data)
-        xavier_normal_(self.emb_rel_k.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((self.emb_ent_real.weight.data, self.emb_ent_i.weight.data,
-                                self.emb_ent_j.weight.data, self.emb_ent_k.weight.data), 1)
-        rel_emb = torch.cat((self.emb_rel_real.weight.data, self.emb_rel_i.weight.data,
-                             self.emb_rel_j.weight.data, self.emb_rel_k.weight.data), 1)
-
-        return entity_emb, rel_emb
-
-
-class QMultBatch(torch.nn.Module):
+    @property
+    def unit_norm(self):
+        return self.flag_hamilton_mul_norm
 
-    def __init__(self, param):
-        super(QMultBatch, self).__init__()
-        self.name = 'QMult'
-        self.param = param
-        self.embedding_dim = self.param['embedding_dim']
-        self.num_entities = self.param['num_entities']
-        self.num_relations = self.param['num_relations']
-        self.loss = torch.nn.BCELoss()
-        self.flag_hamilton_mul_norm = self.param['norm_flag']
-        # Quaternion embeddings of entities
-        self.emb_ent_real = nn.Embedding(self.num_entities, self.embedding_dim)  # real
-        self.emb_ent_i = nn.Embedding(self.num_entities, self.embedding_dim)  # imaginary i
-        self.emb_ent_j = nn.Embedding(self.num_entities, self.embedding_dim)  # imaginary j
-        self.emb_ent_k = nn.Embedding(self.num_entities, self.embedding_dim)  # imaginary k
-        # Quaternion embeddings of relations.
-        self.emb_rel_real = nn.Embedding(self.num_relations, self.embedding_dim)  # real
-        self.emb_rel_i = nn.Embedding(self.num_relations, self.embedding_dim)  # imaginary i
-        self.emb_rel_j = nn.Embedding(self.num_relations, self.embedding_dim)  # imaginary j
-        self.emb_rel_k = nn.Embedding(self.num_relations, self.embedding_dim)  # imaginary k
-        # Dropouts for quaternion embeddings of ALL entities.
-        self.input_dp_ent_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_k = torch.nn.Dropout(self.param['input_dropout'])
-        # Dropouts for quaternion embeddings of relations.
-        self.input_dp_rel_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_k = torch.nn.Dropout(self.param['input_dropout'])
-        # Dropouts for quaternion embeddings obtained from quaternion multiplication.
-        self.hidden_dp_real = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_i = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_j = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_k = torch.nn.Dropout(self.param['hidden_dropout'])
-        # Batch normalization for quaternion embeddings of ALL entities.
-        self.bn_ent_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_k = torch.nn.BatchNorm1d(self.embedding_dim)
-        # Batch normalization for quaternion embeddings of relations.
-        self.bn_rel_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_k = torch.nn.BatchNorm1d(self.embedding_dim)
+    def transform_heads(self, x):
+        # BN + Dropout on head entities.
+        return x if self.flag_hamilton_mul_norm else self.input_dp_ent(self.bn_ent(x))
 
-    def forward_head_batch(self, *, e1_idx, rel_idx):
+    def transform_relations(self, x):
+        # BN + Dropout on relations.
+        return x if self.flag_hamilton_mul_norm else self.input_dp_rel(self.bn_rel(x))
+
+    def forward_head_query(self, *, e1_idx, rel_idx):
         """
-        Completed.
-        Given a head entity and a relation (h,r), we compute scores for all possible triples,i.e.,
+        Given a head entity and a relation (h,r), we compute scores for all entities.
         [score(h,r,x)|x \in Entities] => [0.0,0.1,...,0.8], shape=> (1, |Entities|)
         Given a batch of head entities and relations => shape (size of batch,| Entities|)
         """
-        # (1)
-        # (1.1) Quaternion embeddings of head entities
-        emb_head_real = self.emb_ent_real(e1_idx)
-        emb_head_i = self.emb_ent_i(e1_idx)
-        emb_head_j = self.emb_ent_j(e1_idx)
-        emb_head_k = self.emb_ent_k(e1_idx)
-        # (1.2) Quaternion embeddings of relations
-        emb_rel_real = self.emb_rel_real(rel_idx)
-        emb_rel_i = self.emb_rel_i(rel_idx)
-        emb_rel_j = self.emb_rel_j(rel_idx)
-        emb_rel_k = self.emb_rel_k(rel_idx)
-
+        # (1) Apply convolution operation on quaternion embeddings of head entities and relations.
+        Q_1 = self.residual_convolution(Q_1=self.emb_ent(e1_idx), Q_2=self.emb_rel(rel_idx))
+        # (2) Quaternion multiplication of head entities and relations, where either relations are unit normalized
+        # or BN + Dropout is applied, see BaseKGE.head_relation_product.
+        Q_2 = self.head_relation_product(e1_idx, rel_idx)
         if self.flag_hamilton_mul_norm:
-            # (2) Quaternion multiplication of (1.1) and unit normalized (1.2).
-            r_val, i_val, j_val, k_val = quaternion_mul_with_unit_norm(
-                Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                Q_2=(emb_rel_real, emb_rel_i, emb_rel_j, emb_rel_k))
-            # (3) Inner product of (2) with all entities.
-            real_score = torch.mm(r_val, self.emb_ent_real.weight.transpose(1, 0))
-            i_score = torch.mm(i_val, self.emb_ent_i.weight.transpose(1, 0))
-            j_score = torch.mm(j_val, self.emb_ent_j.weight.transpose(1, 0))
-            k_score = torch.mm(k_val, self.emb_ent_k.weight.transpose(1, 0))
-        else:
-            # (2)
-            # (2.1) Apply BN + Dropout on (1.2)-relations.
-            # (2.2) Apply quaternion multiplication on (1.1) and (2.1).
-            r_val, i_val, j_val, k_val = quaternion_mul(
-                Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                Q_2=(self.input_dp_rel_real(self.bn_rel_real(emb_rel_real)),
-                     self.input_dp_rel_i(self.bn_rel_i(emb_rel_i)),
-                     self.input_dp_rel_j(self.bn_rel_j(emb_rel_j)),
-                     self.input_dp_rel_k(self.bn_rel_k(emb_rel_k))))
             # (3)
-            # (3.1) Dropout on (2)-result of quaternion multiplication.
-            # (3.2) Apply BN + DP on ALL entities.
-            # (3.3) Inner product
-            real_score = torch.mm(self.hidden_dp_real(r_val),
-                                  self.input_dp_ent_real(self.bn_ent_real(self.emb_ent_real.weight)).transpose(1, 0))
-            i_score = torch.mm(self.hidden_dp_i(i_val),
-                               self.input_dp_ent_i(self.bn_ent_i(self.emb_ent_i.weight)).transpose(1, 0))
-            j_score = torch.mm(self.hidden_dp_j(j_val),
-                               self.input_dp_ent_j(self.bn_ent_j(self.emb_ent_j.weight)).transpose(1, 0))
-            k_score = torch.mm(self.hidden_dp_k(k_val),
-                               self.input_dp_ent_k(self.bn_ent_k(self.emb_ent_k.weight)).transpose(1, 0))
-        score = real_score + i_score + j_score + k_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_real.weight.data)
-        xavier_normal_(self.emb_ent_i.weight.data)
-        xavier_normal_(self.emb_ent_j.weight.data)
-        xavier_normal_(self.emb_ent_k.weight.data)
-        xavier_normal_(self.emb_rel_real.weight.data)
-        xavier_normal_(self.emb_rel_i.weight.data)
-        xavier_normal_(self.emb_rel_j.weight.data)
-        xavier_normal_(self.emb_rel_k.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((self.emb_ent_real.weight.data, self.emb_ent_i.weight.data,
-                                self.emb_ent_j.weight.data, self.emb_ent_k.weight.data), 1)
-        rel_emb = torch.cat((self.emb_rel_real.weight.data, self.emb_rel_i.weight.data,
-                             self.emb_rel_j.weight.data, self.emb_rel_k.weight.data), 1)
-
-        return entity_emb, rel_emb
-
-
-class ConvQBatch(torch.nn.Module):
-    """ Convolutional Quaternion Knowledge Graph Embeddings"""
+            # (3.1) Hadamard product of (1) with (2).
+            # (3.2) (3.1) is the query of inner products with ALL entities.
+            return Q_1 * Q_2
+        # (3)
+        # (3.1) Hadamard product of (1) with (2).
+        # (3.2) Dropout on (3.1).
+        # (3.3) Query of inner products, see BaseKGE.forward_head_logits.
+        return self.hidden_dp(Q_1 * Q_2)
 
-    def __init__(self, params=None):
-        super(ConvQBatch, self).__init__()
-        self.name = 'ConvQ'
-        self.loss = torch.nn.BCELoss()
-        self.param = params
-        self.embedding_dim = self.param['embedding_dim']
-        self.num_entities = params['num_entities']
-        self.num_relations = params['num_relations']
-        self.kernel_size = params['kernel_size']
-        self.num_of_output_channels = params['num_of_output_channels']
-        self.flag_hamilton_mul_norm = self.param['norm_flag']
-        # Embeddings.
-        self.emb_ent_real = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # real
-        self.emb_ent_i = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # imaginary i
-        self.emb_ent_j = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # imaginary j
-        self.emb_ent_k = nn.Embedding(self.param['num_entities'], self.embedding_dim)  # imaginary k
-        self.emb_rel_real = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # real
-        self.emb_rel_i = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # imaginary i
-        self.emb_rel_j = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # imaginary j
-        self.emb_rel_k = nn.Embedding(self.param['num_relations'], self.embedding_dim)  # imaginary k
-        # Dropouts
-        self.input_dp_ent_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_ent_k = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_real = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_i = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_j = torch.nn.Dropout(self.param['input_dropout'])
-        self.input_dp_rel_k = torch.nn.Dropout(self.param['input_dropout'])
-        self.hidden_dp_real = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_i = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_j = torch.nn.Dropout(self.param['hidden_dropout'])
-        self.hidden_dp_k = torch.nn.Dropout(self.param['hidden_dropout'])
-        # Batch Normalization
-        self.bn_ent_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_ent_k = torch.nn.BatchNorm1d(self.embedding_dim)
 
-        self.bn_rel_real = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_i = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_j = torch.nn.BatchNorm1d(self.embedding_dim)
-        self.bn_rel_k = torch.nn.BatchNorm1d(self.embedding_dim)
+class QMultBatch(QMult):
+    """ QMult with BN + Dropout on tail entities instead of head entities."""
 
-        # Convolution
-        self.conv1 = torch.nn.Conv1d(in_channels=1, out_channels=self.num_of_output_channels,
-                                     kernel_size=(self.kernel_size, self.kernel_size), stride=1, padding=1, bias=True)
+    def transform_heads(self, x):
+        return x
 
-        self.fc_num_input = self.embedding_dim * 8 * self.num_of_output_channels  # 8 because of 8 real values in 2 quaternions
-        self.fc1 = torch.nn.Linear(self.fc_num_input, self.embedding_dim * 4)  # Hard compression.
+    def transform_entities(self, x):
+        # Apply BN + DP on entities.
+        return x if self.flag_hamilton_mul_norm else self.input_dp_ent(self.bn_ent(x))
 
-        self.bn_conv1 = torch.nn.BatchNorm2d(self.num_of_output_channels)
-        self.bn_conv2 = torch.nn.BatchNorm1d(self.embedding_dim * 4)
-        self.feature_map_dropout = torch.nn.Dropout2d(self.param['feature_map_dropout'])
 
-    def residual_convolution(self, Q_1, Q_2):
-        emb_ent_real, emb_ent_imag_i, emb_ent_imag_j, emb_ent_imag_k = Q_1
-        emb_rel_real, emb_rel_imag_i, emb_rel_imag_j, emb_rel_imag_k = Q_2
-        x = torch.cat([emb_ent_real.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_imag_i.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_imag_j.view(-1, 1, 1, self.embedding_dim),
-                       emb_ent_imag_k.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_real.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_imag_i.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_imag_j.view(-1, 1, 1, self.embedding_dim),
-                       emb_rel_imag_k.view(-1, 1, 1, self.embedding_dim)], 2)
+class ConvQBatch(ConvQ):
+    """ ConvQ with BN + Dropout on tail entities instead of head entities."""
 
-        x = self.conv1(x)
-        x = self.bn_conv1(x)
-        x = F.relu(x)
-        x = self.feature_map_dropout(x)
-        x = x.view(x.shape[0], -1)  # reshape for NN.
-        x = F.relu(self.bn_conv2(self.fc1(x)))
-        return torch.chunk(x, 4, dim=1)
+    def transform_heads(self, x):
+        return x
 
-    def forward_head_batch(self, *, e1_idx, rel_idx):
-        """
-        Given a head entity and a relation (h,r), we compute scores for all entities.
-        [score(h,r,x)|x \in Entities] => [0.0,0.1,...,0.8], shape=> (1, |Entities|)
-        Given a batch of head entities and relations => shape (size of batch,| Entities|)
-        """
-        # (1)
-        # (1.1) Quaternion embeddings of head entities
-        emb_head_real = self.emb_ent_real(e1_idx)
-        emb_head_i = self.emb_ent_i(e1_idx)
-        emb_head_j = self.emb_ent_j(e1_idx)
-        emb_head_k = self.emb_ent_k(e1_idx)
-        # (1.2) Quaternion embeddings of relations
-        emb_rel_real = self.emb_rel_real(rel_idx)
-        emb_rel_i = self.emb_rel_i(rel_idx)
-        emb_rel_j = self.emb_rel_j(rel_idx)
-        emb_rel_k = self.emb_rel_k(rel_idx)
-
-        # (2) Apply convolution operation on (1.1) and (1.2).
-        Q_3 = self.residual_convolution(Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                                        Q_2=(emb_rel_real, emb_rel_i, emb_rel_j, emb_rel_k))
-        conv_real, conv_imag_i, conv_imag_j, conv_imag_k = Q_3
-        if self.flag_hamilton_mul_norm:
-            # (3) Quaternion multiplication of (1.1) and unit normalized (1.2).
-            r_val, i_val, j_val, k_val = quaternion_mul_with_unit_norm(
-                Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                Q_2=(emb_rel_real, emb_rel_i, emb_rel_j, emb_rel_k))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Inner product of (4.1) with ALL entities.
-            real_score = torch.mm(conv_real * r_val, self.emb_ent_real.weight.transpose(1, 0))
-            i_score = torch.mm(conv_imag_i * i_val, self.emb_ent_i.weight.transpose(1, 0))
-            j_score = torch.mm(conv_imag_j * j_val, self.emb_ent_j.weight.transpose(1, 0))
-            k_score = torch.mm(conv_imag_k * k_val, self.emb_ent_k.weight.transpose(1, 0))
-        else:
-            # (3)
-            # (3.1) Apply BN + Dropout on (1.2).
-            # (3.2) Apply quaternion multiplication on (1.1) and (3.1).
-            r_val, i_val, j_val, k_val = quaternion_mul(
-                Q_1=(emb_head_real, emb_head_i, emb_head_j, emb_head_k),
-                Q_2=(self.input_dp_rel_real(self.bn_rel_real(emb_rel_real)),
-                     self.input_dp_rel_i(self.bn_rel_i(emb_rel_i)),
-                     self.input_dp_rel_j(self.bn_rel_j(emb_rel_j)),
-                     self.input_dp_rel_k(self.bn_rel_k(emb_rel_k))))
-            # (4)
-            # (4.1) Hadamard product of (2) with (3).
-            # (4.2) Dropout on (4.1).
-            # (4.3) Apply BN + DP on ALL entities.
-            # (4.4) Inner product
-            real_score = torch.mm(self.hidden_dp_real(conv_real * r_val),
-                                  self.input_dp_ent_real(self.bn_ent_real(self.emb_ent_real.weight)).transpose(1, 0))
-            i_score = torch.mm(self.hidden_dp_i(conv_imag_i * i_val),
-                               self.input_dp_ent_i(self.bn_ent_i(self.emb_ent_i.weight)).transpose(1, 0))
-            j_score = torch.mm(self.hidden_dp_j(conv_imag_j * j_val),
-                               self.input_dp_ent_j(self.bn_ent_j(self.emb_ent_j.weight)).transpose(1, 0))
-            k_score = torch.mm(self.hidden_dp_k(conv_imag_k * k_val),
-                               self.input_dp_ent_k(self.bn_ent_k(self.emb_ent_k.weight)).transpose(1, 0))
-        score = real_score + i_score + j_score + k_score
-        return torch.sigmoid(score)
-
-    def forward_head_and_loss(self, e1_idx, rel_idx, targets):
-        return self.loss(self.forward_head_batch(e1_idx=e1_idx, rel_idx=rel_idx), targets)
-
-    def init(self):
-        xavier_normal_(self.emb_ent_real.weight.data)
-        xavier_normal_(self.emb_ent_i.weight.data)
-        xavier_normal_(self.emb_ent_j.weight.data)
-        xavier_normal_(self.emb_ent_k.weight.data)
-
-        xavier_normal_(self.emb_rel_real.weight.data)
-        xavier_normal_(self.emb_rel_i.weight.data)
-        xavier_normal_(self.emb_rel_j.weight.data)
-        xavier_normal_(self.emb_rel_k.weight.data)
-
-    def get_embeddings(self):
-        entity_emb = torch.cat((self.emb_ent_real.weight.data, self.emb_ent_i.weight.data,
-                                self.emb_ent_j.weight.data, self.emb_ent_k.weight.data), 1)
-        rel_emb = torch.cat((self.emb_rel_real.weight.data, self.emb_rel_i.weight.data,
-                             self.emb_rel_j.weight.data, self.emb_rel_k.weight.data), 1)
-
-        return entity_emb, rel_emb
+    def transform_entities(self, x):
+        # Apply BN + DP on entities.
+        return x if self.flag_hamilton_mul_norm else self.input_dp_ent(self.bn_ent(x))
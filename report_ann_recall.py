@@ -0,0 +1,34 @@
+import argparse
+import numpy as np
+import torch
+from util.ann import IVFIndex, recall_report
+from util.helper_classes import Reproduce
+
+# Recall@k of the approximate top-k of util.ann.IVFIndex w.r.t. exact top-k on (h,r) of test triples, e.g.,
+# python report_ann_recall.py --data_path KGs/YAGO3-10/ --model PretrainedModels/YAGO3-10/QMult:QMult
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_path', required=True)
+parser.add_argument('--model', required=True, help='checkpoint folder:model name')
+parser.add_argument('--num_lists', type=int, default=None, help='4 sqrt(|Entities|) by default')
+parser.add_argument('--k', type=int, default=10)
+parser.add_argument('--nprobes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+parser.add_argument('--num_queries', type=int, default=1000)
+parser.add_argument('--batch_size', type=int, default=1, help='1 for the latency of single queries')
+args = parser.parse_args()
+if not all(args.model.rpartition(':')[::2]):
+    parser.error('--model expects checkpoint folder:model name, got {0}'.format(args.model))
+
+reproduce = Reproduce()
+dataset = reproduce.load_dataset(args.data_path)
+model_path, model_name = args.model.rsplit(':', 1)
+model = reproduce.load_model(model_path, model_name)
+device = 'cuda' if reproduce.cuda else 'cpu'
+index = IVFIndex(model.entity_embeddings(), args.num_lists)
+print('{0} entities in {1} lists of at most {2} entities'.format(len(index.entities), index.num_lists,
+                                                                 int(index.counts.max())))
+test_data_idxs = dataset.get_data_idxs(dataset.test_data)
+sample = test_data_idxs[np.random.RandomState(1).permutation(len(test_data_idxs))[:args.num_queries]]
+for row in recall_report(model, index, torch.tensor(sample[:, 0], device=device),
+                         torch.tensor(sample[:, 1], device=device), args.k, args.nprobes, args.batch_size):
+    print('nprobe: {0}\trecall@{1}: {2:.4f}\tms per query: {3:.3f}\texact ms per query: {4:.3f}'.format(
+        row['nprobe'], args.k, row['recall@{0}'.format(args.k)], row['ms_per_query'], row['exact_ms_per_query']))
@@ -1,5 +1,4 @@
-from util.helper_classes import Reproduce
-from models.ensemble import Ensemble
+from util.reproduction import MANIFEST, ReproductionEngine
 
 run_WN18RR = True
 run_FB15K_237 = True
@@ -9,270 +8,7 @@ run_UMLS = True
 run_FB15K = True
 run_WN18 = True
 
-if run_FB15K_237:
-    kg_path = 'KGs/FB15k-237'
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K-237/QMultBatch', data_path="%s/" % kg_path,
-                          model_name='QMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K-237/OMultBatch', data_path="%s/" % kg_path,
-                          model_name='OMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K-237/ConvQBatch', data_path="%s/" % kg_path,
-                          model_name='ConvQBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K-237/ConvOBatch', data_path="%s/" % kg_path,
-                          model_name='ConvOBatch')
+run = {'KGs/FB15k-237/': run_FB15K_237, 'KGs/YAGO3-10/': run_YAGO_3_10, 'KGs/WN18RR/': run_WN18RR,
+       'KGs/FB15k/': run_FB15K, 'KGs/WN18/': run_WN18, 'KGs/UMLS/': run_UMLS, 'KGs/KINSHIP/': run_Kinship}
 
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/QMultBatch', model_name='QMultBatch'),
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/OMultBatch', model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/QMultBatch', model_name='QMultBatch'),
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/ConvQBatch', model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/QMultBatch', model_name='QMultBatch'),
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/ConvOBatch', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/OMultBatch', model_name='OMultBatch'),
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/ConvQBatch', model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/OMultBatch', model_name='OMultBatch'),
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/ConvOBatch', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/ConvQBatch', model_name='ConvQBatch'),
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/ConvOBatch', model_name='ConvOBatch'),
-            Reproduce().load_model(model_path='PretrainedModels/FB15K-237/OMultBatch', model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-if run_YAGO_3_10:
-    kg_path = 'KGs/YAGO3-10'
-    print('###########################################{0}##################################################'.format(
-        kg_path))
-    Reproduce().reproduce(model_path='PretrainedModels/YAGO3-10/QMult', data_path="%s/" % kg_path, model_name='QMult')
-    Reproduce().reproduce(model_path='PretrainedModels/YAGO3-10/OMult', data_path="%s/" % kg_path, model_name='OMult')
-    Reproduce().reproduce(model_path='PretrainedModels/YAGO3-10/ConvQ', data_path="%s/" % kg_path, model_name='ConvQ')
-    Reproduce().reproduce(model_path='PretrainedModels/YAGO3-10/ConvO', data_path="%s/" % kg_path, model_name='ConvO')
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/QMult', model_name='QMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/OMult', model_name='OMult')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/QMult', model_name='QMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/ConvQ', model_name='ConvQ')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/QMult', model_name='QMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/ConvO', model_name='ConvO')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/OMult', model_name='OMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/ConvQ', model_name='ConvQ')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/OMult', model_name='OMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/ConvO', model_name='ConvO')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/ConvQ', model_name='ConvQ'),
-                       Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/ConvO', model_name='ConvO'),
-                       Reproduce().load_model(model_path='PretrainedModels/YAGO3-10/OMult', model_name='OMult')),
-        data_path="%s/" % kg_path)
-if run_WN18RR:
-    kg_path = 'KGs/WN18RR'
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-    Reproduce().reproduce(model_path='PretrainedModels/WN18RR/QMult', data_path="%s/" % kg_path, model_name='QMult')
-    Reproduce().reproduce(model_path='PretrainedModels/WN18RR/OMultBatch', data_path="%s/" % kg_path,
-                          model_name='OMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/WN18RR/ConvQBatch', data_path="%s/" % kg_path,
-                          model_name='ConvQBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/WN18RR/ConvOBatch', data_path="%s/" % kg_path,
-                          model_name='ConvOBatch')
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/WN18RR/QMult', model_name='QMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/WN18RR/OMultBatch',
-                                              model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/WN18RR/QMult', model_name='QMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/WN18RR/ConvQBatch',
-                                              model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/WN18RR/QMult', model_name='QMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/WN18RR/ConvOBatch',
-                                              model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/WN18RR/OMult', model_name='OMult'),
-                       Reproduce().load_model(model_path='PretrainedModels/WN18RR/ConvQBatch',
-                                              model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/WN18RR/OMultBatch', model_name='OMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/WN18RR/ConvOBatch',
-                                              model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/WN18RR/ConvQBatch', model_name='ConvQBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/WN18RR/ConvOBatch', model_name='ConvOBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/WN18RR/OMultBatch',
-                                              model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-
-if run_FB15K:
-    kg_path = 'KGs/FB15k'
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K/QMult', data_path="%s/" % kg_path, model_name='QMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K/OMult', data_path="%s/" % kg_path, model_name='OMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K/ConvQ', data_path="%s/" % kg_path, model_name='ConvQBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/FB15K/ConvO', data_path="%s/" % kg_path, model_name='ConvOBatch')
-
-if run_WN18:
-    kg_path = 'KGs/WN18'
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-    Reproduce().reproduce(model_path='PretrainedModels/WN18/QMult', data_path="%s/" % kg_path, model_name='QMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/WN18/ConvQ', data_path="%s/" % kg_path, model_name='ConvQBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/WN18/OMult', data_path="%s/" % kg_path, model_name='OMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/WN18/ConvO', data_path="%s/" % kg_path, model_name='ConvOBatch')
-
-if run_UMLS:
-    kg_path = 'KGs/UMLS'
-    print('###########################################{0}##################################################'.format(
-        kg_path))
-    Reproduce().reproduce(model_path='PretrainedModels/UMLS/QMult', data_path="%s/" % kg_path, model_name='QMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/UMLS/ConvQ', data_path="%s/" % kg_path, model_name='ConvQBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/UMLS/OMult', data_path="%s/" % kg_path, model_name='OMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/UMLS/ConvO', data_path="%s/" % kg_path, model_name='ConvOBatch')
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvQ', model_name='ConvQBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvO', model_name='ConvOBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/OMult', model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvQ', model_name='ConvQBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvO', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/UMLS/QMult', model_name='QMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/OMult', model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/UMLS/QMult', model_name='QMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvQ', model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/UMLS/QMult', model_name='QMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvO', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/UMLS/OMult', model_name='OMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvQ', model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/UMLS/OMult', model_name='OMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/UMLS/ConvO', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-
-if run_Kinship:
-    kg_path = 'KGs/KINSHIP'
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
-
-    Reproduce().reproduce(model_path='PretrainedModels/Kinship/QMult', data_path="%s/" % kg_path,
-                          model_name='QMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/Kinship/ConvQ', data_path="%s/" % kg_path,
-                          model_name='ConvQBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/Kinship/OMult', data_path="%s/" % kg_path,
-                          model_name='OMultBatch')
-    Reproduce().reproduce(model_path='PretrainedModels/Kinship/ConvO', data_path="%s/" % kg_path,
-                          model_name='ConvOBatch')
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvQ', model_name='ConvQBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvO', model_name='ConvOBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/OMult', model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvQ', model_name='ConvQBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvO', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path, per_rel_flag_=False)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/Kinship/QMult', model_name='QMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/OMult', model_name='OMultBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/Kinship/QMult', model_name='QMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvQ', model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/Kinship/QMult', model_name='QMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvO', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/Kinship/OMult', model_name='OMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvQ', model_name='ConvQBatch')),
-        data_path="%s/" % kg_path)
-
-    Reproduce().reproduce_ensemble(
-        model=Ensemble(Reproduce().load_model(model_path='PretrainedModels/Kinship/OMult', model_name='OMultBatch'),
-                       Reproduce().load_model(model_path='PretrainedModels/Kinship/ConvO', model_name='ConvOBatch')),
-        data_path="%s/" % kg_path)
-    print(
-        '###########################################     {0}     ##################################################'.format(
-            kg_path))
+ReproductionEngine().run([i for i in MANIFEST if run[i['data_path']]])
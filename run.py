@@ -13,6 +13,10 @@ for kg_root in datasets:
             'learning_rate': None,
             'label_smoothing': None,
             'num_workers': None,
+            # num_negatives > 0: score true tails and sampled entities instead of all entities.
+            'num_negatives': 0,
+            'negative_sampling': 'uniform',  # or 'frequency'
+            'shared_negatives': True,  # False: sample negatives per triple
         }
         if model_name in ['ConvQBatch']:
             config.update({'embedding_dim': None,
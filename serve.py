@@ -0,0 +1,45 @@
+import argparse
+from util.ann import IVFIndex
+from util.helper_classes import Reproduce
+from util.prediction import LinkPredictor, TopKCache
+from util.serving import MicroBatcher, InferenceServer
+
+# Answer top-k link prediction queries of pretrained models over HTTP on localhost, e.g.,
+# python serve.py --data_path KGs/WN18RR/ --models PretrainedModels/WN18RR/QMult:QMult
+# curl 'localhost:8000/predict?head=00260881&relation=_hypernym&k=5'
+# curl localhost:8000/stats
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_path', required=True)
+parser.add_argument('--models', nargs='+', required=True, help='checkpoint folder:model name, e.g., PretrainedModels/'
+                                                               'FB15K/QMult:QMultBatch')
+parser.add_argument('--host', default='127.0.0.1')
+parser.add_argument('--port', type=int, default=8000)
+parser.add_argument('--max_batch_size', type=int, default=1024)
+parser.add_argument('--max_delay_ms', type=float, default=5.0, help='latency deadline of micro-batching')
+parser.add_argument('--block_size', type=int, default=None, help='score entities in blocks of block_size')
+parser.add_argument('--num_lists', type=int, default=None, help='approximate top-k via IVFIndex of num_lists lists, '
+                                                                 'see report_ann_recall.py')
+parser.add_argument('--nprobe', type=int, default=8)
+parser.add_argument('--cache_mb', type=float, default=0, help='memory budget of top-k results shared by all models')
+args = parser.parse_args()
+for spec in args.models:
+    if not all(spec.rpartition(':')[::2]):
+        parser.error('--models expects checkpoint folder:model name, got {0}'.format(spec))
+names = [spec.rsplit(':', 1)[-1] for spec in args.models]
+if len(set(names)) < len(names):
+    parser.error('models are queried by name, but names repeat: {0}'.format(', '.join(names)))
+
+reproduce = Reproduce()
+dataset = reproduce.load_dataset(args.data_path)
+cache = TopKCache(int(args.cache_mb * 2 ** 20)) if args.cache_mb else None
+batchers = dict()
+for spec in args.models:
+    model_path, model_name = spec.rsplit(':', 1)
+    model = reproduce.load_model(model_path, model_name)
+    predictor = LinkPredictor(model, dataset, batch_size=args.max_batch_size, block_size=args.block_size,
+                              index=IVFIndex(model.entity_embeddings(), args.num_lists) if args.num_lists else None,
+                              nprobe=args.nprobe, cache=cache)
+    batchers[model_name] = MicroBatcher(predictor, args.max_batch_size, args.max_delay_ms / 1000)
+server = InferenceServer(batchers, args.host, args.port)
+print('Serving {0} on http://{1}:{2}'.format(', '.join(batchers), args.host, args.port))
+server.serve_forever()
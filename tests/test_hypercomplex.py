@@ -0,0 +1,37 @@
+import pytest
+import torch
+from models.hypercomplex import hypercomplex_mul
+from models.octonian_models import octonion_mul, octonion_mul_norm
+from models.quat_models import quaternion_mul, quaternion_mul_with_unit_norm
+
+# Reference products of dimension dim and unit_norm, i.e., the functions hypercomplex_mul replaced.
+REFERENCES = {(4, False): lambda x, y: quaternion_mul(Q_1=x, Q_2=y),
+              (4, True): lambda x, y: quaternion_mul_with_unit_norm(Q_1=x, Q_2=y),
+              (8, False): lambda x, y: octonion_mul(O_1=x, O_2=y),
+              (8, True): lambda x, y: octonion_mul_norm(O_1=x, O_2=y)}
+
+
+def inputs(dim, size=5, d=3):
+    torch.manual_seed(dim)
+    return (torch.randn(size, dim * d, dtype=torch.float64, requires_grad=True),
+            torch.randn(size, dim * d, dtype=torch.float64, requires_grad=True))
+
+
+@pytest.mark.parametrize('dim,unit_norm', sorted(REFERENCES))
+def test_gradcheck(dim, unit_norm):
+    x, y = inputs(dim)
+    assert torch.autograd.gradcheck(lambda x, y: hypercomplex_mul(x, y, dim, unit_norm), (x, y))
+
+
+@pytest.mark.parametrize('dim,unit_norm', sorted(REFERENCES))
+def test_reference(dim, unit_norm):
+    x, y = inputs(dim)
+    output = hypercomplex_mul(x, y, dim, unit_norm)
+    grad_output = torch.randn_like(output)
+    grad_x, grad_y = torch.autograd.grad(output, (x, y), grad_output)
+
+    expected = torch.cat(REFERENCES[dim, unit_norm](x.chunk(dim, 1), y.chunk(dim, 1)), 1)
+    expected_grad_x, expected_grad_y = torch.autograd.grad(expected, (x, y), grad_output)
+    assert torch.allclose(output, expected, rtol=0, atol=1e-12)
+    assert torch.allclose(grad_x, expected_grad_x, rtol=0, atol=1e-12)
+    assert torch.allclose(grad_y, expected_grad_y, rtol=0, atol=1e-12)
@@ -0,0 +1,34 @@
+import torch
+from torch.nn import functional as F
+from models.base_model import sparse_bce_with_logits
+from util.helper_classes import NegativeSampler
+
+
+def test_collision_with_tail_is_masked():
+    torch.manual_seed(1)
+    # Two entities, hence most samples collide with the tail of their row.
+    candidates, mask = NegativeSampler(2).sample_per_triple(torch.tensor([0, 1, 1]), 4)
+    assert candidates.shape == mask.shape == (3, 5)
+    assert (candidates[:, 0] == torch.tensor([0, 1, 1])).all() and mask[:, 0].all()
+    assert (mask[:, 1:] == (candidates[:, 1:] != candidates[:, :1])).all() and not mask.all()
+
+    logits = torch.randn(3, 5, dtype=torch.float64, requires_grad=True)
+    rows, cols = torch.arange(3), torch.zeros(3, dtype=torch.long)
+    loss = sparse_bce_with_logits(logits, rows, cols, mask=mask)
+    targets = torch.zeros(3, 5, dtype=torch.float64)
+    targets[:, 0] = 1
+    assert torch.allclose(loss, F.binary_cross_entropy_with_logits(logits[mask], targets[mask]))
+    loss.backward()
+    # A collision neither pushes the logit of the tail down nor any other entry.
+    assert (logits.grad[~mask] == 0).all() and (logits.grad[:, 0] < 0).all()
+
+
+def test_label_smoothing_of_candidates():
+    logits = torch.randn(3, 5, dtype=torch.float64)
+    rows, cols = torch.arange(3), torch.zeros(3, dtype=torch.long)
+    targets = torch.zeros(3, 5, dtype=torch.float64)
+    targets[:, 0] = 1
+    # Smoothed as if scores of 5 candidates out of 100 entities.
+    loss = sparse_bce_with_logits(logits, rows, cols, label_smoothing=0.1, num_entities=100)
+    expected = F.binary_cross_entropy_with_logits(logits, 0.9 * targets + 1 / 100)
+    assert torch.allclose(loss, expected)
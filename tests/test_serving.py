@@ -0,0 +1,97 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+import torch
+from models.quat_models import QMult
+from util.data import Data
+from util.prediction import LinkPredictor
+from util.serving import InferenceServer, MicroBatcher
+
+
+@pytest.fixture(scope='module')
+def predictor(tmp_path_factory):
+    path = tmp_path_factory.mktemp('kg')
+    rng = np.random.RandomState(1)
+    for name, size in [('train', 300), ('valid', 30), ('test', 30)]:
+        with open(str(path / (name + '.txt')), 'w') as file_descriptor:
+            file_descriptor.write('\n'.join('e{0}\tr{1}\te{2}'.format(rng.randint(20), rng.randint(3), rng.randint(20))
+                                            for _ in range(size)))
+    dataset = Data(str(path) + '/')
+    torch.manual_seed(1)
+    model = QMult({'embedding_dim': 4, 'num_entities': len(dataset.entities),
+                   'num_relations': len(dataset.relations), 'input_dropout': 0.0, 'hidden_dropout': 0.0,
+                   'norm_flag': False})
+    model.init()
+    model.eval()
+    return LinkPredictor(model, dataset, cuda=False)
+
+
+@pytest.fixture
+def server(predictor):
+    # Requests arriving within a second are scored in one micro-batch.
+    server = InferenceServer({'QMult': MicroBatcher(predictor, max_batch_size=8, max_delay=1.0)}, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, body=None):
+    url = 'http://127.0.0.1:{0}{1}'.format(server.server_address[1], path)
+    data = None if body is None else json.dumps(body).encode('utf-8')
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=30) as response:
+            return response.status, json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read().decode('utf-8'))
+
+
+def expected(predictor, heads, relations, k, filtered=True):
+    predictions = predictor.decode(*predictor.topk(predictor.encode_entities(heads),
+                                                   predictor.encode_relations(relations), k, filtered))
+    return [[[entity, score] for entity, score in prediction] for prediction in predictions]
+
+
+def assert_predictions(predictions, expected_predictions):
+    # Scores of a micro-batch may differ from those of single queries in the last bit.
+    assert [[entity for entity, _ in prediction] for prediction in predictions] == \
+           [[entity for entity, _ in prediction] for prediction in expected_predictions]
+    assert [[score for _, score in prediction] for prediction in predictions] == \
+           [pytest.approx([score for _, score in prediction]) for prediction in expected_predictions]
+
+
+def test_get_and_post_topk(server, predictor):
+    status, content = request(server, '/predict?head=e1&relation=r0&k=5')
+    assert status == 200
+    assert_predictions(content['predictions'], expected(predictor, ['e1'], ['r0'], 5))
+
+    status, content = request(server, '/predict', {'filtered': False, 'queries': [
+        {'head': 'e2', 'relation': 'r1', 'k': 3}, {'tail': 'e3', 'relation': 'r2', 'k': 4}]})
+    assert status == 200
+    assert_predictions(content['predictions'], [expected(predictor, ['e2'], ['r1'], 3, False)[0],
+                                                expected(predictor, ['e3'], ['r2_reverse'], 4, False)[0]])
+
+
+def test_invalid_queries(server):
+    status, content = request(server, '/predict?head=unknown&relation=r0')
+    assert status == 400 and 'unknown' in content['error']
+    status, _ = request(server, '/predict?head=e1&relation=r0&k=0')
+    assert status == 400
+    status, _ = request(server, '/predict', {'queries': [{'head': 'e1', 'relation': 'r0', 'k': 0}]})
+    assert status == 400
+
+
+def test_concurrent_requests_are_coalesced(server):
+    statuses = []
+    threads = [threading.Thread(target=lambda i=i: statuses.append(
+        request(server, '/predict?head=e{0}&relation=r0&k=2'.format(i))[0])) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 8
+    batch_size = request(server, '/stats')[1]['QMult']['batch_size']
+    assert batch_size['mean'] * batch_size['count'] == 8 and batch_size['count'] < 8
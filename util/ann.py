@@ -0,0 +1,134 @@
+import time
+import numpy as np
+import torch
+
+
+class IVFIndex:
+    """
+    Inverted file index for approximate maximum inner product search (MIPS) over rows of entities, e.g.,
+    model.entity_embeddings(): scores of all models are inner products of forward_head_query with these rows.
+
+    Rows x are augmented by sqrt(M^2 - |x|^2), M being the largest norm, hence all rows have norm M and the
+    inner product of a query (augmented by 0) with rows ranks rows as their cosine. Augmented rows are clustered by
+    spherical k-means, trained on at most sample_size rows per list, into num_lists lists (4 sqrt(|Entities|) if
+    None).
+    A query is scored exactly against the rows of the nprobe lists whose centroids have the largest inner products.
+    """
+
+    def __init__(self, entities, num_lists=None, num_iterations=10, sample_size=64, seed=1, chunk_size=65536):
+        entities = entities.detach()
+        num_entities = len(entities)
+        device = entities.device
+        self.entities = entities
+        self.num_lists = min(num_lists or max(1, int(4 * np.sqrt(num_entities))), num_entities)
+        self.max_norm = entities.norm(dim=1).max()
+
+        generator = torch.Generator().manual_seed(seed)
+        sample = self.augment(entities[torch.randperm(num_entities, generator=generator)[
+                                       :max(sample_size * self.num_lists, self.num_lists)].to(device)])
+        centroids = sample[:self.num_lists]
+        for _ in range(num_iterations):
+            assignment = self.assign(sample, centroids)
+            sums = torch.zeros_like(centroids).index_add_(0, assignment, sample)
+            counts = torch.bincount(assignment, minlength=self.num_lists)
+            # Lists without rows keep their centroids.
+            centroids = torch.where((counts > 0).unsqueeze(1), sums / sums.norm(dim=1, keepdim=True).clamp(min=1e-12),
+                                    centroids)
+        # Inner products with augmented centroids of queries augmented by 0.
+        self.centroids = centroids[:, :-1].contiguous()
+
+        # Rows of the i.th list are order[offsets[i]:offsets[i + 1]].
+        assignment = torch.cat([self.assign(self.augment(entities[i:i + chunk_size]), centroids)
+                                for i in range(0, num_entities, chunk_size)])
+        self.order = torch.argsort(assignment)
+        self.counts = torch.bincount(assignment, minlength=self.num_lists)
+        self.offsets = torch.cumsum(self.counts, 0) - self.counts
+
+    def augment(self, x):
+        """ Rows x augmented by sqrt(M^2 - |x|^2) and divided by M, i.e., rows of unit norm."""
+        norms = x.norm(dim=1, keepdim=True)
+        return torch.cat([x, torch.sqrt(torch.clamp(self.max_norm ** 2 - norms ** 2, min=0))], 1) / self.max_norm
+
+    @staticmethod
+    def assign(points, centroids):
+        return torch.mm(points, centroids.t()).argmax(1)
+
+    def search(self, queries, k=10, nprobe=8, exclude=None, max_elements=2 ** 26):
+        """
+        Approximate (scores, indexes) of the k rows of largest inner products with queries, shape (size of batch, k).
+        exclude: (rows of queries, indexes of rows) arrays of rows to skip, e.g., FilterIndex.coo.
+        Rows with less than k candidates end with -inf scores. Queries are scored in chunks of at most
+        max_elements gathered embedding values, planned from the sizes of their probed lists, i.e., lists of skewed
+        sizes do not exceed it; a query whose probed lists exceed it alone is scored alone.
+        """
+        nprobe = min(nprobe, self.num_lists)
+        num_entities, dim = self.entities.shape
+        # Candidates of a chunk, i.e., (size of chunk, size of its largest candidate set) padded scores.
+        budget = max(1, max_elements // dim)
+        excluded = None
+        if exclude is not None:
+            excluded = np.asarray(exclude[0], dtype=np.int64) * num_entities + np.asarray(exclude[1])
+        top_scores, top_entities = [], []
+        with torch.no_grad():
+            for i in range(0, len(queries), max(1, max_elements // self.num_lists)):
+                block = queries[i:i + max(1, max_elements // self.num_lists)]
+                probes = torch.mm(block, self.centroids.t()).topk(nprobe, dim=1)[1]
+                sizes = np.maximum(self.counts[probes].sum(1).cpu().numpy(), 1)
+                start = 0
+                while start < len(block):
+                    window = sizes[start:start + budget]
+                    fits = np.maximum.accumulate(window) * np.arange(1, len(window) + 1) <= budget
+                    stop = start + (len(window) if fits.all() else max(1, int(np.argmin(fits))))
+                    scores, entities = self._search_chunk(block[start:stop], probes[start:stop], i + start, k,
+                                                          excluded)
+                    top_scores.append(scores)
+                    top_entities.append(entities)
+                    start = stop
+        return torch.cat(top_scores), torch.cat(top_entities)
+
+    def _search_chunk(self, chunk, probes, offset, k, excluded):
+        """ search of a chunk of queries given their probed lists, offset being the row of its first query."""
+        num_entities, nprobe = len(self.entities), probes.size(1)
+        # Candidates of a query are the rows of its probed lists, in (rows of queries, position) pairs.
+        starts, lengths = self.offsets[probes].view(-1), self.counts[probes].view(-1)
+        row_lengths = lengths.view(len(chunk), nprobe).sum(1)
+        slots = torch.repeat_interleave(torch.arange(len(lengths), device=chunk.device), lengths)
+        positions = torch.arange(len(slots), device=chunk.device)
+        rows = slots // nprobe
+        candidates = self.order[starts[slots] + positions - torch.repeat_interleave(
+            torch.cumsum(lengths, 0) - lengths, lengths)]
+        positions = positions - torch.repeat_interleave(torch.cumsum(row_lengths, 0) - row_lengths, row_lengths)
+        scores = (self.entities[candidates] * chunk[rows]).sum(1)
+        if excluded is not None:
+            codes = (rows + offset) * num_entities + candidates
+            scores[torch.from_numpy(np.isin(codes.cpu().numpy(), excluded)).to(scores.device)] = -float('inf')
+        width = max(int(row_lengths.max()), k)
+        padded_scores = scores.new_full((len(chunk), width), -float('inf'))
+        padded_scores[rows, positions] = scores
+        padded_candidates = candidates.new_full((len(chunk), width), -1)
+        padded_candidates[rows, positions] = candidates
+        padded_scores, top = padded_scores.topk(k, dim=1)
+        return padded_scores, padded_candidates.gather(1, top)
+
+
+def recall_report(model, index, e1_idx, rel_idx, k=10, nprobes=(1, 2, 4, 8, 16, 32), batch_size=1):
+    """
+    Recall@k of index.search w.r.t. the exact top-k of model.forward_head_logits for a batch of (h,r) and the time
+    per query (ms) of both, queries being scored in batches of batch_size. Return a list of dicts, one per nprobe.
+    """
+    with torch.no_grad():
+        queries = model.forward_head_query(e1_idx=e1_idx, rel_idx=rel_idx)
+        start = time.time()
+        exact = torch.cat([torch.mm(queries[i:i + batch_size], index.entities.t()).topk(k, dim=1)[1]
+                           for i in range(0, len(queries), batch_size)])
+        exact_ms = 1000 * (time.time() - start) / len(queries)
+        report = []
+        for nprobe in nprobes:
+            start = time.time()
+            approximate = torch.cat([index.search(queries[i:i + batch_size], k, nprobe)[1]
+                                     for i in range(0, len(queries), batch_size)])
+            approximate_ms = 1000 * (time.time() - start) / len(queries)
+            recall = (approximate.unsqueeze(2) == exact.unsqueeze(1)).any(2).float().mean().item()
+            report.append({'nprobe': nprobe, 'recall@{0}'.format(k): recall, 'ms_per_query': approximate_ms,
+                           'exact_ms_per_query': exact_ms})
+    return report
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from util.prediction import checkpoint_hash
+
+PROGRESS_FILE = 'progress.json'
+
+
+def _write_atomic(path, write):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as file_descriptor:
+        write(file_descriptor)
+    os.replace(tmp, path)
+
+
+def _array_hash(*arrays):
+    sha = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        sha.update('{0}{1}'.format(array.dtype.str, array.shape).encode('utf-8'))
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+def shard_path(out_dir, shard):
+    return os.path.join(out_dir, 'part-{0:05d}.npy'.format(shard))
+
+
+def bulk_topk(predictor, out_dir, k=10, filtered=True, shard_size=100000, num_workers=4, pairs=None, log=print):
+    """
+    Top-k tails of ALL observed (h,r) pairs, i.e., keys of dataset.get_filter_index(), streamed into .npy shards
+    of shard_size pairs with fields head, relation, entities (k,) and scores (k,), see load_shards.
+    predictor: LinkPredictor, scoring a shard in batches of its batch_size.
+    Shards are scored one after another while a pool of num_workers threads writes finished shards.
+    out_dir/progress.json lists written shards, hence an interrupted job resumes with the missing shards.
+    A job resumes only with the same checkpoint, index and nprobe, pairs and vocabulary, i.e., settings.
+    pairs: optional (heads, relations) arrays instead of all observed pairs.
+    """
+    if pairs is None:
+        pairs = predictor.dataset.get_filter_index().pairs()
+    heads, relations = np.asarray(pairs[0], dtype=np.int64), np.asarray(pairs[1], dtype=np.int64)
+    k = min(k, len(predictor.dataset.entities))
+    num_shards = (len(heads) + shard_size - 1) // shard_size
+    index = predictor.index
+    settings = {'num_pairs': len(heads), 'shard_size': shard_size, 'k': k, 'filtered': filtered,
+                'num_shards': num_shards, 'checkpoint': checkpoint_hash(predictor.model),
+                'index': None if index is None else {'num_lists': index.num_lists, 'nprobe': predictor.nprobe,
+                                                     'lists': _array_hash(index.order.cpu().numpy(),
+                                                                          index.counts.cpu().numpy())},
+                'pairs': _array_hash(heads, relations),
+                'vocabulary': _array_hash(np.array(predictor.dataset.entities), np.array(predictor.dataset.relations))}
+    os.makedirs(out_dir, exist_ok=True)
+    progress_path = os.path.join(out_dir, PROGRESS_FILE)
+    done = set()
+    if os.path.exists(progress_path):
+        with open(progress_path, 'r') as file_descriptor:
+            progress = json.load(file_descriptor)
+        if progress['settings'] != settings:
+            keys = sorted(key for key in set(settings) | set(progress['settings'])
+                          if progress['settings'].get(key) != settings.get(key))
+            raise ValueError('{0} holds shards of another job, differing in {1}: {2} instead of {3}'.format(
+                out_dir, ', '.join(keys), [progress['settings'].get(key) for key in keys],
+                [settings.get(key) for key in keys]))
+        done = set(shard for shard in progress['done'] if os.path.exists(shard_path(out_dir, shard)))
+    else:
+        np.save(os.path.join(out_dir, 'entities.npy'), np.array(predictor.dataset.entities))
+        np.save(os.path.join(out_dir, 'relations.npy'), np.array(predictor.dataset.relations))
+    dtype = np.dtype([('head', np.int64), ('relation', np.int64), ('entities', np.int64, (k,)),
+                      ('scores', np.float32, (k,))])
+
+    def write(shard, first, second, scores, entities):
+        rows = np.empty(len(first), dtype=dtype)
+        rows['head'], rows['relation'], rows['entities'], rows['scores'] = first, second, entities, scores
+        _write_atomic(shard_path(out_dir, shard), lambda file_descriptor: np.save(file_descriptor, rows))
+        return shard
+
+    def save_progress():
+        content = json.dumps({'settings': settings, 'done': sorted(done)}).encode('utf-8')
+        _write_atomic(progress_path, lambda file_descriptor: file_descriptor.write(content))
+
+    todo = [shard for shard in range(num_shards) if shard not in done]
+    log('{0} pairs in {1} shards, {2} to score'.format(len(heads), num_shards, len(todo)))
+    pending = []
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        for shard in todo:
+            # At most num_workers shards wait to be written.
+            while len(pending) >= num_workers:
+                done.add(pending.pop(0).result())
+                save_progress()
+            first = heads[shard * shard_size:(shard + 1) * shard_size]
+            second = relations[shard * shard_size:(shard + 1) * shard_size]
+            scores, entities = predictor.topk(first, second, k, filtered)
+            pending.append(pool.submit(write, shard, first, second, scores, entities))
+            log('Shard {0}/{1} scored'.format(shard + 1, num_shards))
+        for future in pending:
+            done.add(future.result())
+            save_progress()
+    return settings
+
+
+def load_shards(out_dir, mmap_mode='r'):
+    """ Iterator over the shards of a finished bulk_topk job in order, memory-mapped by default."""
+    with open(os.path.join(out_dir, PROGRESS_FILE), 'r') as file_descriptor:
+        progress = json.load(file_descriptor)
+    num_shards, done = progress['settings']['num_shards'], set(progress['done'])
+    missing = [shard for shard in range(num_shards)
+               if shard not in done or not os.path.exists(shard_path(out_dir, shard))]
+    if missing:
+        raise ValueError('{0} holds an incomplete job, {1} of {2} shards are missing (e.g., {3}); rerun bulk_topk to '
+                         'resume it'.format(out_dir, len(missing), num_shards, shard_path(out_dir, missing[0])))
+    return (np.load(shard_path(out_dir, shard), mmap_mode=mmap_mode) for shard in range(num_shards))
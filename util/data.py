@@ -1,5 +1,18 @@
+import csv
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import torch
+
+COMPILED_FOLDER = 'compiled'
+COMPILED_FORMAT = 1
+SPLITS = ['train', 'valid', 'test']
+
+
 class Data:
-    def __init__(self, data_dir=None, reverse=True, tail_pred_constraint=False):
+    def __init__(self, data_dir=None, reverse=True, tail_pred_constraint=False, columnar=False):
         """
         ****** reverse=True
         Double the size of datasets by including reciprocal/inverse relations.
@@ -7,10 +20,24 @@ class Data:
 
         ****** tail_pred_constraint=True
         Do not include reciprocal relations into testing. Consequently, MRR is computed by only tail entity rankings.
+
+        ****** columnar=True
+        Encode triples once into int32 arrays instead of lists of string lists.
+        train_data, valid_data, test_data and data become TripleView objects: reciprocal triples and
+        the concatenation of all splits are derived from the encoded arrays on access, not materialized.
+        Entity and relation vocabularies (and hence indexes) are identical to the ones of the default mode.
+        If Data.compile(data_dir) has been run before, encoded triples are memory-mapped from data_dir/compiled
+        instead of parsing the text files.
         """
         self.info = {'dataset': data_dir,
                      'dataset_augmentation': reverse,
                      'tail_pred_constraint': tail_pred_constraint}
+        self.columnar = columnar
+        self.__data_idxs = dict()
+        self.__filter_indexes = dict()
+        if columnar:
+            self.__load_columnar(data_dir, reverse, tail_pred_constraint)
+            return
 
         self.train_data = self.load_data(data_dir, data_type="train", add_reciprical=reverse)
         self.valid_data = self.load_data(data_dir, data_type="valid", add_reciprical=reverse)
@@ -28,6 +55,181 @@ class Data:
                                                  if i not in self.train_relations] + [i for i in self.test_relations \
                                                                                       if i not in self.train_relations]
 
+    def get_data_idxs(self, data):
+        """
+        Indexes of triples in data (a split of this dataset) as an (N,3) int64 array.
+        Triples are encoded in bulk and the result is cached, i.e., repeated calls for the same split are free.
+        """
+        key = id(data)
+        if key not in self.__data_idxs:
+            if isinstance(data, TripleView):
+                data_idxs = data.to_idxs()
+            else:
+                data_idxs = self.encode(data)
+            # Keep a reference to data so that its id is not reused while cached.
+            self.__data_idxs[key] = (data, data_idxs)
+        return self.__data_idxs[key][1]
+
+    def get_filter_index(self, key=(0, 1)):
+        """
+        FilterIndex over all triples (train, valid and test) keyed by the columns in key, e.g.,
+        key=(0, 1) maps (head, relation) to tails and key=(0, 2) maps (head, tail) to relations. Built once and cached.
+        """
+        if key not in self.__filter_indexes:
+            sizes = [len(self.entities), len(self.relations), len(self.entities)]
+            value = 3 - key[0] - key[1]
+            data_idxs = self.get_data_idxs(self.data)
+            self.__filter_indexes[key] = FilterIndex(data_idxs[:, key[0]], data_idxs[:, key[1]], data_idxs[:, value],
+                                                     num_second=sizes[key[1]], num_values=sizes[value])
+        return self.__filter_indexes[key]
+
+    def encode(self, data):
+        """ Map a list of [head, relation, tail] strings to an (N,3) int64 array of indexes in one pass."""
+        data_idxs = np.empty((len(data), 3), dtype=np.int64)
+        if len(data) == 0:
+            return data_idxs
+        data = np.array(data, dtype=object)
+        entity_idxs = pd.Index(self.entities)
+        # Same semantics as {self.relations[i]: i for i in range(len(self.relations))}.
+        relation_idxs = {self.relations[i]: i for i in range(len(self.relations))}
+        relation_codes = np.array(list(relation_idxs.values()), dtype=np.int64)
+        for column, index in [(0, entity_idxs), (1, pd.Index(list(relation_idxs.keys()))), (2, entity_idxs)]:
+            codes = index.get_indexer(data[:, column])
+            if (codes < 0).any():
+                raise KeyError(data[np.argmin(codes), column])
+            data_idxs[:, column] = codes if column != 1 else relation_codes[codes]
+        return data_idxs
+
+    def __load_columnar(self, data_dir, reverse, tail_pred_constraint):
+        compiled = self.load_compiled(data_dir)
+        if compiled is None:
+            compiled = self.encode_triples(data_dir)
+        self.build_columnar(**compiled, reverse=reverse, tail_pred_constraint=tail_pred_constraint)
+
+    @staticmethod
+    def encode_triples(data_dir):
+        """ Parse train, valid and test splits and encode them into (N,3) int32 arrays over sorted vocabularies."""
+        raw = [Data.read_triples(data_dir, data_type) for data_type in SPLITS]
+        sizes = [len(i) for i in raw]
+        raw = np.concatenate(raw)
+
+        # Sorted vocabularies, i.e., the same order as get_entities() and get_relations().
+        entity_codes, entities = pd.factorize(np.concatenate([raw[:, 0], raw[:, 2]]), sort=True)
+        relation_codes, base_relations = pd.factorize(raw[:, 1], sort=True)
+        del raw
+        num_triples = len(relation_codes)
+        triples = np.empty((num_triples, 3), dtype=np.int32)
+        triples[:, 0] = entity_codes[:num_triples]
+        triples[:, 1] = relation_codes
+        triples[:, 2] = entity_codes[num_triples:]
+        del entity_codes, relation_codes
+        offsets = np.cumsum([0] + sizes)
+        return {'entities': list(entities), 'base_relations': list(base_relations),
+                'train': triples[offsets[0]:offsets[1]],
+                'valid': triples[offsets[1]:offsets[2]],
+                'test': triples[offsets[2]:offsets[3]]}
+
+    @staticmethod
+    def compile(data_dir):
+        """
+        Encode the dataset once and store it in data_dir/compiled:
+        {train,valid,test}.npy holding int32 triples, entities.txt and relations.txt holding the vocabularies and
+        meta.json holding the content hash of the text files. Data(data_dir, columnar=True) memory-maps them later.
+        """
+        compiled = Data.encode_triples(data_dir)
+        path = os.path.join(data_dir, COMPILED_FOLDER)
+        os.makedirs(path, exist_ok=True)
+        for data_type in SPLITS:
+            np.save(os.path.join(path, data_type + '.npy'), np.ascontiguousarray(compiled[data_type]))
+        for name, vocab in [('entities', compiled['entities']), ('relations', compiled['base_relations'])]:
+            with open(os.path.join(path, name + '.txt'), 'w') as f:
+                f.write('\n'.join(vocab))
+        meta = {'format': COMPILED_FORMAT,
+                'sha256': _content_hash(data_dir),
+                'fingerprint': _fingerprint(data_dir),
+                'num_triples': {i: len(compiled[i]) for i in SPLITS},
+                'split_relations': {i: np.unique(compiled[i][:, 1]).tolist() for i in SPLITS}}
+        # meta.json is written last; its presence marks a complete compilation.
+        with open(os.path.join(path, 'meta.json.tmp'), 'w') as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(path, 'meta.json.tmp'), os.path.join(path, 'meta.json'))
+        return path
+
+    @staticmethod
+    def load_compiled(data_dir):
+        """ Memory-map the output of Data.compile(data_dir). Return None if it is missing or stale."""
+        path = os.path.join(data_dir, COMPILED_FOLDER)
+        try:
+            with open(os.path.join(path, 'meta.json'), 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        if meta.get('format') != COMPILED_FORMAT:
+            return None
+        # Text files may be absent if only the compiled dataset is shipped.
+        # Otherwise, a changed size or mtime triggers a comparison of content hashes.
+        if all(os.path.exists("%s%s.txt" % (data_dir, i)) for i in SPLITS) and \
+                _fingerprint(data_dir) != meta['fingerprint'] and _content_hash(data_dir) != meta['sha256']:
+            return None
+        compiled = {i: np.load(os.path.join(path, i + '.npy'), mmap_mode='r') for i in SPLITS}
+        for name, key in [('entities', 'entities'), ('relations', 'base_relations')]:
+            with open(os.path.join(path, name + '.txt'), 'r') as f:
+                compiled[key] = f.read().split('\n')
+        compiled['split_relations'] = meta['split_relations']
+        return compiled
+
+    def build_columnar(self, *, entities, base_relations, train, valid, test, reverse, tail_pred_constraint,
+                       split_relations=None):
+        """
+        Set up the columnar representation from encoded (N,3) triples whose relation column indexes base_relations,
+        i.e., the sorted relations of the dataset without reciprocals.
+        split_relations optionally maps each split to its base relation codes to avoid scanning the triples.
+        """
+        self.entities = entities
+        self.base_relations = base_relations
+        self.train_triples, self.valid_triples, self.test_triples = train, valid, test
+        test_reverse = reverse and not tail_pred_constraint
+
+        if split_relations is None:
+            split_relations = {'train': np.unique(train[:, 1]), 'valid': np.unique(valid[:, 1]),
+                               'test': np.unique(test[:, 1])}
+
+        def relations_of(data_type, add_reciprical):
+            names = [base_relations[i] for i in split_relations[data_type]]
+            if add_reciprical:
+                names += [i + '_reverse' for i in names]
+            return sorted(names)
+
+        self.train_relations = relations_of('train', reverse)
+        self.valid_relations = relations_of('valid', reverse)
+        self.test_relations = relations_of('test', test_reverse)
+        self.relations = self.train_relations + [i for i in self.valid_relations \
+                                                 if i not in self.train_relations] + [i for i in self.test_relations \
+                                                                                      if i not in self.train_relations]
+        relation_idxs = {self.relations[i]: i for i in range(len(self.relations))}
+        # Map base relation codes to indexes of relations and of their reciprocals.
+        self.forward_relation_map = np.array([relation_idxs[i] for i in base_relations], dtype=np.int64)
+        self.reverse_relation_map = np.array([relation_idxs.get(i + '_reverse', -1) for i in base_relations],
+                                             dtype=np.int64)
+
+        def segments_of(triples, add_reciprical):
+            return [(triples, False), (triples, True)] if add_reciprical else [(triples, False)]
+
+        self.train_data = TripleView(self, segments_of(train, reverse))
+        self.valid_data = TripleView(self, segments_of(valid, reverse))
+        self.test_data = TripleView(self, segments_of(test, test_reverse))
+        self.data = TripleView(self, self.train_data.segments + self.valid_data.segments + self.test_data.segments)
+
+    @staticmethod
+    def read_triples(data_dir, data_type):
+        """ Read a split into an (N,3) array of strings."""
+        try:
+            df = pd.read_csv("%s%s.txt" % (data_dir, data_type), sep=r'\s+', header=None, dtype=str,
+                             quoting=csv.QUOTE_NONE, na_filter=False, usecols=[0, 1, 2])
+        except FileNotFoundError:
+            raise FileNotFoundError(f'Please be sure that file located in {data_dir}')
+        return df.values
+
     @staticmethod
     def load_data(data_dir, data_type, add_reciprical=True):
         try:
@@ -49,3 +251,158 @@ class Data:
     def get_entities(data):
         entities = sorted(list(set([d[0] for d in data] + [d[2] for d in data])))
         return entities
+
+
+def _fingerprint(data_dir):
+    fingerprint = []
+    for data_type in SPLITS:
+        stat = os.stat("%s%s.txt" % (data_dir, data_type))
+        fingerprint.append([stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def _content_hash(data_dir):
+    sha = hashlib.sha256()
+    for data_type in SPLITS:
+        with open("%s%s.txt" % (data_dir, data_type), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+    return sha.hexdigest()
+
+
+class TripleView:
+    """
+    Read-only sequence of [head, relation, tail] triples of a columnar Data.
+
+    A view consists of segments, i.e., (triples, reciprocal) pairs where triples is an (N,3) int32 array over
+    base relations. A reciprocal segment yields (t, r_reverse, h) for each (h, r, t) without storing it.
+    """
+
+    def __init__(self, dataset, segments):
+        self.dataset = dataset
+        self.segments = segments
+        self.offsets = np.cumsum([0] + [len(triples) for triples, _ in segments])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('TripleView index out of range')
+        s = int(np.searchsorted(self.offsets, i, side='right')) - 1
+        h, r, t = self.segment_idxs(s, i - self.offsets[s], i - self.offsets[s] + 1)[0]
+        return [self.dataset.entities[h], self.dataset.relations[r], self.dataset.entities[t]]
+
+    def __iter__(self):
+        for batch in self.iter_idxs():
+            for h, r, t in batch:
+                yield [self.dataset.entities[h], self.dataset.relations[r], self.dataset.entities[t]]
+
+    def segment_idxs(self, s, start, stop):
+        """ Indexes of the triples [start,stop) of the s-th segment as an (n,3) int64 array."""
+        triples, reciprocal = self.segments[s]
+        block = triples[start:stop]
+        idxs = np.empty((len(block), 3), dtype=np.int64)
+        if reciprocal:
+            idxs[:, 0] = block[:, 2]
+            idxs[:, 1] = self.dataset.reverse_relation_map[block[:, 1]]
+            idxs[:, 2] = block[:, 0]
+        else:
+            idxs[:, 0] = block[:, 0]
+            idxs[:, 1] = self.dataset.forward_relation_map[block[:, 1]]
+            idxs[:, 2] = block[:, 2]
+        return idxs
+
+    def iter_idxs(self, batch_size=1_000_000):
+        """ Yield indexes of triples in chunks of at most batch_size rows."""
+        for s, (triples, _) in enumerate(self.segments):
+            for start in range(0, len(triples), batch_size):
+                yield self.segment_idxs(s, start, start + batch_size)
+
+    def to_idxs(self):
+        """ Materialize indexes of all triples as an (N,3) int64 array."""
+        chunks = list(self.iter_idxs())
+        return np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.int64)
+
+
+class FilterIndex:
+    """
+    Compressed sparse row index mapping pairs (first, second), e.g. (head, relation), to sorted unique values,
+    e.g. tails. A pair is stored as the int64 code first * num_second + second:
+    keys holds the sorted codes and values[offsets[i]:offsets[i+1]] holds the values of keys[i].
+    """
+
+    def __init__(self, first, second, values, num_second, num_values):
+        self.num_second = num_second
+        self.num_values = num_values
+        codes = np.asarray(first, dtype=np.int64) * num_second + np.asarray(second, dtype=np.int64)
+        values = np.asarray(values, dtype=np.int64)
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+        # Drop duplicate triples.
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (values[1:] != values[:-1])
+        codes, values = codes[keep], values[keep]
+        self.keys, starts = np.unique(codes, return_index=True)
+        self.offsets = np.append(starts, len(codes)).astype(np.int64)
+        self.values = values.astype(np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def pairs(self):
+        """ Decode keys into (first, second) arrays."""
+        return self.keys // self.num_second, self.keys % self.num_second
+
+    def lookup(self, first, second):
+        """ Values of a single pair."""
+        start, stop = self.locate(np.array([first]), np.array([second]))
+        return self.values[start[0]:stop[0]].astype(np.int64)
+
+    def locate(self, first, second):
+        """ Vectorized search: values of the i.th pair are values[start[i]:stop[i]], empty if the pair is unknown."""
+        codes = _to_numpy(first) * self.num_second + _to_numpy(second)
+        if len(self.keys) == 0:
+            return np.zeros(len(codes), dtype=np.int64), np.zeros(len(codes), dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.keys, codes), len(self.keys) - 1)
+        found = self.keys[pos] == codes
+        start = self.offsets[pos]
+        stop = np.where(found, self.offsets[pos + 1], start)
+        return start, stop
+
+    def coo(self, first, second):
+        """ (rows, cols, position within row) of all values of a batch of pairs."""
+        start, stop = self.locate(first, second)
+        lengths = stop - start
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        cols = self.values[np.repeat(start, lengths) + within].astype(np.int64)
+        return rows, cols, within
+
+    def padded(self, first, second, pad=-1, device=None):
+        """
+        Values of a batch of pairs as a (batch size, max number of values) LongTensor.
+        pad is a scalar or a per row array, e.g. the indexes of the true tails so that padding scatters into them.
+        """
+        rows, cols, within = self.coo(first, second)
+        pad = _to_numpy(pad)
+        width = int(within.max()) + 1 if len(within) else 1
+        padded = np.empty((len(_to_numpy(first)), width), dtype=np.int64)
+        padded[:] = pad.reshape(-1, 1) if pad.ndim else pad
+        padded[rows, within] = cols
+        return torch.from_numpy(padded).to(device)
+
+    def mask(self, first, second, device=None):
+        """ (batch size, num_values) BoolTensor, True at known values, i.e., ready for predictions[mask] = 0."""
+        rows, cols, _ = self.coo(first, second)
+        mask = torch.zeros(len(_to_numpy(first)), self.num_values, dtype=torch.bool, device=device)
+        mask[torch.from_numpy(rows).to(device), torch.from_numpy(cols).to(device)] = True
+        return mask
+
+
+def _to_numpy(x):
+    if isinstance(x, torch.Tensor):
+        return x.cpu().numpy()
+    return np.asarray(x)
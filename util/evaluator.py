@@ -0,0 +1,134 @@
+import numpy as np
+import torch
+from util.helper_funcs import filtered_ranks
+from util.metrics import RankingMetrics, save_ranks
+from util.ranking import BlockRanking
+from models.ensemble import Ensemble
+
+
+class Evaluator:
+    """
+    Filtered link prediction evaluation shared by Experiment and Reproduce.
+
+    Given (h,r,t), all entities are scored as tails of (h,r,?), scores of known tails other than t are filtered
+    and the rank of t is streamed into RankingMetrics.
+    block_size: if given, entities are scored in blocks of block_size (see util.ranking.BlockRanking), i.e.,
+    memory is (batch_size, block_size) per model instead of (batch_size, |Entities|). Relations of models that are
+    not bilinear are scored in blocks of block_size, see BaseKGE.forward_relation_logits.
+    """
+
+    def __init__(self, dataset, batch_size, hits_at=(1, 3, 10), cuda=None, block_size=None):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.hits_at = hits_at
+        self.cuda = torch.cuda.is_available() if cuda is None else cuda
+        self.block_size = block_size
+
+    def rank_blocks(self, models, ensembles, weights, e1_idx, r_idx, e2_idx, filter_idx):
+        """ BlockRanking per ensemble of models on a test batch, each model scores each block once."""
+        members = sorted(set(i for ensemble in ensembles for i in ensemble))
+        targets = {j: models[j].forward_triples(e1_idx=e1_idx, rel_idx=r_idx, e2_idx=e2_idx) for j in members}
+        rankings = [BlockRanking(Ensemble.average([targets[j] for j in ensemble], ensemble_weights), filter_idx)
+                    for ensemble, ensemble_weights in zip(ensembles, weights)]
+        for blocks in zip(*[models[j].forward_head_batch_blocks(e1_idx=e1_idx, rel_idx=r_idx,
+                                                                block_size=self.block_size) for j in members]):
+            start, predictions = blocks[0][0], {j: scores for j, (_, scores) in zip(members, blocks)}
+            for ensemble, ensemble_weights, ranking in zip(ensembles, weights, rankings):
+                ranking.update(start, Ensemble.average([predictions[j] for j in ensemble], ensemble_weights))
+        return rankings
+
+    def evaluate(self, model, data, rank_path=None):
+        """
+        Evaluate model on data, a split of self.dataset. Return RankingMetrics.
+        If rank_path is given, per-triple ranks and scores are stored there (see util.metrics.save_ranks).
+        """
+        device = 'cuda' if self.cuda else 'cpu'
+        metrics = RankingMetrics(len(self.dataset.relations), self.hits_at)
+        test_data_idxs = self.dataset.get_data_idxs(data)
+        filter_index = self.dataset.get_filter_index()
+        if rank_path:
+            all_ranks = np.empty(len(test_data_idxs), dtype=np.int32)
+            all_scores = np.empty(len(test_data_idxs), dtype=np.float32)
+            all_ties = np.empty(len(test_data_idxs), dtype=np.int32)
+        with torch.no_grad():
+            for i in range(0, len(test_data_idxs), self.batch_size):
+                data_batch = test_data_idxs[i:i + self.batch_size]
+                e1_idx = torch.tensor(data_batch[:, 0], device=device)
+                r_idx = torch.tensor(data_batch[:, 1], device=device)
+                e2_idx = torch.tensor(data_batch[:, 2], device=device)
+                # Filtered setting: scores of all known tails except the target are ignored.
+                filter_idx = filter_index.padded(data_batch[:, 0], data_batch[:, 1], pad=data_batch[:, 2],
+                                                 device=device)
+                if self.block_size:
+                    ranking, = self.rank_blocks([model], [(0,)], [None], e1_idx, r_idx, e2_idx, filter_idx)
+                    ranks, scores, ties = ranking.ranks, ranking.target_scores, ranking.ties
+                else:
+                    predictions = model.forward_head_batch(e1_idx=e1_idx, rel_idx=r_idx)
+                    scores = predictions.gather(1, e2_idx.view(-1, 1))
+                    ranks = filtered_ranks(predictions, e2_idx, filter_idx)
+                    ties = (predictions == scores).sum(1) if rank_path else None
+                metrics.update(ranks.cpu().numpy(), data_batch[:, 1])
+                if rank_path:
+                    all_ranks[i:i + len(data_batch)] = ranks.cpu().numpy()
+                    all_scores[i:i + len(data_batch)] = scores.view(-1).cpu().numpy()
+                    all_ties[i:i + len(data_batch)] = ties.cpu().numpy()
+        if rank_path:
+            save_ranks(rank_path, triples=test_data_idxs, ranks=all_ranks, scores=all_scores, ties=all_ties,
+                       relations=self.dataset.relations, entities=self.dataset.entities)
+        return metrics
+
+    def evaluate_relations(self, model, data):
+        """
+        Relation prediction: given (h,r,t), all relations are scored as relations of (h,?,t), scores of known
+        relations of (h,t) other than r are filtered. Return RankingMetrics of the ranks of r.
+        """
+        device = 'cuda' if self.cuda else 'cpu'
+        metrics = RankingMetrics(len(self.dataset.relations), self.hits_at)
+        test_data_idxs = self.dataset.get_data_idxs(data)
+        filter_index = self.dataset.get_filter_index((0, 2))
+        with torch.no_grad():
+            for i in range(0, len(test_data_idxs), self.batch_size):
+                data_batch = test_data_idxs[i:i + self.batch_size]
+                e1_idx = torch.tensor(data_batch[:, 0], device=device)
+                r_idx = torch.tensor(data_batch[:, 1], device=device)
+                e2_idx = torch.tensor(data_batch[:, 2], device=device)
+                predictions = model.forward_relation_batch(e1_idx=e1_idx, e2_idx=e2_idx, block_size=self.block_size)
+                ranks = filtered_ranks(predictions, r_idx,
+                                       filter_index.padded(data_batch[:, 0], data_batch[:, 2], pad=data_batch[:, 1],
+                                                           device=device))
+                metrics.update(ranks.cpu().numpy(), data_batch[:, 1])
+        return metrics
+
+    def evaluate_ensembles(self, models, ensembles, data, weights=None):
+        """
+        Evaluate several ensembles of models on data in a single pass, e.g., all pairs and triples of models.
+        ensembles: tuples of indexes of models. weights: optional weights of members per ensemble.
+        Each model scores a test batch once and only the score matrices of the current batch (or block) are kept.
+        Return a list of RankingMetrics, one per ensemble.
+        """
+        device = 'cuda' if self.cuda else 'cpu'
+        weights = [None] * len(ensembles) if weights is None else weights
+        metrics = [RankingMetrics(len(self.dataset.relations), self.hits_at) for _ in ensembles]
+        members = sorted(set(i for ensemble in ensembles for i in ensemble))
+        test_data_idxs = self.dataset.get_data_idxs(data)
+        filter_index = self.dataset.get_filter_index()
+        with torch.no_grad():
+            for i in range(0, len(test_data_idxs), self.batch_size):
+                data_batch = test_data_idxs[i:i + self.batch_size]
+                e1_idx = torch.tensor(data_batch[:, 0], device=device)
+                r_idx = torch.tensor(data_batch[:, 1], device=device)
+                e2_idx = torch.tensor(data_batch[:, 2], device=device)
+                filter_idx = filter_index.padded(data_batch[:, 0], data_batch[:, 1], pad=data_batch[:, 2],
+                                                 device=device)
+                if self.block_size:
+                    for ranking, ensemble_metrics in zip(
+                            self.rank_blocks(models, ensembles, weights, e1_idx, r_idx, e2_idx, filter_idx), metrics):
+                        ensemble_metrics.update(ranking.ranks.cpu().numpy(), data_batch[:, 1])
+                    continue
+                predictions = {j: models[j].forward_head_batch(e1_idx=e1_idx, rel_idx=r_idx) for j in members}
+                for ensemble, ensemble_weights, ensemble_metrics in zip(ensembles, weights, metrics):
+                    # Ensemble.average returns a new tensor, hence member scores are not modified by ranking.
+                    ranks = filtered_ranks(Ensemble.average([predictions[j] for j in ensemble], ensemble_weights),
+                                           e2_idx, filter_idx)
+                    ensemble_metrics.update(ranks.cpu().numpy(), data_batch[:, 1])
+        return metrics
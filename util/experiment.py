@@ -1,10 +1,11 @@
 import json
 from util.helper_funcs import *
-from util.helper_classes import HeadAndRelationBatchLoader
+from util.helper_classes import HeadAndRelationCSRLoader, NegativeSampler
+from util.evaluator import Evaluator
 from models.quat_models import *
 from models.octonian_models import *
+from models.base_model import sparse_bce_with_logits
 from collections import defaultdict
-from torch.utils.data import DataLoader
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -19,11 +20,13 @@ class Experiment:
     Experiment class for training and evaluation
     """
 
-    def __init__(self, *, dataset, model, parameters, ith_logger, store_emb_dataframe=False):
+    def __init__(self, *, dataset, model, parameters, ith_logger, store_emb_dataframe=False, store_ranks=False):
 
         self.dataset = dataset
         self.model = model
         self.store_emb_dataframe = store_emb_dataframe
+        # Store per-triple ranks of the test data in ranks.npz, see compute_metrics_from_ranks.py.
+        self.store_ranks = store_ranks
 
         self.embedding_dim = parameters['embedding_dim']
         self.num_of_epochs = parameters['num_of_epochs']
@@ -31,6 +34,10 @@ class Experiment:
         self.batch_size = parameters['batch_size']
         self.label_smoothing = parameters['label_smoothing']
         self.num_of_workers = parameters['num_workers']
+        # Sampled negatives instead of scoring all entities if num_negatives > 0.
+        self.num_of_negatives = parameters.get('num_negatives', 0)
+        self.negative_sampling = parameters.get('negative_sampling', 'uniform')  # or 'frequency'
+        self.shared_negatives = parameters.get('shared_negatives', True)
         self.optimizer = None
         self.entity_idxs, self.relation_idxs, self.scheduler = None, None, None
 
@@ -48,9 +55,7 @@ class Experiment:
             self.kwargs['norm_flag'] = False
 
     def get_data_idxs(self, data):
-        data_idxs = [(self.entity_idxs[data[i][0]], self.relation_idxs[data[i][1]], self.entity_idxs[data[i][2]]) for i
-                     in range(len(data))]
-        return data_idxs
+        return self.dataset.get_data_idxs(data)
 
     @staticmethod
     def get_er_vocab(data):
@@ -68,56 +73,14 @@ class Experiment:
             re_vocab[(triple[1], triple[2])].append(triple[0])
         return re_vocab
 
-    def get_batch_1_to_N(self, er_vocab, er_vocab_pairs, idx):
-        batch = er_vocab_pairs[idx:idx + self.batch_size]
-        targets = np.ones((len(batch), len(self.dataset.entities))) * self.negative_label
-        for idx, pair in enumerate(batch):
-            targets[idx, er_vocab[pair]] = self.positive_label
-        return np.array(batch), torch.FloatTensor(targets)
-
-    def evaluate_one_to_n(self, model, data, log_info='Evaluate one to N.'):
+    def evaluate_one_to_n(self, model, data, log_info='Evaluate one to N.', rank_path=None):
         """
          Evaluate model
         """
         self.logger.info(log_info)
-        hits = []
-        ranks = []
-        for i in range(10):
-            hits.append([])
-        test_data_idxs = self.get_data_idxs(data)
-        er_vocab = self.get_er_vocab(self.get_data_idxs(self.dataset.data))
-
-        for i in range(0, len(test_data_idxs), self.batch_size):
-            data_batch, _ = self.get_batch_1_to_N(er_vocab, test_data_idxs, i)
-            e1_idx = torch.tensor(data_batch[:, 0])
-            r_idx = torch.tensor(data_batch[:, 1])
-            e2_idx = torch.tensor(data_batch[:, 2])
-            if self.cuda:
-                e1_idx = e1_idx.cuda()
-                r_idx = r_idx.cuda()
-                e2_idx = e2_idx.cuda()
-            predictions = model.forward_head_batch(e1_idx=e1_idx, rel_idx=r_idx)
-            for j in range(data_batch.shape[0]):
-                filt = er_vocab[(data_batch[j][0], data_batch[j][1])]
-                target_value = predictions[j, e2_idx[j]].item()
-                predictions[j, filt] = 0.0
-                predictions[j, e2_idx[j]] = target_value
-
-            sort_values, sort_idxs = torch.sort(predictions, dim=1, descending=True)
-            sort_idxs = sort_idxs.cpu().numpy()
-            for j in range(data_batch.shape[0]):
-                rank = np.where(sort_idxs[j] == e2_idx[j].item())[0][0]
-                ranks.append(rank + 1)
-
-                for hits_level in range(10):
-                    if rank <= hits_level:
-                        hits[hits_level].append(1.0)
-
-        hit_1 = sum(hits[0]) / (float(len(data)))
-        hit_3 = sum(hits[2]) / (float(len(data)))
-        hit_10 = sum(hits[9]) / (float(len(data)))
-        mean_rank = np.mean(ranks)
-        mean_reciprocal_rank = np.mean(1. / np.array(ranks))
+        metrics = Evaluator(self.dataset, self.batch_size, cuda=self.cuda).evaluate(model, data, rank_path).results()
+        hit_1, hit_3, hit_10 = metrics['H@1'], metrics['H@3'], metrics['H@10']
+        mean_rank, mean_reciprocal_rank = metrics['MR'], metrics['MRR']
 
         self.logger.info(f'Hits @10: {hit_10}')
         self.logger.info(f'Hits @3: {hit_3}')
@@ -135,8 +98,10 @@ class Experiment:
         trained model
         """
         if self.dataset.test_data:
+            model.freeze_for_inference()
             results = self.evaluate_one_to_n(model, self.dataset.test_data,
-                                             'Standard Link Prediction evaluation on Testing Data')
+                                             'Standard Link Prediction evaluation on Testing Data',
+                                             rank_path=self.storage_path + '/ranks.npz' if self.store_ranks else None)
             with open(self.storage_path + '/results.json', 'w') as file_descriptor:
                 num_param = sum([p.numel() for p in model.parameters()])
                 results['Number_param'] = num_param
@@ -156,7 +121,10 @@ class Experiment:
         with open(self.storage_path + '/settings.json', 'w') as file_descriptor:
             json.dump(self.kwargs, file_descriptor)
 
-        model = self.k_vs_all_training_schema(model)
+        if self.num_of_negatives:
+            model = self.negative_sampling_training_schema(model)
+        else:
+            model = self.k_vs_all_training_schema(model)
 
         # Save the trained model.
         torch.save(model.state_dict(), self.storage_path + '/model.pt')
@@ -213,9 +181,9 @@ class Experiment:
         train_data_idxs = self.get_data_idxs(self.dataset.train_data)
         losses = []
 
-        head_to_relation_batch = DataLoader(
-            HeadAndRelationBatchLoader(er_vocab=self.get_er_vocab(train_data_idxs), num_e=len(self.dataset.entities)),
-            batch_size=self.batch_size, num_workers=self.num_of_workers, shuffle=True)
+        head_to_relation = HeadAndRelationCSRLoader(train_data_idxs, num_e=len(self.dataset.entities),
+                                                    num_r=len(self.dataset.relations))
+        head_to_relation_batch = head_to_relation.loader(self.batch_size, num_workers=self.num_of_workers)
 
         # To indicate that model is not trained if for if self.num_of_epochs=0
         loss_of_epoch, it = -1, -1
@@ -225,17 +193,68 @@ class Experiment:
             # given a triple (e_i,r_k,e_j), we generate two sets of corrupted triples
             # 1) (e_i,r_k,x) where x \in Entities AND (e_i,r_k,x) \not \in KG
             for head_batch in head_to_relation_batch:  # mini batches
-                e1_idx, r_idx, targets = head_batch
+                e1_idx, r_idx, rows, cols = head_batch
                 if self.cuda:
-                    targets = targets.cuda()
                     r_idx = r_idx.cuda()
                     e1_idx = e1_idx.cuda()
+                    rows = rows.cuda()
+                    cols = cols.cuda()
+
+                self.optimizer.zero_grad()
+                # Binary cross entropy with logits, targets and their label smoothing are not materialized.
+                loss = model.forward_head_and_sparse_loss(e1_idx, r_idx, rows, cols, self.label_smoothing)
+                loss_of_epoch += loss.item()
+                loss.backward()
+                self.optimizer.step()
+            losses.append(loss_of_epoch)
+        self.logger.info('Loss at {0}.th epoch:{1}'.format(it, loss_of_epoch))
+        np.savetxt(fname=self.storage_path + "/loss_per_epoch.csv", X=np.array(losses), delimiter=",")
+        model.eval()
+        return model
 
-                if self.label_smoothing:
-                    targets = ((1.0 - self.label_smoothing) * targets) + (1.0 / targets.size(1))
+    def negative_sampling_training_schema(self, model):
+        """
+        Score true tails and self.num_of_negatives sampled entities instead of all entities.
+        shared_negatives=True: a batch of (h,r) is scored against the union of its true tails and sampled entities,
+        i.e., true tails of other (h,r) are negatives as well.
+        shared_negatives=False: each (h,r,t) is scored against t and its own sampled entities; samples equal to t
+        are not part of the loss.
+        Label smoothing is that of k-vs-all training, i.e., w.r.t. |Entities|.
+        """
+        self.logger.info('negative_sampling_training_schema starts')
+
+        train_data_idxs = self.get_data_idxs(self.dataset.train_data)
+        losses = []
+
+        head_to_relation = HeadAndRelationCSRLoader(train_data_idxs, num_e=len(self.dataset.entities),
+                                                    num_r=len(self.dataset.relations))
+        head_to_relation_batch = head_to_relation.loader(self.batch_size, num_workers=self.num_of_workers)
+        sampler = NegativeSampler(len(self.dataset.entities), self.negative_sampling,
+                                  frequencies=np.bincount(train_data_idxs[:, 2], minlength=len(self.dataset.entities)))
+        device = 'cuda' if self.cuda else 'cpu'
+
+        loss_of_epoch, it = -1, -1
+
+        for it in range(1, self.num_of_epochs + 1):
+            loss_of_epoch = 0.0
+            for e1_idx, r_idx, rows, cols in head_to_relation_batch:
+                e1_idx, r_idx, rows, cols = e1_idx.to(device), r_idx.to(device), rows.to(device), cols.to(device)
+                mask = None
+                if self.shared_negatives:
+                    candidates, positions = torch.unique(
+                        torch.cat([cols, sampler.sample(self.num_of_negatives, device=device)]), return_inverse=True)
+                    cols = positions[:len(cols)]
+                else:
+                    # One row per (h,r,t): t followed by sampled entities.
+                    e1_idx, r_idx = e1_idx[rows], r_idx[rows]
+                    candidates, mask = sampler.sample_per_triple(cols, self.num_of_negatives, device=device)
+                    rows = torch.arange(len(cols), device=device)
+                    cols = torch.zeros_like(rows)
 
                 self.optimizer.zero_grad()
-                loss = model.forward_head_and_loss(e1_idx, r_idx, targets)
+                loss = sparse_bce_with_logits(
+                    model.forward_candidate_logits(e1_idx=e1_idx, rel_idx=r_idx, candidates=candidates), rows, cols,
+                    self.label_smoothing, num_entities=len(self.dataset.entities), mask=mask)
                 loss_of_epoch += loss.item()
                 loss.backward()
                 self.optimizer.step()
@@ -243,4 +262,4 @@ class Experiment:
         self.logger.info('Loss at {0}.th epoch:{1}'.format(it, loss_of_epoch))
         np.savetxt(fname=self.storage_path + "/loss_per_epoch.csv", X=np.array(losses), delimiter=",")
         model.eval()
-        return model
\ No newline at end of file
+        return model
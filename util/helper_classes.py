@@ -1,10 +1,12 @@
 import json
-from util.data import Data
+from util.data import Data, FilterIndex
 from util.helper_funcs import *
+from util.evaluator import Evaluator
+from util.metrics import print_views
 from models.quat_models import *
 from models.octonian_models import *
 from collections import defaultdict
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, BatchSampler, RandomSampler, SequentialSampler
 import pandas as pd
 
 # CUDA for PyTorch
@@ -13,26 +15,94 @@ np.random.seed(seed)
 torch.manual_seed(seed)
 
 
-class HeadAndRelationBatchLoader(torch.utils.data.Dataset):
-    def __init__(self, er_vocab, num_e):
+class HeadAndRelationCSRLoader(torch.utils.data.Dataset):
+    """
+    (head, relation) pairs of triples with their tails in flat CSR arrays kept in shared memory.
+
+    Items are whole batches, i.e., indexed by a list of indexes from a BatchSampler, and targets are sparse:
+    rows and cols of the 1's in the (batch size, num_e) targets. Hence, no per sample tensors are allocated
+    and workers do not touch python objects of the parent process.
+    """
+
+    def __init__(self, data_idxs, num_e, num_r):
         self.num_e = num_e
-        head_rel_idx = torch.Tensor(list(er_vocab.keys())).long()
-        self.head_idx = head_rel_idx[:, 0]
-        self.rel_idx = head_rel_idx[:, 1]
-        self.tail_idx = list(er_vocab.values())
-        assert len(self.head_idx) == len(self.rel_idx) == len(self.tail_idx)
+        data_idxs = np.asarray(data_idxs, dtype=np.int64)
+        index = FilterIndex(data_idxs[:, 0], data_idxs[:, 1], data_idxs[:, 2], num_r, num_e)
+        # Pairs in the order of their first occurrence in data_idxs, i.e., the order of the keys of get_er_vocab.
+        _, first = np.unique(data_idxs[:, 0] * num_r + data_idxs[:, 1], return_index=True)
+        order = np.argsort(first, kind='stable')
+        head_idx, rel_idx = index.pairs()
+        self.head_idx = torch.from_numpy(head_idx[order]).share_memory_()
+        self.rel_idx = torch.from_numpy(rel_idx[order]).share_memory_()
+        self.start = torch.from_numpy(index.offsets[:-1][order]).share_memory_()
+        self.length = torch.from_numpy(np.diff(index.offsets)[order]).share_memory_()
+        self.tail_idx = torch.from_numpy(index.values.astype(np.int64)).share_memory_()
 
     def __len__(self):
-        return len(self.tail_idx)
+        return len(self.head_idx)
+
+    def __getitem__(self, idxs):
+        idxs = torch.as_tensor(idxs, dtype=torch.long)
+        length = self.length[idxs]
+        rows = torch.repeat_interleave(torch.arange(len(idxs)), length)
+        within = torch.arange(len(rows)) - torch.repeat_interleave(torch.cumsum(length, 0) - length, length)
+        cols = self.tail_idx[torch.repeat_interleave(self.start[idxs], length) + within]
+        return self.head_idx[idxs], self.rel_idx[idxs], rows, cols
+
+    def loader(self, batch_size, num_workers=0, shuffle=True):
+        """ DataLoader fetching whole batches."""
+        sampler = RandomSampler(self) if shuffle else SequentialSampler(self)
+        return DataLoader(self, sampler=BatchSampler(sampler, batch_size, drop_last=False), batch_size=None,
+                          num_workers=num_workers)
+
+
+class NegativeSampler:
+    """
+    Sample entities as negative tails, uniformly or proportional to their frequency, e.g., in training triples.
+    """
+
+    def __init__(self, num_e, distribution='uniform', frequencies=None):
+        self.num_e = num_e
+        self.distribution = distribution
+        if distribution == 'uniform':
+            self.cumulative = None
+        elif distribution == 'frequency':
+            assert frequencies is not None and len(frequencies) == num_e
+            self.cumulative = np.cumsum(np.asarray(frequencies, dtype=np.float64))
+            self.cumulative /= self.cumulative[-1]
+        else:
+            print(distribution, ' is not valid sampling distribution')
+            raise ValueError
+
+    def sample(self, size, device=None):
+        """ LongTensor of entity indexes of the given size."""
+        size = (size,) if isinstance(size, int) else tuple(size)
+        if self.cumulative is None:
+            return torch.randint(self.num_e, size, device=device)
+        # Inverse transform sampling, no limit on the number of entities.
+        samples = np.searchsorted(self.cumulative, np.random.random_sample(size), side='right')
+        return torch.from_numpy(np.minimum(samples, self.num_e - 1)).to(device)
 
-    def __getitem__(self, idx):
-        y_vec = torch.zeros(self.num_e)
-        y_vec[self.tail_idx[idx]] = 1  # given head and rel, set 1's for all tails.
-        return self.head_idx[idx], self.rel_idx[idx], y_vec
+    def sample_per_triple(self, tails, num_negatives, device=None):
+        """
+        (candidates, mask) of shape (number of tails, 1 + num_negatives): each tail followed by its sampled
+        entities. mask is False where a sample equals the tail of its row, i.e., such entries are not negatives.
+        """
+        tails = tails.view(-1, 1).to(device)
+        samples = self.sample((len(tails), num_negatives), device=device)
+        mask = torch.cat([torch.ones_like(tails, dtype=torch.bool), samples != tails], 1)
+        return torch.cat([tails, samples], 1), mask
 
 
 class Reproduce:
-    def __init__(self):
+    """
+    batch_size: number of test triples scored at once.
+    block_size: if given, entities are scored in blocks of block_size, i.e., memory is (batch_size, block_size)
+    per model instead of (batch_size, |Entities|). To reproduce results of ensembles on YAGO3-10 on non a performant
+    hardware, one may reduce block_size instead of batch_size.
+    """
+
+    def __init__(self, batch_size=32, block_size=None):
         self.dataset = None
         self.model = None
         self.file_path = None
@@ -43,7 +113,8 @@ class Reproduce:
 
         self.cuda = torch.cuda.is_available()
 
-        self.batch_size = None
+        self.batch_size = batch_size
+        self.block_size = block_size
         self.negative_label = 0
         self.positive_label = 1
 
@@ -62,102 +133,86 @@ class Reproduce:
         return head_tail_vocab
 
     def get_data_idxs(self, data):
-        data_idxs = [(self.entity_idxs[data[i][0]], self.relation_idxs[data[i][1]], self.entity_idxs[data[i][2]]) for i
-                     in range(len(data))]
-        return data_idxs
-
-    def get_batch_1_to_N(self, er_vocab, er_vocab_pairs, idx):
-        batch = er_vocab_pairs[idx:idx + self.batch_size]
-        targets = np.ones((len(batch), len(self.dataset.entities))) * self.negative_label
-        for idx, pair in enumerate(batch):
-            targets[idx, er_vocab[pair]] = self.positive_label
-        targets = torch.FloatTensor(targets)
-        if self.cuda:
-            targets = targets.cuda()
-        return np.array(batch), targets
-
-    def evaluate_link_prediction(self, model, data, per_rel_flag_=True, tail_pred_constraint=False):
-        hits = []
-        ranks = []
-
-        rank_per_relation = dict()
-        for i in range(10):
-            hits.append([])
-        test_data_idxs = self.get_data_idxs(data)
-        er_vocab = self.get_er_vocab(self.get_data_idxs(self.dataset.data))
-        for i in range(0, len(test_data_idxs), self.batch_size):
-            data_batch, _ = self.get_batch_1_to_N(er_vocab, test_data_idxs, i)
-
-            e1_idx = torch.tensor(data_batch[:, 0])
-            r_idx = torch.tensor(data_batch[:, 1])
-            e2_idx = torch.tensor(data_batch[:, 2])
-            if self.cuda:
-                e1_idx = e1_idx.cuda()
-                r_idx = r_idx.cuda()
-                e2_idx = e2_idx.cuda()
-            predictions = model.forward_head_batch(e1_idx=e1_idx, rel_idx=r_idx)
-
-            for j in range(data_batch.shape[0]):
-                filt = er_vocab[(data_batch[j][0], data_batch[j][1])]
-                target_value = predictions[j, e2_idx[j]].item()
-                predictions[j, filt] = 0.0
-                predictions[j, e2_idx[j]] = target_value
-            sort_values, sort_idxs = torch.sort(predictions, dim=1, descending=True)
-            sort_idxs = sort_idxs.cpu().numpy()
-
-            for j in range(data_batch.shape[0]):
-                rank = np.where(sort_idxs[j] == e2_idx[j].item())[0][0]
-                ranks.append(rank + 1)
-
-                rank_per_relation.setdefault(self.dataset.relations[r_idx[j]], []).append(rank + 1)
-
-                for hits_level in range(10):
-                    if rank <= hits_level:
-                        hits[hits_level].append(1.0)
-
-        print('Hits @10: {0}'.format(sum(hits[9]) / (float(len(data)))))
-        print('Hits @3: {0}'.format(sum(hits[2]) / (float(len(data)))))
-        print('Hits @1: {0}'.format(sum(hits[0]) / (float(len(data)))))
-        print('Mean rank: {0}'.format(np.mean(ranks)))
-        print('MRR: {0}'.format(np.mean(1. / np.array(ranks))))
+        return self.dataset.get_data_idxs(data)
+
+    def evaluator(self):
+        return Evaluator(self.dataset, self.batch_size, cuda=self.cuda, block_size=self.block_size)
+
+    def evaluate_link_prediction(self, model, data, per_rel_flag_=True, tail_pred_constraint=False, rank_path=None):
+        metrics = self.evaluator().evaluate(model, data, rank_path)
+        self.print_link_prediction(metrics, data, per_rel_flag_, tail_pred_constraint)
+
+    def print_link_prediction(self, metrics, data, per_rel_flag_=True, tail_pred_constraint=False):
+        results = metrics.results()
+        print('Hits @10: {0}'.format(results['H@10']))
+        print('Hits @3: {0}'.format(results['H@3']))
+        print('Hits @1: {0}'.format(results['H@1']))
+        print('Mean rank: {0}'.format(results['MR']))
+        print('MRR: {0}'.format(results['MRR']))
         print('###############################')
 
+        relation_idxs = {self.dataset.relations[i]: i for i in range(len(self.dataset.relations))}
+        # Relations in the order of their first occurrence in data.
+        test_relations = [self.dataset.relations[i] for i in pd.unique(self.get_data_idxs(data)[:, 1])]
         if per_rel_flag_ and (tail_pred_constraint is False):
-            for k, v in rank_per_relation.items():
+            for k in test_relations:
                 if '_reverse' in k:
                     continue
-                # Given (h,r,t)
-                reciprocal_tail_entity_rankings = 1. / np.array(v)  # ranks_t => RANKS of true tails
-                reciprocal_head_entity_rankings = 1. / np.array(
-                    rank_per_relation[k + '_reverse'])  # ranks_t => RANKS of true
-                assert len(reciprocal_head_entity_rankings) == len(reciprocal_tail_entity_rankings)
-                sum_reciprocal_ranks = np.sum(reciprocal_head_entity_rankings + reciprocal_tail_entity_rankings)
-                print('MRR:{0}: {1}'.format(k, sum_reciprocal_ranks / ((float(len(v))) * 2)))
+                # Given (h,r,t), ranks of true tails of (h,r,?) and of true heads, i.e., (t,r_reverse,?).
+                tail_idx, head_idx = relation_idxs[k], relation_idxs[k + '_reverse']
+                assert metrics.count[tail_idx] == metrics.count[head_idx]
+                print('MRR:{0}: {1}'.format(k, metrics.results([tail_idx, head_idx])['MRR']))
         elif per_rel_flag_ and tail_pred_constraint:
-            for k, v in rank_per_relation.items():
+            for k in test_relations:
                 if '_reverse' in k:
                     continue
-                # Given (h,r,t)
-                reciprocal_tail_entity_rankings = 1. / np.array(v)  # ranks_t => RANKS of true tails
-                sum_reciprocal_ranks = np.sum(reciprocal_tail_entity_rankings)
-                print('MRR:{0}: {1}'.format(k, sum_reciprocal_ranks / (float(len(v)))))
+                # Given (h,r,t), ranks of true tails.
+                print('MRR:{0}: {1}'.format(k, metrics.results([relation_idxs[k]])['MRR']))
         else:
             pass
 
-    def reproduce(self, model_path, data_path, model_name, per_rel_flag_=False, tail_pred_constraint=False):
+    def report_views(self, model, data, rank_path=None):
+        """
+        Score the reciprocal-augmented data once and print overall, tail entity ranking and per relation results,
+        i.e., the results of per_rel_flag_=False, tail_pred_constraint=True and per_rel_flag_=True in a single pass.
+        """
+        views = self.evaluator().evaluate(model, data, rank_path).views(self.dataset.relations)
+        print_views(views)
+        return views
+
+    def reproduce(self, model_path, data_path, model_name, per_rel_flag_=False, tail_pred_constraint=False,
+                  all_views=False, rank_path=None):
+        """
+        all_views=True: report overall, tail entity ranking and per relation results from a single evaluation.
+        rank_path: store per-triple ranks in a .npz file, see compute_metrics_from_ranks.py.
+        """
         with open(model_path + '/settings.json', 'r') as file_descriptor:
             self.kwargs = json.load(file_descriptor)
 
-        self.dataset = Data(data_dir=data_path, tail_pred_constraint=tail_pred_constraint)
+        self.dataset = self.load_dataset(data_path, tail_pred_constraint and not all_views)
         model = self.load_model(model_path=model_path, model_name=model_name)
         print('Evaluate:', self.model)
         print('Number of free parameters: ', sum([p.numel() for p in model.parameters()]))
 
         self.entity_idxs = {self.dataset.entities[i]: i for i in range(len(self.dataset.entities))}
         self.relation_idxs = {self.dataset.relations[i]: i for i in range(len(self.dataset.relations))}
-        self.batch_size = 32  # self.kwargs['batch_size']
         print('Link Prediction Results on Testing')
-        self.evaluate_link_prediction(model, self.dataset.test_data, per_rel_flag_, tail_pred_constraint)
+        if all_views:
+            return self.report_views(model, self.dataset.test_data, rank_path)
+        self.evaluate_link_prediction(model, self.dataset.test_data, per_rel_flag_, tail_pred_constraint, rank_path)
+
+    def reproduce_relation_prediction(self, model_path, data_path, model_name):
+        """ Filtered relation prediction, i.e., ranks of r among ALL relations of (h,?,t) for test triples (h,r,t)."""
+        self.dataset = self.load_dataset(data_path)
+        model = self.load_model(model_path=model_path, model_name=model_name)
+        print('Relation Prediction Results of {0} on Testing'.format(self.model))
+        metrics = self.evaluator().evaluate_relations(model, self.dataset.test_data)
+        self.print_link_prediction(metrics, self.dataset.test_data, per_rel_flag_=False)
+        return metrics
+
+    @staticmethod
+    def load_dataset(data_path, tail_pred_constraint=False):
+        return Data(data_dir=data_path, tail_pred_constraint=tail_pred_constraint, columnar=True)
 
     def load_model(self, model_path, model_name):
         self.model = model_name
@@ -188,15 +243,35 @@ class Reproduce:
         model.load_state_dict(m)
         for parameter in model.parameters():
             parameter.requires_grad = False
-        model.eval()
         if self.cuda:
             model.cuda()
-        return model
+        # Eval mode with BN folded into embeddings.
+        return model.freeze_for_inference()
 
-    def reproduce_ensemble(self, model, data_path, per_rel_flag_=False, tail_pred_constraint=False):
-        self.dataset = Data(data_dir=data_path, tail_pred_constraint=tail_pred_constraint)
-        self.batch_size = 32  # To reproduce results of ensembles on YAGO3-10 on non a performant hardware, one may need to reduce batch_size.
+    def reproduce_ensemble(self, model, data_path, per_rel_flag_=False, tail_pred_constraint=False, all_views=False,
+                           rank_path=None):
+        self.dataset = self.load_dataset(data_path, tail_pred_constraint and not all_views)
         self.entity_idxs = {self.dataset.entities[i]: i for i in range(len(self.dataset.entities))}
         self.relation_idxs = {self.dataset.relations[i]: i for i in range(len(self.dataset.relations))}
         print('Link Prediction Results of Ensemble of {0} on Testing'.format(model.name))
-        self.evaluate_link_prediction(model, self.dataset.test_data, per_rel_flag_)
+        if all_views:
+            return self.report_views(model, self.dataset.test_data, rank_path)
+        self.evaluate_link_prediction(model, self.dataset.test_data, per_rel_flag_, rank_path=rank_path)
+
+    def reproduce_ensembles(self, models, ensembles, data_path, weights=None, per_rel_flag_=False,
+                            tail_pred_constraint=False, all_views=False):
+        """
+        Evaluate ensembles of models, i.e., tuples of indexes of models, with optional weights per ensemble.
+        Unlike reproduce_ensemble, each model scores the test data once for all ensembles.
+        """
+        self.dataset = self.load_dataset(data_path, tail_pred_constraint and not all_views)
+        all_metrics = self.evaluator().evaluate_ensembles(
+            models, ensembles, self.dataset.test_data, weights)
+        for ensemble, metrics in zip(ensembles, all_metrics):
+            print('Link Prediction Results of Ensemble of {0} on Testing'.format(
+                '_'.join(models[i].name for i in ensemble)))
+            if all_views:
+                print_views(metrics.views(self.dataset.relations))
+            else:
+                self.print_link_prediction(metrics, self.dataset.test_data, per_rel_flag_)
+        return all_metrics
@@ -68,4 +68,17 @@ def performance_debugger(func_name):
 
         return debug
 
-    return function_name_decoratir
\ No newline at end of file
+    return function_name_decoratir
+
+
+def filtered_ranks(predictions, targets, filter_idx):
+    """
+    Filtered ranks of targets, i.e., 1 + number of non-filtered entities scored strictly higher than the target.
+    :param predictions: (batch size, |Entities|) scores. Modified in place.
+    :param targets: (batch size,) indexes of true entities.
+    :param filter_idx: (batch size, max number of known entities) indexes of known entities, padded with targets.
+    :return: (batch size,) LongTensor of ranks.
+    """
+    target_scores = predictions.gather(1, targets.view(-1, 1))
+    predictions.scatter_(1, filter_idx, -float('inf'))
+    return (predictions > target_scores).sum(1) + 1
@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class RankingMetrics:
+    """
+    Streaming accumulators of filtered link prediction ranks.
+
+    Only sums are stored, i.e., number of ranks, sum of ranks, sum of reciprocal ranks and hits@k counts per relation.
+    Hence, memory does not grow with the number of test triples.
+    """
+
+    def __init__(self, num_relations, hits_at=(1, 3, 10)):
+        self.num_relations = num_relations
+        self.hits_at = tuple(hits_at)
+        self.count = np.zeros(num_relations, dtype=np.int64)
+        self.sum_ranks = np.zeros(num_relations, dtype=np.float64)
+        self.sum_reciprocal_ranks = np.zeros(num_relations, dtype=np.float64)
+        self.hits = np.zeros((len(self.hits_at), num_relations), dtype=np.int64)
+
+    def update(self, ranks, relations):
+        """ Add (batch size,) ranks of test triples with (batch size,) relation indexes."""
+        ranks = np.asarray(ranks)
+        relations = np.asarray(relations)
+        self.count += np.bincount(relations, minlength=self.num_relations)
+        self.sum_ranks += np.bincount(relations, weights=ranks, minlength=self.num_relations)
+        self.sum_reciprocal_ranks += np.bincount(relations, weights=1. / ranks, minlength=self.num_relations)
+        for i, k in enumerate(self.hits_at):
+            self.hits[i] += np.bincount(relations[ranks <= k], minlength=self.num_relations)
+
+    def results(self, relations=None):
+        """
+        Hits@k, mean rank (MR) and mean reciprocal rank (MRR) over ranks of the given relation indexes.
+        relations=None selects all relations.
+        """
+        if relations is None:
+            relations = slice(None)
+        count = float(self.count[relations].sum())
+        results = {'H@{0}'.format(k): self.hits[i, relations].sum() / count for i, k in enumerate(self.hits_at)}
+        results['MR'] = self.sum_ranks[relations].sum() / count
+        results['MRR'] = self.sum_reciprocal_ranks[relations].sum() / count
+        return {k: float(v) for k, v in results.items()}
+
+    def group(self, groups, num_groups):
+        """ Aggregate per-relation sums into num_groups groups, i.e., group-by on groups[relation index]."""
+        grouped = RankingMetrics(num_groups, self.hits_at)
+        grouped.count = np.bincount(groups, weights=self.count, minlength=num_groups).astype(np.int64)
+        grouped.sum_ranks = np.bincount(groups, weights=self.sum_ranks, minlength=num_groups)
+        grouped.sum_reciprocal_ranks = np.bincount(groups, weights=self.sum_reciprocal_ranks, minlength=num_groups)
+        grouped.hits = np.stack([np.bincount(groups, weights=i, minlength=num_groups) for i in self.hits]).astype(
+            np.int64)
+        return grouped
+
+    def views(self, relations):
+        """
+        Metrics of a reciprocal-augmented test set, where relations are the names of relation indexes:
+        overall: ranks of all test triples, i.e., head and tail entity rankings.
+        tail: ranks of test triples without reciprocal relations, i.e., only tail entity rankings.
+        per_relation: head and tail entity rankings per relation r, i.e., ranks of r and r_reverse.
+        per_relation_tail: tail entity rankings per relation.
+        """
+        relation_idxs = {relations[i]: i for i in range(len(relations))}
+        reciprocal = np.array(['_reverse' in i for i in relations], dtype=bool)
+        # Map r_reverse to r.
+        base = np.array([relation_idxs.get(i[:-len('_reverse')], j) if '_reverse' in i else j
+                         for j, i in enumerate(relations)], dtype=np.int64)
+        grouped = self.group(base, len(relations))
+        tested = [i for i in range(len(relations)) if not reciprocal[i] and grouped.count[i] > 0]
+        return {'overall': self.results(),
+                'tail': self.results(np.flatnonzero(~reciprocal)),
+                'per_relation': {relations[i]: grouped.results([i]) for i in tested},
+                'per_relation_tail': {relations[i]: self.results([i]) for i in tested if self.count[i] > 0}}
+
+
+def print_views(views):
+    """ Print the output of RankingMetrics.views()."""
+    for name, results in [('Link prediction', views['overall']), ('Tail entity rankings', views['tail'])]:
+        print(name)
+        for k, v in results.items():
+            if k.startswith('H@'):
+                print('Hits @{0}: {1}'.format(k[2:], v))
+        print('Mean rank: {0}'.format(results['MR']))
+        print('MRR: {0}'.format(results['MRR']))
+        print('###############################')
+    print('MRR per relation (head and tail entity rankings | tail entity rankings)')
+    for k, results in views['per_relation'].items():
+        print('MRR:{0}: {1} | {2}'.format(k, results['MRR'], views['per_relation_tail'][k]['MRR']))
+    print('###############################')
+
+
+def save_ranks(path, *, triples, ranks, scores, ties, relations, entities=None):
+    """
+    Store per-triple evaluation results in a compressed .npz file:
+    h, r, t: (N,) int32 indexes of test triples, rank: (N,) int32 filtered ranks (ties ranked optimistically),
+    score: (N,) float32 scores of true entities, ties: (N,) int32 number of non-filtered entities with the same score,
+    relations (and entities): vocabularies to interpret indexes.
+    """
+    arrays = {'h': triples[:, 0].astype(np.int32), 'r': triples[:, 1].astype(np.int32),
+              't': triples[:, 2].astype(np.int32), 'rank': ranks.astype(np.int32),
+              'score': scores.astype(np.float32), 'ties': ties.astype(np.int32),
+              'relations': np.array(relations, dtype=str)}
+    if entities is not None:
+        arrays['entities'] = np.array(entities, dtype=str)
+    np.savez_compressed(path, **arrays)
+
+
+def load_ranks(path, tie_policy='optimistic', hits_at=(1, 3, 10)):
+    """
+    Recompute RankingMetrics from a file written by save_ranks without loading any model.
+    tie_policy: 'optimistic' (rank), 'pessimistic' (rank + ties) or 'realistic' (rank + ties / 2).
+    Return (metrics, relations).
+    """
+    with np.load(path) as file:
+        ranks = file['rank'].astype(np.float64)
+        if tie_policy == 'pessimistic':
+            ranks += file['ties']
+        elif tie_policy == 'realistic':
+            ranks += file['ties'] / 2.
+        elif tie_policy != 'optimistic':
+            raise ValueError('Unknown tie policy: {0}'.format(tie_policy))
+        relations = file['relations'].tolist()
+        metrics = RankingMetrics(len(relations), hits_at)
+        metrics.update(ranks, file['r'])
+    return metrics, relations
@@ -0,0 +1,201 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import torch
+from util.ranking import BlockRanking
+
+# Bytes per cache entry besides its arrays, i.e., key, array headers and the slot of the OrderedDict.
+ENTRY_OVERHEAD = 400
+
+
+def checkpoint_hash(model):
+    """ SHA-256 of the state dict of model (or Ensemble and its weights), i.e., equal for equal checkpoints."""
+    sha = hashlib.sha256()
+    for name, tensor in model.state_dict().items():
+        sha.update('{0}{1}'.format(name, tuple(tensor.shape)).encode('utf-8'))
+        sha.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    sha.update(repr(getattr(model, 'weights', None)).encode('utf-8'))
+    return sha.hexdigest()
+
+
+class TopKCache:
+    """
+    Least recently used top-k results of queries within a memory budget of max_bytes.
+    A result of k entities answers queries of at most k entities. Keys include the checkpoint hash of the model,
+    hence results of other checkpoints are never returned; invalidate(version) frees their memory.
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.values = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, k):
+        """ (scores, entities) rows of at least k entities of key, None on a miss."""
+        with self.lock:
+            value = self.values.get(key)
+            if value is None or len(value[0]) < k:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.values.move_to_end(key)
+            return value[0][:k], value[1][:k]
+
+    def put(self, key, scores, entities):
+        size = scores.nbytes + entities.nbytes + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.values:
+                self.bytes -= self.size(self.values.pop(key))
+            # Copies, i.e., rows do not keep arrays of batches alive.
+            self.values[key] = (scores.copy(), entities.copy())
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self.bytes -= self.size(self.values.popitem(last=False)[1])
+
+    @staticmethod
+    def size(value):
+        return value[0].nbytes + value[1].nbytes + ENTRY_OVERHEAD
+
+    def invalidate(self, version=None):
+        """ Drop results of the checkpoint hash version (ALL results if None)."""
+        with self.lock:
+            for key in [key for key in self.values if version is None or key[0] == version]:
+                self.bytes -= self.size(self.values.pop(key))
+
+    def hit_rate(self):
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def stats(self):
+        return {'entries': len(self.values), 'bytes': self.bytes, 'max_bytes': self.max_bytes, 'hits': self.hits,
+                'misses': self.misses, 'hit_rate': self.hit_rate()}
+
+
+class LinkPredictor:
+    """
+    Top-k link prediction queries of a trained model (or Ensemble) on a dataset (util.data.Data).
+
+    predict_tails returns the k best tails of (h,r,?), predict_heads the k best heads of (?,r,t) via reciprocal
+    relations, i.e., the k best tails of (t,r_reverse,?).
+    filtered=True: entities of known triples (train, valid and test) are not returned.
+    Duplicate queries of a call are scored once, distinct queries are scored in batches of batch_size.
+    block_size: if given, entities are scored in blocks of block_size, see util.ranking.BlockRanking.
+    index: if given, an util.ann.IVFIndex over model.entity_embeddings() of a single model, i.e., approximate top-k
+    of nprobe lists instead of scoring all entities.
+    cache: if given, a TopKCache of results per (checkpoint hash, filtered, h, r) queried before scoring.
+    The checkpoint hash is recomputed once parameters or buffers of the model change.
+    """
+
+    def __init__(self, model, dataset, batch_size=1024, block_size=None, cuda=None, index=None, nprobe=8,
+                 cache=None):
+        self.model = model
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.index = index
+        self.nprobe = nprobe
+        self.cache = cache
+        self._version = None
+        self.cuda = torch.cuda.is_available() if cuda is None else cuda
+        self.entity_idxs = pd.Index(dataset.entities)
+        self.relation_idxs = {dataset.relations[i]: i for i in range(len(dataset.relations))}
+
+    def encode_entities(self, entities):
+        codes = self.entity_idxs.get_indexer(list(entities))
+        if (codes < 0).any():
+            raise KeyError(list(entities)[np.argmin(codes)])
+        return codes.astype(np.int64)
+
+    def encode_relations(self, relations):
+        return np.array([self.relation_idxs[r] for r in relations], dtype=np.int64)
+
+    def predict_tails(self, heads, relations, k=10, filtered=True):
+        """ Per (h,r,?), a list of at most k (entity, score) pairs in descending order of scores."""
+        return self.decode(*self.topk(self.encode_entities(heads), self.encode_relations(relations), k, filtered))
+
+    def predict_heads(self, tails, relations, k=10, filtered=True):
+        """ Per (?,r,t), a list of at most k (entity, score) pairs in descending order of scores."""
+        return self.predict_tails(tails, [r + '_reverse' for r in relations], k, filtered)
+
+    def decode(self, scores, entities):
+        """ Rows of topk as lists of (entity, score) pairs, filtered entities (-inf) are dropped."""
+        return [[(self.dataset.entities[e], float(s)) for e, s in zip(row_entities, row_scores) if s > -np.inf]
+                for row_entities, row_scores in zip(entities, scores)]
+
+    def version(self):
+        """ Checkpoint hash of the model, recomputed if parameters or buffers changed in place or were replaced."""
+        state = tuple((t.data_ptr(), t._version) for t in self.model.state_dict(keep_vars=True).values())
+        if self._version is None or self._version[0] != state:
+            previous = self._version
+            self._version = (state, checkpoint_hash(self.model))
+            if previous is not None and previous[1] != self._version[1] and self.cache is not None:
+                self.cache.invalidate(previous[1])
+        return self._version[1]
+
+    def topk(self, e1_idx, r_idx, k=10, filtered=True):
+        """
+        (scores, indexes of entities) arrays of shape (number of queries, k) of the k best tails of (e1_idx,r_idx,?).
+        Rows with less than k non-filtered entities end with -inf scores.
+        """
+        if k < 1:
+            raise ValueError('k must be at least 1, got {0}'.format(k))
+        num_entities, num_relations = len(self.dataset.entities), len(self.dataset.relations)
+        k = min(k, num_entities)
+        queries, inverse = np.unique(np.asarray(e1_idx, dtype=np.int64) * num_relations + np.asarray(r_idx),
+                                     return_inverse=True)
+        if self.cache is None:
+            scores, entities = self.score(queries, k, filtered)
+            return scores[inverse], entities[inverse]
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        entities = np.empty((len(queries), k), dtype=np.int64)
+        # Approximate results of an index are cached apart from exact ones.
+        version, nprobe = self.version(), self.nprobe if self.index is not None else None
+        keys = [(version, filtered, nprobe, int(query)) for query in queries]
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key, k)
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i], entities[i] = cached
+        if missing:
+            scores[missing], entities[missing] = self.score(queries[missing], k, filtered)
+            for i in missing:
+                self.cache.put(keys[i], scores[i], entities[i])
+        return scores[inverse], entities[inverse]
+
+    def score(self, queries, k, filtered):
+        """ topk of distinct queries given as codes h * |Relations| + r."""
+        device = 'cuda' if self.cuda else 'cpu'
+        num_entities, num_relations = len(self.dataset.entities), len(self.dataset.relations)
+        filter_index = self.dataset.get_filter_index() if filtered else None
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        entities = np.empty((len(queries), k), dtype=np.int64)
+        with torch.no_grad():
+            for i in range(0, len(queries), self.batch_size):
+                batch = queries[i:i + self.batch_size]
+                heads, relations = batch // num_relations, batch % num_relations
+                if self.index is not None:
+                    # Sigmoid preserves the order of logits, skipped entities keep -inf.
+                    logits, top = self.index.search(self.model.forward_head_query(
+                        e1_idx=torch.tensor(heads, device=device), rel_idx=torch.tensor(relations, device=device)),
+                        k, self.nprobe, None if filter_index is None else filter_index.coo(heads, relations)[:2])
+                    scores[i:i + len(heads)] = torch.sigmoid(logits).masked_fill(
+                        logits == -float('inf'), -float('inf')).cpu().numpy()
+                    entities[i:i + len(heads)] = top.cpu().numpy()
+                    continue
+                ranking = BlockRanking(filter_idx=None if filter_index is None else
+                                       filter_index.padded(heads, relations, device=device), k=k)
+                for start, predictions in self.model.forward_head_batch_blocks(
+                        e1_idx=torch.tensor(heads, device=device), rel_idx=torch.tensor(relations, device=device),
+                        block_size=self.block_size or num_entities):
+                    ranking.update(start, predictions)
+                scores[i:i + len(heads)] = ranking.top_scores.cpu().numpy()
+                entities[i:i + len(heads)] = ranking.top_entities.cpu().numpy()
+        return scores, entities
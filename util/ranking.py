@@ -0,0 +1,41 @@
+import torch
+
+
+class BlockRanking:
+    """
+    Filtered ranks and top-k entities of a batch of queries from scores streamed over blocks of entities, e.g.,
+    BaseKGE.forward_head_batch_blocks, i.e., memory is (batch size, block size) instead of (batch size, |Entities|).
+
+    target_scores: (batch size,) or (batch size, 1) scores of true entities. As in filtered_ranks, ranks are
+    1 + the number of non-filtered entities scored strictly higher than the target, ties the number scored equally.
+    filter_idx: (batch size, max number of known entities) indexes of entities to ignore, e.g., FilterIndex.padded.
+    k: number of best entities to keep per query. Rows with less than k non-filtered entities end with -inf scores.
+    """
+
+    def __init__(self, target_scores=None, filter_idx=None, k=0):
+        self.target_scores = None if target_scores is None else target_scores.view(-1, 1)
+        self.filter_idx = filter_idx
+        self.k = k
+        self.ranks = None
+        self.ties = None
+        self.top_scores = None
+        self.top_entities = None
+
+    def update(self, start, scores):
+        """ Add (batch size, block size) scores of entities start, start + 1, ... Scores are modified in place."""
+        if self.filter_idx is not None:
+            rows, cols = ((self.filter_idx >= start) & (self.filter_idx < start + scores.size(1))).nonzero(as_tuple=True)
+            scores[rows, self.filter_idx[rows, cols] - start] = -float('inf')
+        if self.target_scores is not None:
+            higher = (scores > self.target_scores).sum(1)
+            ties = (scores == self.target_scores).sum(1)
+            self.ranks = higher + 1 if self.ranks is None else self.ranks + higher
+            self.ties = ties if self.ties is None else self.ties + ties
+        if self.k:
+            entities = torch.arange(start, start + scores.size(1), device=scores.device).expand_as(scores)
+            if self.top_scores is not None:
+                scores = torch.cat([self.top_scores, scores], 1)
+                entities = torch.cat([self.top_entities, entities], 1)
+            self.top_scores, top = scores.topk(min(self.k, scores.size(1)), dim=1)
+            self.top_entities = entities.gather(1, top)
+        return self
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from util.helper_classes import Reproduce
+
+
+def _dataset(data_path, model_dir, models, ensembles):
+    """ A manifest entry. models and ensemble members are (checkpoint folder in model_dir, model name) pairs."""
+    return {'data_path': data_path, 'model_dir': model_dir, 'models': models, 'ensembles': ensembles}
+
+
+# Pretrained models and ensembles reported in the paper.
+MANIFEST = [
+    _dataset('KGs/FB15k-237/', 'PretrainedModels/FB15K-237/',
+             models=[('QMultBatch', 'QMultBatch'), ('OMultBatch', 'OMultBatch'), ('ConvQBatch', 'ConvQBatch'),
+                     ('ConvOBatch', 'ConvOBatch')],
+             ensembles=[[('QMultBatch', 'QMultBatch'), ('OMultBatch', 'OMultBatch')],
+                        [('QMultBatch', 'QMultBatch'), ('ConvQBatch', 'ConvQBatch')],
+                        [('QMultBatch', 'QMultBatch'), ('ConvOBatch', 'ConvOBatch')],
+                        [('OMultBatch', 'OMultBatch'), ('ConvQBatch', 'ConvQBatch')],
+                        [('OMultBatch', 'OMultBatch'), ('ConvOBatch', 'ConvOBatch')],
+                        [('ConvQBatch', 'ConvQBatch'), ('ConvOBatch', 'ConvOBatch'), ('OMultBatch', 'OMultBatch')]]),
+    _dataset('KGs/YAGO3-10/', 'PretrainedModels/YAGO3-10/',
+             models=[('QMult', 'QMult'), ('OMult', 'OMult'), ('ConvQ', 'ConvQ'), ('ConvO', 'ConvO')],
+             ensembles=[[('QMult', 'QMult'), ('OMult', 'OMult')],
+                        [('QMult', 'QMult'), ('ConvQ', 'ConvQ')],
+                        [('QMult', 'QMult'), ('ConvO', 'ConvO')],
+                        [('OMult', 'OMult'), ('ConvQ', 'ConvQ')],
+                        [('OMult', 'OMult'), ('ConvO', 'ConvO')],
+                        [('ConvQ', 'ConvQ'), ('ConvO', 'ConvO'), ('OMult', 'OMult')]]),
+    _dataset('KGs/WN18RR/', 'PretrainedModels/WN18RR/',
+             models=[('QMult', 'QMult'), ('OMultBatch', 'OMultBatch'), ('ConvQBatch', 'ConvQBatch'),
+                     ('ConvOBatch', 'ConvOBatch')],
+             ensembles=[[('QMult', 'QMult'), ('OMultBatch', 'OMultBatch')],
+                        [('QMult', 'QMult'), ('ConvQBatch', 'ConvQBatch')],
+                        [('QMult', 'QMult'), ('ConvOBatch', 'ConvOBatch')],
+                        [('OMult', 'OMult'), ('ConvQBatch', 'ConvQBatch')],
+                        [('OMultBatch', 'OMultBatch'), ('ConvOBatch', 'ConvOBatch')],
+                        [('ConvQBatch', 'ConvQBatch'), ('ConvOBatch', 'ConvOBatch'), ('OMultBatch', 'OMultBatch')]]),
+    _dataset('KGs/FB15k/', 'PretrainedModels/FB15K/',
+             models=[('QMult', 'QMultBatch'), ('OMult', 'OMultBatch'), ('ConvQ', 'ConvQBatch'),
+                     ('ConvO', 'ConvOBatch')],
+             ensembles=[]),
+    _dataset('KGs/WN18/', 'PretrainedModels/WN18/',
+             models=[('QMult', 'QMultBatch'), ('ConvQ', 'ConvQBatch'), ('OMult', 'OMultBatch'),
+                     ('ConvO', 'ConvOBatch')],
+             ensembles=[]),
+    _dataset('KGs/UMLS/', 'PretrainedModels/UMLS/',
+             models=[('QMult', 'QMultBatch'), ('ConvQ', 'ConvQBatch'), ('OMult', 'OMultBatch'),
+                     ('ConvO', 'ConvOBatch')],
+             ensembles=[[('ConvQ', 'ConvQBatch'), ('ConvO', 'ConvOBatch'), ('OMult', 'OMultBatch')],
+                        [('ConvQ', 'ConvQBatch'), ('ConvO', 'ConvOBatch')],
+                        [('QMult', 'QMultBatch'), ('OMult', 'OMultBatch')],
+                        [('QMult', 'QMultBatch'), ('ConvQ', 'ConvQBatch')],
+                        [('QMult', 'QMultBatch'), ('ConvO', 'ConvOBatch')],
+                        [('OMult', 'OMultBatch'), ('ConvQ', 'ConvQBatch')],
+                        [('OMult', 'OMultBatch'), ('ConvO', 'ConvOBatch')]]),
+    _dataset('KGs/KINSHIP/', 'PretrainedModels/Kinship/',
+             models=[('QMult', 'QMultBatch'), ('ConvQ', 'ConvQBatch'), ('OMult', 'OMultBatch'),
+                     ('ConvO', 'ConvOBatch')],
+             ensembles=[[('ConvQ', 'ConvQBatch'), ('ConvO', 'ConvOBatch'), ('OMult', 'OMultBatch')],
+                        [('ConvQ', 'ConvQBatch'), ('ConvO', 'ConvOBatch')],
+                        [('QMult', 'QMultBatch'), ('OMult', 'OMultBatch')],
+                        [('QMult', 'QMultBatch'), ('ConvQ', 'ConvQBatch')],
+                        [('QMult', 'QMultBatch'), ('ConvO', 'ConvOBatch')],
+                        [('OMult', 'OMultBatch'), ('ConvQ', 'ConvQBatch')],
+                        [('OMult', 'OMultBatch'), ('ConvO', 'ConvOBatch')]]),
+]
+
+
+class LRUCache:
+    """ Keep at most maxsize values, evicting the least recently used one."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """ Return the value of key, computing it via load() on a miss."""
+        if key in self.values:
+            self.hits += 1
+            self.values.move_to_end(key)
+            return self.values[key]
+        self.misses += 1
+        value = load()
+        self.values[key] = value
+        if len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.values.clear()
+
+
+class ReproductionEngine(Reproduce):
+    """
+    Run a manifest of datasets, pretrained models and ensembles.
+
+    Datasets and frozen models are cached by path, hence each checkpoint is read once although it is
+    evaluated on its own and as a member of several ensembles.
+    """
+
+    def __init__(self, max_datasets=1, max_models=8, batch_size=32, block_size=None):
+        super().__init__(batch_size, block_size)
+        self.datasets = LRUCache(max_datasets)
+        self.models = LRUCache(max_models)
+
+    def load_dataset(self, data_path, tail_pred_constraint=False):
+        return self.datasets.get((data_path, tail_pred_constraint),
+                                 lambda: Reproduce.load_dataset(data_path, tail_pred_constraint))
+
+    def load_model(self, model_path, model_name):
+        model = self.models.get((model_path, model_name), lambda: Reproduce.load_model(self, model_path, model_name))
+        self.model = model_name
+        return model
+
+    def run(self, manifest, per_rel_flag_=False, tail_pred_constraint=False, all_views=False):
+        for entry in manifest:
+            print('###########################################     {0}     ##########################################'
+                  .format(entry['data_path']))
+            for checkpoint, model_name in entry['models']:
+                self.reproduce(model_path=entry['model_dir'] + checkpoint, data_path=entry['data_path'],
+                               model_name=model_name, per_rel_flag_=per_rel_flag_,
+                               tail_pred_constraint=tail_pred_constraint, all_views=all_views)
+            # Score the test data once per model for all ensembles.
+            checkpoints = sorted(set(member for members in entry['ensembles'] for member in members))
+            if checkpoints:
+                self.reproduce_ensembles(
+                    models=[self.load_model(model_path=entry['model_dir'] + checkpoint, model_name=model_name)
+                            for checkpoint, model_name in checkpoints],
+                    ensembles=[tuple(checkpoints.index(member) for member in members)
+                               for members in entry['ensembles']],
+                    data_path=entry['data_path'], per_rel_flag_=per_rel_flag_,
+                    tail_pred_constraint=tail_pred_constraint, all_views=all_views)
+            # Free memory before the next dataset.
+            self.models.clear()
@@ -0,0 +1,208 @@
+import bisect
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+
+# Upper bounds of buckets of latencies (ms), sizes of micro-batches and throughputs (queries per second).
+LATENCY_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+BATCH_SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+THROUGHPUT_BOUNDS = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+class Histogram:
+    """ Counts of values in the buckets [0, bounds[0]], (bounds[0], bounds[1]], ..., (bounds[-1], inf)."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, value):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += value
+
+    def summary(self):
+        with self.lock:
+            count = sum(self.counts)
+            return {'bounds': self.bounds, 'counts': list(self.counts), 'count': count,
+                    'mean': self.total / count if count else None}
+
+
+def _parse_flag(value):
+    """ Boolean of a JSON value or query string, e.g., true, 1, "1", "true"; ValueError otherwise."""
+    if value in (True, '1', 'true', 'True'):
+        return True
+    if value in (False, '0', 'false', 'False'):
+        return False
+    raise ValueError('expected a boolean, got {0!r}'.format(value))
+
+
+class _Request:
+    def __init__(self, e1_idx, r_idx, k, filtered):
+        self.e1_idx, self.r_idx, self.k, self.filtered = e1_idx, r_idx, k, filtered
+        self.arrival = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent requests to a LinkPredictor into micro-batches scored by a single worker thread.
+    A micro-batch is scored once max_batch_size queries are waiting or max_delay seconds after its first request
+    arrived, i.e., a query waits at most max_delay before it is scored.
+    Latencies (ms), sizes of micro-batches and their throughputs (queries per second) are recorded in histograms.
+    """
+
+    def __init__(self, predictor, max_batch_size=1024, max_delay=0.005):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.requests = queue.Queue()
+        self.latency = Histogram(LATENCY_BOUNDS)
+        self.batch_size = Histogram(BATCH_SIZE_BOUNDS)
+        self.throughput = Histogram(THROUGHPUT_BOUNDS)
+        self.started = time.time()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def topk(self, e1_idx, r_idx, k=10, filtered=True):
+        """ LinkPredictor.topk of a request, blocks until its micro-batch is scored."""
+        request = _Request(np.asarray(e1_idx, dtype=np.int64), np.asarray(r_idx, dtype=np.int64), k, filtered)
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def run(self):
+        while True:
+            batch = [self.requests.get()]
+            size, deadline = len(batch[0].e1_idx), batch[0].arrival + self.max_delay
+            while size < self.max_batch_size:
+                try:
+                    batch.append(self.requests.get(timeout=max(deadline - time.time(), 0)))
+                except queue.Empty:
+                    break
+                size += len(batch[-1].e1_idx)
+            self.score(batch)
+
+    def score(self, batch):
+        start = time.time()
+        for filtered in set(request.filtered for request in batch):
+            group = [request for request in batch if request.filtered == filtered]
+            try:
+                # The top k of each request are the first k of the top max k.
+                scores, entities = self.predictor.topk(np.concatenate([request.e1_idx for request in group]),
+                                                       np.concatenate([request.r_idx for request in group]),
+                                                       max(request.k for request in group), filtered)
+            except Exception as error:
+                for request in group:
+                    request.error = error
+                continue
+            offset = 0
+            for request in group:
+                stop = offset + len(request.e1_idx)
+                request.result = scores[offset:stop, :request.k], entities[offset:stop, :request.k]
+                offset = stop
+        end = time.time()
+        size = sum(len(request.e1_idx) for request in batch)
+        self.batch_size.add(size)
+        self.throughput.add(size / max(end - start, 1e-6))
+        for request in batch:
+            self.latency.add(1000 * (end - request.arrival))
+            request.done.set()
+
+    def stats(self):
+        stats = {'latency_ms': self.latency.summary(), 'batch_size': self.batch_size.summary(),
+                 'throughput_qps': self.throughput.summary(),
+                 'queries_per_second': self.batch_size.total / (time.time() - self.started)}
+        if getattr(self.predictor, 'cache', None) is not None:
+            stats['cache'] = self.predictor.cache.stats()
+        return stats
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """
+    GET /predict?model=QMult&head=h&relation=r&k=10&filtered=1: top-k tails of (h,r,?) or, given tail=t instead of
+    head, top-k heads of (?,r,t). model may be omitted if a single model is served.
+    POST /predict {"model": ..., "filtered": true, "queries": [{"head": h, "relation": r, "k": 10}, ...]}.
+    GET /stats: histograms of MicroBatcher (and TopKCache statistics) per model.
+    Predictions are lists of [entity, score] pairs per query.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            return self.reply(200, {name: batcher.stats() for name, batcher in self.server.batchers.items()})
+        if url.path != '/predict':
+            return self.reply(404, {'error': 'unknown path {0}'.format(url.path)})
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.predict(query.get('model'), [query], query.get('filtered', True))
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/predict':
+            return self.reply(404, {'error': 'unknown path {0}'.format(self.path)})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8'))
+        except ValueError as error:
+            return self.reply(400, {'error': 'invalid JSON: {0}'.format(error)})
+        if not isinstance(body, dict):
+            return self.reply(400, {'error': 'invalid body: expected a JSON object'})
+        self.predict(body.get('model'), body.get('queries', []), body.get('filtered', True))
+
+    def predict(self, model, queries, filtered):
+        batchers = self.server.batchers
+        if model is None and len(batchers) == 1:
+            model = next(iter(batchers))
+        if not isinstance(model, str) or model not in batchers:
+            return self.reply(404, {'error': 'unknown model {0}, served: {1}'.format(model, sorted(batchers))})
+        if not isinstance(queries, list) or not all(isinstance(query, dict) for query in queries):
+            return self.reply(400, {'error': 'invalid queries: expected a list of JSON objects'})
+        predictor = batchers[model].predictor
+        try:
+            # (?,r,t) are answered as (t,r_reverse,?).
+            entities = [query['head'] if 'head' in query else query['tail'] for query in queries]
+            relations = [query['relation'] + ('' if 'head' in query else '_reverse') for query in queries]
+            e1_idx, r_idx = predictor.encode_entities(entities), predictor.encode_relations(relations)
+            ks = [int(query.get('k', 10)) for query in queries]
+            if any(k < 1 for k in ks):
+                raise ValueError('k must be at least 1, got {0}'.format(min(ks)))
+            filtered = _parse_flag(filtered)
+        except (KeyError, ValueError, TypeError, AttributeError) as error:
+            return self.reply(400, {'error': 'invalid query: {0}'.format(error)})
+        if not queries:
+            return self.reply(200, {'predictions': []})
+        try:
+            scores, entities = batchers[model].topk(e1_idx, r_idx, max(ks), filtered)
+        except Exception as error:
+            return self.reply(500, {'error': repr(error)})
+        predictions = predictor.decode(scores, entities)
+        self.reply(200, {'predictions': [prediction[:k] for prediction, k in zip(predictions, ks)]})
+
+    def reply(self, status, content):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InferenceServer(ThreadingMixIn, HTTPServer):
+    """ HTTP server of MicroBatchers per model name on localhost, see InferenceHandler."""
+    daemon_threads = True
+
+    def __init__(self, batchers, host='127.0.0.1', port=8000):
+        super().__init__((host, port), InferenceHandler)
+        self.batchers = batchers